@@ -0,0 +1,193 @@
+"""
+API Keys - Cached key-hash lookup and write-behind last_used_at
+
+Bot authentication looks API keys up by sha256(key). ApiKeyCache keeps
+key_hash -> key record in memory, including negative entries for hashes
+that match no active key, so a flood of bogus tokens is answered from
+memory instead of hitting api_keys. Creating or revoking a key evicts its
+hash on every worker via LISTEN/NOTIFY.
+
+last_used_at is recorded in memory and written by ApiKeyUsageWriter in one
+UPDATE ... FROM unnest(...) statement every api_key_usage_flush_seconds.
+"""
+import asyncio
+import hashlib
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Tuple
+
+from .config import get_api_settings
+from .database import fetch_one, execute
+from .cache_invalidation import invalidation_bus, INVALIDATE_ALL
+
+logger = logging.getLogger(__name__)
+settings = get_api_settings()
+
+# LISTEN/NOTIFY channel for api_keys writes (payload: key_hash or "*")
+API_KEYS_CHANNEL = "api_keys"
+
+
+def hash_api_key(api_key: str) -> str:
+    """Storage / lookup hash of an API key"""
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class ApiKeyCache:
+    """
+    key_hash -> active key record, bounded (LRU), for
+    api_key_cache_ttl_seconds. Hashes that match no active key are kept in a
+    separate, smaller LRU for api_key_negative_cache_ttl_seconds, so a flood
+    of bogus keys can only evict other negative entries.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._negative: "OrderedDict[str, float]" = OrderedDict()
+        self._generation = 0
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+
+    def invalidate(self, payload: str = INVALIDATE_ALL):
+        self._generation += 1
+        if payload == INVALIDATE_ALL:
+            self._entries.clear()
+            self._negative.clear()
+        else:
+            self._entries.pop(payload, None)
+            self._negative.pop(payload, None)
+
+    @staticmethod
+    def _put(entries: OrderedDict, key_hash: str, value, max_entries: int):
+        entries[key_hash] = value
+        entries.move_to_end(key_hash)
+        while len(entries) > max_entries:
+            entries.popitem(last=False)
+
+    async def lookup(self, key_hash: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        cached = self._entries.get(key_hash)
+        if cached and cached[0] > now:
+            self._entries.move_to_end(key_hash)
+            self._hits += 1
+            return cached[1]
+
+        expires_at = self._negative.get(key_hash)
+        if expires_at and expires_at > now:
+            self._negative.move_to_end(key_hash)
+            self._negative_hits += 1
+            return None
+
+        self._misses += 1
+        generation = self._generation
+        key = await fetch_one(
+            "SELECT key_id, name, scopes FROM api_keys WHERE key_hash = $1 AND is_active = TRUE",
+            key_hash
+        )
+
+        # An invalidation that raced with this query wins - don't cache
+        if generation == self._generation:
+            now = time.monotonic()
+            if key:
+                self._negative.pop(key_hash, None)
+                self._put(self._entries, key_hash, (now + settings.api_key_cache_ttl_seconds, key),
+                          settings.api_key_cache_max_entries)
+            else:
+                self._entries.pop(key_hash, None)
+                self._put(self._negative, key_hash, now + settings.api_key_negative_cache_ttl_seconds,
+                          settings.api_key_negative_cache_max_entries)
+        return key
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": settings.api_key_cache_max_entries,
+            "negative_entries": len(self._negative),
+            "negative_max_entries": settings.api_key_negative_cache_max_entries,
+            "hits": self._hits,
+            "negative_hits": self._negative_hits,
+            "misses": self._misses,
+        }
+
+
+api_key_cache = ApiKeyCache()
+invalidation_bus.subscribe(API_KEYS_CHANNEL, api_key_cache.invalidate)
+
+
+async def invalidate_api_key(key_hash: str = INVALIDATE_ALL, conn=None):
+    """Call after creating, revoking or changing an API key"""
+    await invalidation_bus.publish(API_KEYS_CHANNEL, key_hash, conn=conn)
+
+
+class ApiKeyUsageWriter:
+    """Deduplicates api_keys.last_used_at per key and writes them in batches"""
+
+    def __init__(self):
+        self._pending: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def record(self, key_id: str, used_at: Optional[datetime] = None):
+        """Note that key_id was used (latest timestamp per key is kept)"""
+        used_at = used_at or datetime.now(timezone.utc)
+        previous = self._pending.get(key_id)
+        if previous is None or used_at > previous:
+            self._pending[key_id] = used_at
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info("API key usage writer started")
+
+    async def stop(self):
+        """Stop the timer loop and flush whatever is pending"""
+        if self.is_running:
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        logger.info("API key usage writer stopped")
+
+    async def _run(self):
+        while not self._stopping:
+            await asyncio.sleep(settings.api_key_usage_flush_seconds)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write all pending last_used_at values. Returns the number of keys sent."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+            try:
+                await execute("""
+                    UPDATE api_keys k
+                    SET last_used_at = v.used_at
+                    FROM unnest($1::text[], $2::timestamptz[]) AS v(key_id, used_at)
+                    WHERE k.key_id = v.key_id
+                      AND (k.last_used_at IS NULL OR k.last_used_at < v.used_at)
+                """, list(pending.keys()), list(pending.values()))
+            except Exception as e:
+                logger.error(f"Failed to flush last_used_at for {len(pending)} API keys: {e}")
+                # The set of keys is small and bounded - merge back for the next flush
+                for key_id, used_at in pending.items():
+                    self.record(key_id, used_at)
+                return 0
+            return len(pending)
+
+
+# Process-wide writer
+api_key_usage_writer = ApiKeyUsageWriter()
@@ -27,11 +27,14 @@ from enum import Enum
 
 from .database import fetch_one, fetch_all, execute, get_pool
 from .notification_router import emit_event, EventType
+from .money_ops import money_executor, lock_users
 from .order_lifecycle import (
     OrderStatus, OrderType, OrderErrorCode,
     transition_order, approve_order as lifecycle_approve,
     reject_order as lifecycle_reject, start_processing,
-    complete_order, fail_order, requires_approval, is_direct_execution
+    complete_order, fail_order, requires_approval, is_direct_execution,
+    approve_and_execute_order, approve_and_execute_orders_batch,
+    transition_orders_batch
 )
 
 logger = logging.getLogger(__name__)
@@ -124,9 +127,12 @@ async def _process_approval(
     Process order approval with PROPER STATE TRANSITIONS.
     
     Flow: pending_approval -> approved -> processing -> completed/failed
+    All steps run in ONE transaction (order_lifecycle.approve_and_execute_order),
+    and the approval event is queued to the outbox in that same transaction.
     
     EXECUTION HONESTY: Only mark as completed after successful execution.
-    MONEY SAFETY: Balance changes only committed on successful execution.
+    MONEY SAFETY: Balance changes only committed on successful execution,
+    and applied atomically (real_balance = real_balance +/- amount).
     """
     order_id = order['order_id']
     order_type = order.get('order_type', 'deposit')
@@ -138,207 +144,115 @@ async def _process_approval(
     # Track if amount was adjusted
     amount_adjusted = final_amount is not None and final_amount != order['amount']
     
-    # STEP 1: Transition to approved
-    approve_result = await lifecycle_approve(
-        order_id=order_id,
-        actor_id=actor_id,
-        actor_type=actor_type.value,
-        final_amount=final_amount,
-        reason=f"Approved by {actor_type.value}"
-    )
-    
-    if not approve_result.success:
-        if approve_result.is_noop:
-            # Already approved - proceed to execute
-            logger.info(f"Order {order_id} already approved, proceeding to execute")
-        else:
-            return ApprovalResult(
-                False,
-                approve_result.message,
-                {"error_code": approve_result.error_code, "already_processed": True}
+    async def execute_side_effects(conn, locked_order: Dict) -> str:
+        """Balance mutation for the order type (runs inside the approval transaction)"""
+        await lock_users(conn, [user['user_id']])
+        
+        if order_type in ['wallet_topup', 'deposit', 'wallet_load']:
+            # Credit wallet
+            await _credit_balance(
+                conn, user['user_id'], amount, order_id, 'order',
+                _ledger_description(locked_order, order_type),
+                deposit_bonus=bonus_amount
             )
+            
+            # Update order amount if adjusted
+            if amount_adjusted:
+                await conn.execute("""
+                    UPDATE orders SET amount = $1, total_amount = $2, updated_at = NOW()
+                    WHERE order_id = $3
+                """, amount, amount + bonus_amount, order_id)
+            
+            return f"Wallet credited: ₱{amount:,.2f}"
+        
+        elif order_type in ['withdrawal', 'withdrawal_wallet']:
+            # MONEY SAFETY: balance is checked in the same statement that debits it
+            await _debit_balance(
+                conn, user['user_id'], amount, order_id, 'withdrawal',
+                _ledger_description(locked_order, order_type),
+                count_withdrawal=True
+            )
+            return f"Withdrawal processed: ₱{amount:,.2f}"
+        
+        elif order_type == 'game_load':
+            # Game load - should not reach here (direct execution)
+            return "Game load approved"
+        
+        elif order_type in ['admin_manual_load']:
+            # Admin manual load
+            await _credit_balance(
+                conn, user['user_id'], amount, order_id, 'admin_manual',
+                _ledger_description(locked_order, order_type)
+            )
+            return f"Admin manual load: ₱{amount:,.2f}"
+        
+        elif order_type in ['admin_manual_withdraw']:
+            # Admin manual withdraw
+            await _debit_balance(
+                conn, user['user_id'], amount, order_id, 'admin_manual',
+                _ledger_description(locked_order, order_type),
+                insufficient_message="Insufficient balance for admin withdrawal"
+            )
+            return f"Admin manual withdraw: ₱{amount:,.2f}"
+        
+        # Generic approval
+        return f"Order approved: {order_type}"
     
-    # STEP 2: Transition to processing
-    processing_result = await start_processing(order_id, actor_id, actor_type.value)
-    
-    if not processing_result.success and not processing_result.is_noop:
-        return ApprovalResult(
-            False,
-            f"Failed to start processing: {processing_result.message}",
-            {"error_code": processing_result.error_code}
-        )
-    
-    # STEP 3: Execute side effects based on order type
-    execution_success = False
-    execution_result = None
-    final_status = 'failed'
-    
+    # approve -> processing -> execute -> completed/failed, plus the outbox
+    # event, in ONE transaction - the notification commits with the order
     pool = await get_pool()
-    try:
-        async with pool.acquire() as conn:
-            async with conn.transaction():
-                if order_type in ['wallet_topup', 'deposit', 'wallet_load']:
-                    # Credit wallet
-                    current_balance = float(user.get('real_balance', 0) or 0)
-                    new_balance = current_balance + amount
-                    
-                    await conn.execute("""
-                        UPDATE users SET 
-                            real_balance = $1,
-                            bonus_balance = bonus_balance + $2,
-                            deposit_count = deposit_count + 1,
-                            total_deposited = total_deposited + $3,
-                            updated_at = NOW()
-                        WHERE user_id = $4
-                    """, new_balance, bonus_amount, amount, user['user_id'])
-                    
-                    # Log to ledger
-                    await conn.execute("""
-                        INSERT INTO wallet_ledger 
-                        (ledger_id, user_id, transaction_type, amount, balance_before, balance_after,
-                         reference_type, reference_id, description, created_at)
-                        VALUES ($1, $2, 'credit', $3, $4, $5, 'order', $6, $7, NOW())
-                    """, str(uuid.uuid4()), user['user_id'], amount,
-                       current_balance, new_balance, order_id,
-                       f"Wallet credit via {order.get('payment_method', 'N/A')}")
-                    
-                    # Update order amount if adjusted
-                    if amount_adjusted:
-                        await conn.execute("""
-                            UPDATE orders SET amount = $1, total_amount = $2, updated_at = NOW()
-                            WHERE order_id = $3
-                        """, amount, amount + bonus_amount, order_id)
-                    
-                    execution_success = True
-                    execution_result = f"Wallet credited: ₱{amount:,.2f}"
-                    
-                elif order_type in ['withdrawal', 'withdrawal_wallet']:
-                    # MONEY SAFETY: Check balance BEFORE withdrawal
-                    current_balance = float(user.get('real_balance', 0) or 0)
-                    
-                    if current_balance < amount:
-                        raise Exception(f"Insufficient balance: has ₱{current_balance:,.2f}, needs ₱{amount:,.2f}")
-                    
-                    new_balance = current_balance - amount
-                    
-                    await conn.execute("""
-                        UPDATE users SET 
-                            real_balance = $1,
-                            total_withdrawn = total_withdrawn + $2,
-                            updated_at = NOW()
-                        WHERE user_id = $3
-                    """, new_balance, amount, user['user_id'])
-                    
-                    # Log to ledger
-                    await conn.execute("""
-                        INSERT INTO wallet_ledger 
-                        (ledger_id, user_id, transaction_type, amount, balance_before, balance_after,
-                         reference_type, reference_id, description, created_at)
-                        VALUES ($1, $2, 'debit', $3, $4, $5, 'withdrawal', $6, $7, NOW())
-                    """, str(uuid.uuid4()), user['user_id'], amount,
-                       current_balance, new_balance, order_id,
-                       f"Withdrawal to {order.get('payment_method', 'N/A')}")
-                    
-                    execution_success = True
-                    execution_result = f"Withdrawal processed: ₱{amount:,.2f}"
-                    
-                elif order_type == 'game_load':
-                    # Game load - should not reach here (direct execution)
-                    execution_success = True
-                    execution_result = "Game load approved"
-                
-                elif order_type in ['admin_manual_load']:
-                    # Admin manual load
-                    current_balance = float(user.get('real_balance', 0) or 0)
-                    new_balance = current_balance + amount
-                    
-                    await conn.execute("""
-                        UPDATE users SET real_balance = $1, updated_at = NOW()
-                        WHERE user_id = $2
-                    """, new_balance, user['user_id'])
-                    
-                    await conn.execute("""
-                        INSERT INTO wallet_ledger 
-                        (ledger_id, user_id, transaction_type, amount, balance_before, balance_after,
-                         reference_type, reference_id, description, created_at)
-                        VALUES ($1, $2, 'credit', $3, $4, $5, 'admin_manual', $6, $7, NOW())
-                    """, str(uuid.uuid4()), user['user_id'], amount,
-                       current_balance, new_balance, order_id, "Admin manual balance load")
-                    
-                    execution_success = True
-                    execution_result = f"Admin manual load: ₱{amount:,.2f}"
-                
-                elif order_type in ['admin_manual_withdraw']:
-                    # Admin manual withdraw
-                    current_balance = float(user.get('real_balance', 0) or 0)
-                    
-                    if current_balance < amount:
-                        raise Exception("Insufficient balance for admin withdrawal")
-                    
-                    new_balance = current_balance - amount
-                    
-                    await conn.execute("""
-                        UPDATE users SET real_balance = $1, updated_at = NOW()
-                        WHERE user_id = $2
-                    """, new_balance, user['user_id'])
-                    
-                    await conn.execute("""
-                        INSERT INTO wallet_ledger 
-                        (ledger_id, user_id, transaction_type, amount, balance_before, balance_after,
-                         reference_type, reference_id, description, created_at)
-                        VALUES ($1, $2, 'debit', $3, $4, $5, 'admin_manual', $6, $7, NOW())
-                    """, str(uuid.uuid4()), user['user_id'], amount,
-                       current_balance, new_balance, order_id, "Admin manual balance withdraw")
-                    
-                    execution_success = True
-                    execution_result = f"Admin manual withdraw: ₱{amount:,.2f}"
-                
-                else:
-                    # Generic approval
-                    execution_success = True
-                    execution_result = f"Order approved: {order_type}"
-                
-    except Exception as e:
-        logger.error(f"Order {order_id} execution failed: {e}")
-        execution_success = False
-        execution_result = str(e)
-    
-    # STEP 4: Transition to final state
-    if execution_success:
-        await complete_order(order_id, actor_id, actor_type.value, execution_result)
-        final_status = 'completed'
-    else:
-        await fail_order(order_id, actor_id, actor_type.value, execution_result)
-        final_status = 'failed'
-    
-    # Emit approval event
-    event_type = EventType.ORDER_APPROVED
-    if order_type in ['wallet_topup', 'wallet_load']:
-        event_type = EventType.WALLET_TOPUP_APPROVED
-    elif order_type in ['withdrawal', 'withdrawal_wallet']:
-        event_type = EventType.WITHDRAW_APPROVED
-    
-    await emit_event(
-        event_type=event_type,
-        title=f"Order {final_status.title()}",
-        message=f"Order for @{user.get('username')} {final_status} by {actor_type.value}",
-        reference_id=order_id,
-        reference_type="order",
-        user_id=user['user_id'],
-        username=user.get('username'),
-        display_name=user.get('display_name'),
-        amount=amount,
-        extra_data={
-            "order_type": order_type,
-            "approved_by": actor_id,
-            "actor_type": actor_type.value,
-            "amount_adjusted": amount_adjusted,
-            "original_amount": order['amount'] if amount_adjusted else None,
-            "final_status": final_status,
-            "execution_result": execution_result
-        },
-        requires_action=False
-    )
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            result = await approve_and_execute_order(
+                order_id=order_id,
+                actor_id=actor_id,
+                actor_type=actor_type.value,
+                execute_fn=execute_side_effects,
+                final_amount=final_amount,
+                reason=f"Approved by {actor_type.value}",
+                conn=conn
+            )
+            
+            if not result.success:
+                return ApprovalResult(
+                    False,
+                    result.message,
+                    {"error_code": result.error_code, "already_processed": True}
+                )
+            
+            final_status = result.to_status
+            execution_success = final_status == OrderStatus.COMPLETED.value
+            execution_result = result.message
+            
+            # Emit approval event
+            event_type = EventType.ORDER_APPROVED
+            if order_type in ['wallet_topup', 'wallet_load']:
+                event_type = EventType.WALLET_TOPUP_APPROVED
+            elif order_type in ['withdrawal', 'withdrawal_wallet']:
+                event_type = EventType.WITHDRAW_APPROVED
+            
+            await emit_event(
+                event_type=event_type,
+                title=f"Order {final_status.title()}",
+                message=f"Order for @{user.get('username')} {final_status} by {actor_type.value}",
+                reference_id=order_id,
+                reference_type="order",
+                user_id=user['user_id'],
+                username=user.get('username'),
+                display_name=user.get('display_name'),
+                amount=amount,
+                extra_data={
+                    "order_type": order_type,
+                    "approved_by": actor_id,
+                    "actor_type": actor_type.value,
+                    "amount_adjusted": amount_adjusted,
+                    "original_amount": order['amount'] if amount_adjusted else None,
+                    "final_status": final_status,
+                    "execution_result": execution_result
+                },
+                requires_action=False,
+                conn=conn
+            )
     
     if not execution_success:
         return ApprovalResult(
@@ -365,6 +279,109 @@ async def _process_approval(
     )
 
 
+# ==================== BALANCE MUTATIONS ====================
+# Atomic: the balance is changed relative to its current value in the same
+# statement that writes the ledger row, so there is no read-modify-write race.
+# Callers hold the user's money lock (money_ops.lock_users).
+
+def _ledger_description(order: Dict, order_type: str) -> str:
+    """Ledger text for an approved order (shared by single and bulk approval)"""
+    if order_type in ['wallet_topup', 'deposit', 'wallet_load']:
+        return f"Wallet credit via {order.get('payment_method') or 'N/A'}"
+    if order_type in ['withdrawal', 'withdrawal_wallet']:
+        return f"Withdrawal to {order.get('payment_method') or 'N/A'}"
+    if order_type == 'admin_manual_load':
+        return "Admin manual balance load"
+    if order_type == 'admin_manual_withdraw':
+        return "Admin manual balance withdraw"
+    return f"Order approved: {order_type}"
+
+
+async def _credit_balance(
+    conn,
+    user_id: str,
+    amount: float,
+    reference_id: str,
+    reference_type: str,
+    description: str,
+    deposit_bonus: Optional[float] = None
+) -> float:
+    """
+    Credit real_balance and write the ledger row. Returns the new balance.
+    
+    deposit_bonus: for deposits - also credits bonus_balance and bumps the
+    deposit stats (deposit_count, total_deposited)
+    """
+    is_deposit = deposit_bonus is not None
+    new_balance = await conn.fetchval("""
+        WITH u AS (
+            UPDATE users SET 
+                real_balance = real_balance + $3,
+                bonus_balance = bonus_balance + $7,
+                deposit_count = deposit_count + CASE WHEN $8 THEN 1 ELSE 0 END,
+                total_deposited = total_deposited + CASE WHEN $8 THEN $3 ELSE 0 END,
+                updated_at = NOW()
+            WHERE user_id = $2
+            RETURNING real_balance
+        )
+        INSERT INTO wallet_ledger 
+        (ledger_id, user_id, transaction_type, amount, balance_before, balance_after,
+         reference_type, reference_id, description, created_at)
+        SELECT $1, $2, 'credit', $3, u.real_balance - $3, u.real_balance, $4, $5, $6, NOW()
+        FROM u
+        RETURNING balance_after
+    """, str(uuid.uuid4()), user_id, amount, reference_type, reference_id, description,
+       deposit_bonus or 0, is_deposit)
+    
+    if new_balance is None:
+        raise Exception("User not found")
+    return float(new_balance)
+
+
+async def _debit_balance(
+    conn,
+    user_id: str,
+    amount: float,
+    reference_id: str,
+    reference_type: str,
+    description: str,
+    count_withdrawal: bool = False,
+    insufficient_message: Optional[str] = None
+) -> float:
+    """
+    Debit real_balance if it covers amount, and write the ledger row.
+    Returns the new balance; raises if the balance is insufficient.
+    
+    count_withdrawal: also add to total_withdrawn
+    """
+    new_balance = await conn.fetchval("""
+        WITH u AS (
+            UPDATE users SET 
+                real_balance = real_balance - $3,
+                total_withdrawn = total_withdrawn + CASE WHEN $7 THEN $3 ELSE 0 END,
+                updated_at = NOW()
+            WHERE user_id = $2 AND real_balance >= $3
+            RETURNING real_balance
+        )
+        INSERT INTO wallet_ledger 
+        (ledger_id, user_id, transaction_type, amount, balance_before, balance_after,
+         reference_type, reference_id, description, created_at)
+        SELECT $1, $2, 'debit', $3, u.real_balance + $3, u.real_balance, $4, $5, $6, NOW()
+        FROM u
+        RETURNING balance_after
+    """, str(uuid.uuid4()), user_id, amount, reference_type, reference_id, description,
+       count_withdrawal)
+    
+    if new_balance is None:
+        if insufficient_message:
+            raise Exception(insufficient_message)
+        current_balance = float(await conn.fetchval(
+            "SELECT real_balance FROM users WHERE user_id = $1", user_id
+        ) or 0)
+        raise Exception(f"Insufficient balance: has ₱{current_balance:,.2f}, needs ₱{amount:,.2f}")
+    return float(new_balance)
+
+
 async def _process_rejection(
     order: Dict,
     user: Dict,
@@ -379,50 +396,56 @@ async def _process_rejection(
     order_type = order.get('order_type', 'deposit')
     reason = rejection_reason or "Rejected by reviewer"
     
-    # Use lifecycle rejection
-    reject_result = await lifecycle_reject(
-        order_id=order_id,
-        actor_id=actor_id,
-        actor_type=actor_type.value,
-        reason=reason
-    )
-    
-    if not reject_result.success:
-        if reject_result.is_noop:
-            return ApprovalResult(True, "Order already rejected", {"already_processed": True})
-        return ApprovalResult(False, reject_result.message, {"error_code": reject_result.error_code})
-    
-    # Update rejection reason in order
-    await execute("""
-        UPDATE orders SET rejection_reason = $1 WHERE order_id = $2
-    """, reason, order_id)
-    
-    # Emit rejection event
-    event_type = EventType.ORDER_REJECTED
-    if order_type in ['wallet_topup', 'wallet_load']:
-        event_type = EventType.WALLET_TOPUP_REJECTED
-    elif order_type in ['withdrawal', 'withdrawal_wallet']:
-        event_type = EventType.WITHDRAW_REJECTED
-    
-    await emit_event(
-        event_type=event_type,
-        title="Order Rejected",
-        message=f"Order for @{user.get('username')} rejected. Reason: {reason}",
-        reference_id=order_id,
-        reference_type="order",
-        user_id=user['user_id'],
-        username=user.get('username'),
-        display_name=user.get('display_name'),
-        amount=order['amount'],
-        extra_data={
-            "order_type": order_type,
-            "rejected_by": actor_id,
-            "actor_type": actor_type.value,
-            "reason": reason,
-            "final_status": "rejected"
-        },
-        requires_action=False
-    )
+    # Rejection, reason and the outbox event commit together
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            # Use lifecycle rejection
+            reject_result = await lifecycle_reject(
+                order_id=order_id,
+                actor_id=actor_id,
+                actor_type=actor_type.value,
+                reason=reason,
+                conn=conn
+            )
+            
+            if not reject_result.success:
+                if reject_result.is_noop:
+                    return ApprovalResult(True, "Order already rejected", {"already_processed": True})
+                return ApprovalResult(False, reject_result.message, {"error_code": reject_result.error_code})
+            
+            # Update rejection reason in order
+            await conn.execute("""
+                UPDATE orders SET rejection_reason = $1 WHERE order_id = $2
+            """, reason, order_id)
+            
+            # Emit rejection event
+            event_type = EventType.ORDER_REJECTED
+            if order_type in ['wallet_topup', 'wallet_load']:
+                event_type = EventType.WALLET_TOPUP_REJECTED
+            elif order_type in ['withdrawal', 'withdrawal_wallet']:
+                event_type = EventType.WITHDRAW_REJECTED
+            
+            await emit_event(
+                event_type=event_type,
+                title="Order Rejected",
+                message=f"Order for @{user.get('username')} rejected. Reason: {reason}",
+                reference_id=order_id,
+                reference_type="order",
+                user_id=user['user_id'],
+                username=user.get('username'),
+                display_name=user.get('display_name'),
+                amount=order['amount'],
+                extra_data={
+                    "order_type": order_type,
+                    "rejected_by": actor_id,
+                    "actor_type": actor_type.value,
+                    "reason": reason,
+                    "final_status": "rejected"
+                },
+                requires_action=False,
+                conn=conn
+            )
     
     return ApprovalResult(
         True,
@@ -436,6 +459,259 @@ async def _process_rejection(
     )
 
 
+# ==================== BULK APPROVALS ====================
+
+def _event_type_for(order_type: str, approved: bool) -> EventType:
+    """Notification event for an approved/rejected order of this type"""
+    if order_type in ['wallet_topup', 'wallet_load']:
+        return EventType.WALLET_TOPUP_APPROVED if approved else EventType.WALLET_TOPUP_REJECTED
+    if order_type in ['withdrawal', 'withdrawal_wallet']:
+        return EventType.WITHDRAW_APPROVED if approved else EventType.WITHDRAW_REJECTED
+    return EventType.ORDER_APPROVED if approved else EventType.ORDER_REJECTED
+
+
+async def _execute_approvals_batch(conn, orders: list) -> Dict[str, tuple]:
+    """
+    Set-based version of _process_approval's side effects.
+    
+    Locks the affected users once (ordered by user_id), walks the orders in
+    memory to compute each ledger row's before/after balance (a withdrawal
+    that would overdraw fails alone), then applies all balance deltas with
+    one UPDATE and all ledger rows with one INSERT.
+    """
+    user_ids = sorted({o['user_id'] for o in orders})
+    await lock_users(conn, user_ids)
+    users = await conn.fetch("""
+        SELECT user_id, real_balance FROM users
+        WHERE user_id = ANY($1::varchar[])
+        ORDER BY user_id
+        FOR UPDATE
+    """, user_ids)
+    balances = {u['user_id']: float(u['real_balance'] or 0) for u in users}
+    
+    # user_id -> [real, bonus, deposit_count, deposited, withdrawn] deltas
+    deltas: Dict[str, list] = {}
+    ledger = {k: [] for k in ("ledger_id", "user_id", "type", "amount", "before", "after", "ref_type", "ref_id", "description")}
+    outcomes: Dict[str, tuple] = {}
+    
+    def add_ledger(order, tx_type, amount, before, after, ref_type, description):
+        for key, value in zip(ledger, (str(uuid.uuid4()), order['user_id'], tx_type, amount,
+                                        before, after, ref_type, order['order_id'], description)):
+            ledger[key].append(value)
+    
+    for order in orders:
+        order_id = order['order_id']
+        order_type = order.get('order_type') or 'deposit'
+        user_id = order['user_id']
+        amount = float(order['amount'] or 0)
+        
+        if user_id not in balances:
+            outcomes[order_id] = (False, "User not found")
+            continue
+        
+        current_balance = balances[user_id]
+        delta = deltas.setdefault(user_id, [0.0, 0.0, 0, 0.0, 0.0])
+        
+        if order_type in ['wallet_topup', 'deposit', 'wallet_load']:
+            bonus_amount = float(order.get('bonus_amount') or 0)
+            balances[user_id] = current_balance + amount
+            delta[0] += amount
+            delta[1] += bonus_amount
+            delta[2] += 1
+            delta[3] += amount
+            add_ledger(order, 'credit', amount, current_balance, balances[user_id], 'order',
+                       _ledger_description(order, order_type))
+            outcomes[order_id] = (True, f"Wallet credited: ₱{amount:,.2f}")
+        
+        elif order_type in ['withdrawal', 'withdrawal_wallet', 'admin_manual_withdraw']:
+            if current_balance < amount:
+                if order_type == 'admin_manual_withdraw':
+                    outcomes[order_id] = (False, "Insufficient balance for admin withdrawal")
+                else:
+                    outcomes[order_id] = (False, f"Insufficient balance: has ₱{current_balance:,.2f}, needs ₱{amount:,.2f}")
+                continue
+            balances[user_id] = current_balance - amount
+            delta[0] -= amount
+            if order_type == 'admin_manual_withdraw':
+                add_ledger(order, 'debit', amount, current_balance, balances[user_id], 'admin_manual',
+                           _ledger_description(order, order_type))
+                outcomes[order_id] = (True, f"Admin manual withdraw: ₱{amount:,.2f}")
+            else:
+                delta[4] += amount
+                add_ledger(order, 'debit', amount, current_balance, balances[user_id], 'withdrawal',
+                           _ledger_description(order, order_type))
+                outcomes[order_id] = (True, f"Withdrawal processed: ₱{amount:,.2f}")
+        
+        elif order_type == 'admin_manual_load':
+            balances[user_id] = current_balance + amount
+            delta[0] += amount
+            add_ledger(order, 'credit', amount, current_balance, balances[user_id], 'admin_manual',
+                       _ledger_description(order, order_type))
+            outcomes[order_id] = (True, f"Admin manual load: ₱{amount:,.2f}")
+        
+        elif order_type == 'game_load':
+            outcomes[order_id] = (True, "Game load approved")
+        
+        else:
+            outcomes[order_id] = (True, f"Order approved: {order_type}")
+    
+    changed = {uid: d for uid, d in deltas.items() if any(d)}
+    if changed:
+        uids = list(changed)
+        await conn.execute("""
+            UPDATE users u SET 
+                real_balance = u.real_balance + v.real_delta,
+                bonus_balance = u.bonus_balance + v.bonus_delta,
+                deposit_count = u.deposit_count + v.deposit_count,
+                total_deposited = u.total_deposited + v.deposited,
+                total_withdrawn = u.total_withdrawn + v.withdrawn,
+                updated_at = NOW()
+            FROM unnest($1::varchar[], $2::float8[], $3::float8[], $4::int[], $5::float8[], $6::float8[])
+                AS v(user_id, real_delta, bonus_delta, deposit_count, deposited, withdrawn)
+            WHERE u.user_id = v.user_id
+        """, uids, *[[changed[uid][i] for uid in uids] for i in range(5)])
+    
+    if ledger["ledger_id"]:
+        await conn.execute("""
+            INSERT INTO wallet_ledger 
+            (ledger_id, user_id, transaction_type, amount, balance_before, balance_after,
+             reference_type, reference_id, description, created_at)
+            SELECT l.*, NOW()
+            FROM unnest($1::varchar[], $2::varchar[], $3::varchar[], $4::float8[], $5::float8[],
+                        $6::float8[], $7::varchar[], $8::varchar[], $9::text[]) AS l
+        """, *ledger.values())
+    
+    return outcomes
+
+
+async def bulk_approve_or_reject_orders(
+    order_ids: list,
+    action: Literal["approve", "reject"],
+    actor_type: ActorType,
+    actor_id: str,
+    rejection_reason: Optional[str] = None
+) -> list:
+    """
+    Approve or reject many orders in ONE transaction.
+    
+    Same state machine, ledger and audit trail as approve_or_reject_order,
+    but rows are locked and written with set-based statements
+    (order_lifecycle.approve_and_execute_orders_batch / transition_orders_batch).
+    Amount adjustment is not supported in bulk.
+    
+    Returns:
+        Per-order dicts: order_id, success, message, final_status, error_code
+    """
+    logger.info(f"Processing bulk {action} of {len(order_ids)} orders by {actor_type}:{actor_id}")
+    
+    reason = rejection_reason or "Rejected by reviewer"
+    
+    # Transitions, side effects and outbox events commit together
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            if action == "approve":
+                results = await approve_and_execute_orders_batch(
+                    order_ids=order_ids,
+                    actor_id=actor_id,
+                    actor_type=actor_type.value,
+                    execute_batch_fn=_execute_approvals_batch,
+                    reason=f"Approved by {actor_type.value}",
+                    conn=conn
+                )
+            else:
+                results = await transition_orders_batch(
+                    order_ids=order_ids,
+                    to_status=OrderStatus.REJECTED.value,
+                    actor_id=actor_id,
+                    actor_type=actor_type.value,
+                    reason=reason,
+                    metadata_patch={
+                        "rejected_by": actor_id,
+                        "rejected_at": datetime.now(timezone.utc).isoformat(),
+                        "rejection_reason": reason
+                    },
+                    conn=conn
+                )
+                rejected_ids = [r.order_id for r in results if r.success and not r.is_noop]
+                if rejected_ids:
+                    await conn.execute("""
+                        UPDATE orders SET rejection_reason = $1 WHERE order_id = ANY($2::varchar[])
+                    """, reason, rejected_ids)
+            
+            # Notifications for orders that actually changed
+            changed_ids = [r.order_id for r in results if r.success and not r.is_noop]
+            if changed_ids:
+                rows = await conn.fetch("""
+                    SELECT o.order_id, o.order_type, o.amount, u.user_id, u.username, u.display_name
+                    FROM orders o JOIN users u ON u.user_id = o.user_id
+                    WHERE o.order_id = ANY($1::varchar[])
+                """, changed_ids)
+                by_id = {r['order_id']: r for r in rows}
+                for result in results:
+                    row = by_id.get(result.order_id)
+                    if not row or not result.success or result.is_noop:
+                        continue
+                    if action == "approve":
+                        await emit_event(
+                            event_type=_event_type_for(row['order_type'], True),
+                            title=f"Order {result.to_status.title()}",
+                            message=f"Order for @{row['username']} {result.to_status} by {actor_type.value}",
+                            reference_id=row['order_id'],
+                            reference_type="order",
+                            user_id=row['user_id'],
+                            username=row['username'],
+                            display_name=row['display_name'],
+                            amount=row['amount'],
+                            extra_data={
+                                "order_type": row['order_type'],
+                                "approved_by": actor_id,
+                                "actor_type": actor_type.value,
+                                "amount_adjusted": False,
+                                "original_amount": None,
+                                "final_status": result.to_status,
+                                "execution_result": result.message,
+                                "bulk": True
+                            },
+                            requires_action=False,
+                            conn=conn
+                        )
+                    else:
+                        await emit_event(
+                            event_type=_event_type_for(row['order_type'], False),
+                            title="Order Rejected",
+                            message=f"Order for @{row['username']} rejected. Reason: {reason}",
+                            reference_id=row['order_id'],
+                            reference_type="order",
+                            user_id=row['user_id'],
+                            username=row['username'],
+                            display_name=row['display_name'],
+                            amount=row['amount'],
+                            extra_data={
+                                "order_type": row['order_type'],
+                                "rejected_by": actor_id,
+                                "actor_type": actor_type.value,
+                                "reason": reason,
+                                "final_status": "rejected",
+                                "bulk": True
+                            },
+                            requires_action=False,
+                            conn=conn
+                        )
+    
+    return [
+        {
+            "order_id": r.order_id,
+            "success": r.success and (action == "reject" or r.to_status == OrderStatus.COMPLETED.value),
+            "message": r.message,
+            "final_status": r.to_status if r.success else r.from_status or None,
+            "error_code": r.error_code,
+            "already_processed": r.is_noop,
+        }
+        for r in results
+    ]
+
+
 # ==================== WALLET LOAD SPECIFIC ====================
 
 async def approve_or_reject_wallet_load(
@@ -484,37 +760,50 @@ async def approve_or_reject_wallet_load(
     amount_adjusted = final_amount is not None and final_amount != load_request['amount']
     
     if action == "approve":
-        current_balance = float(load_request.get('real_balance', 0) or 0)
-        new_balance = current_balance + amount
+        new_balance = None
         
         try:
-            pool = await get_pool()
-            async with pool.acquire() as conn:
-                async with conn.transaction():
-                    await conn.execute("""
-                        UPDATE users SET real_balance = $1, updated_at = NOW()
-                        WHERE user_id = $2
-                    """, new_balance, load_request['user_id'])
-                    
-                    # CANONICAL STATUS: completed
-                    await conn.execute("""
-                        UPDATE wallet_load_requests 
-                        SET status = $1, 
-                            amount = $2,
-                            reviewed_by = $3, 
-                            reviewed_at = $4, 
-                            updated_at = NOW()
-                        WHERE request_id = $5
-                    """, OrderStatus.COMPLETED.value, amount, actor_id, now, request_id)
+            async with money_executor.user_transaction(load_request['user_id']) as conn:
+                # CANONICAL STATUS: completed - guarded, so a concurrent
+                # approval of the same request cannot credit twice
+                claimed = await conn.fetchval("""
+                    UPDATE wallet_load_requests 
+                    SET status = $1, 
+                        amount = $2,
+                        reviewed_by = $3, 
+                        reviewed_at = $4, 
+                        updated_at = NOW()
+                    WHERE request_id = $5 AND status = $6
+                    RETURNING request_id
+                """, OrderStatus.COMPLETED.value, amount, actor_id, now, request_id, load_request['status'])
+                
+                if claimed:
+                    new_balance = await _credit_balance(
+                        conn, load_request['user_id'], amount, request_id, 'wallet_load',
+                        f"Wallet load via {load_request['payment_method']}"
+                    )
                     
-                    await conn.execute("""
-                        INSERT INTO wallet_ledger 
-                        (ledger_id, user_id, transaction_type, amount, balance_before, balance_after,
-                         reference_type, reference_id, description, created_at)
-                        VALUES ($1, $2, 'credit', $3, $4, $5, 'wallet_load', $6, $7, NOW())
-                    """, str(uuid.uuid4()), load_request['user_id'], amount,
-                       current_balance, new_balance, request_id,
-                       f"Wallet load via {load_request['payment_method']}")
+                    # Notification is queued in the same transaction (outbox)
+                    await emit_event(
+                        event_type=EventType.WALLET_LOAD_APPROVED,
+                        title="Wallet Load Approved & Executed",
+                        message=f"₱{amount:,.2f} credited to @{load_request.get('username')}",
+                        reference_id=request_id,
+                        reference_type="wallet_load",
+                        user_id=load_request['user_id'],
+                        username=load_request.get('username'),
+                        display_name=load_request.get('display_name'),
+                        amount=amount,
+                        extra_data={
+                            "new_balance": new_balance,
+                            "approved_by": actor_id,
+                            "actor_type": actor_type.value,
+                            "amount_adjusted": amount_adjusted,
+                            "final_status": "completed"
+                        },
+                        requires_action=False,
+                        conn=conn
+                    )
                     
         except Exception as e:
             logger.error(f"Wallet load {request_id} execution failed: {e}")
@@ -531,25 +820,8 @@ async def approve_or_reject_wallet_load(
                 "error": str(e)
             })
         
-        await emit_event(
-            event_type=EventType.WALLET_LOAD_APPROVED,
-            title="Wallet Load Approved & Executed",
-            message=f"₱{amount:,.2f} credited to @{load_request.get('username')}",
-            reference_id=request_id,
-            reference_type="wallet_load",
-            user_id=load_request['user_id'],
-            username=load_request.get('username'),
-            display_name=load_request.get('display_name'),
-            amount=amount,
-            extra_data={
-                "new_balance": new_balance,
-                "approved_by": actor_id,
-                "actor_type": actor_type.value,
-                "amount_adjusted": amount_adjusted,
-                "final_status": "completed"
-            },
-            requires_action=False
-        )
+        if new_balance is None:
+            return ApprovalResult(False, "Request already processed", {"already_processed": True})
         
         return ApprovalResult(True, "Wallet load approved and executed (completed)", {
             "request_id": request_id,
@@ -562,31 +834,40 @@ async def approve_or_reject_wallet_load(
     else:  # reject
         reason = rejection_reason or "Rejected by reviewer"
         
-        await execute("""
-            UPDATE wallet_load_requests 
-            SET status = $1, rejection_reason = $2,
-                reviewed_by = $3, reviewed_at = $4, updated_at = NOW()
-            WHERE request_id = $5
-        """, OrderStatus.REJECTED.value, reason, actor_id, now, request_id)
-        
-        await emit_event(
-            event_type=EventType.WALLET_LOAD_REJECTED,
-            title="Wallet Load Rejected",
-            message=f"Request from @{load_request.get('username')} rejected. Reason: {reason}",
-            reference_id=request_id,
-            reference_type="wallet_load",
-            user_id=load_request['user_id'],
-            username=load_request.get('username'),
-            display_name=load_request.get('display_name'),
-            amount=load_request['amount'],
-            extra_data={
-                "rejected_by": actor_id,
-                "actor_type": actor_type.value,
-                "reason": reason,
-                "final_status": "rejected"
-            },
-            requires_action=False
-        )
+        # Guarded status change and outbox event commit together
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                claimed = await conn.fetchval("""
+                    UPDATE wallet_load_requests 
+                    SET status = $1, rejection_reason = $2,
+                        reviewed_by = $3, reviewed_at = $4, updated_at = NOW()
+                    WHERE request_id = $5 AND status = $6
+                    RETURNING request_id
+                """, OrderStatus.REJECTED.value, reason, actor_id, now, request_id, load_request['status'])
+                
+                if not claimed:
+                    return ApprovalResult(False, "Request already processed", {"already_processed": True})
+                
+                await emit_event(
+                    event_type=EventType.WALLET_LOAD_REJECTED,
+                    title="Wallet Load Rejected",
+                    message=f"Request from @{load_request.get('username')} rejected. Reason: {reason}",
+                    reference_id=request_id,
+                    reference_type="wallet_load",
+                    user_id=load_request['user_id'],
+                    username=load_request.get('username'),
+                    display_name=load_request.get('display_name'),
+                    amount=load_request['amount'],
+                    extra_data={
+                        "rejected_by": actor_id,
+                        "actor_type": actor_type.value,
+                        "reason": reason,
+                        "final_status": "rejected"
+                    },
+                    requires_action=False,
+                    conn=conn
+                )
         
         return ApprovalResult(True, "Wallet load rejected", {
             "request_id": request_id,
@@ -10,8 +10,13 @@ This module provides:
 
 ALL routes MUST import from this module. No ad-hoc token parsing allowed.
 """
+import time
+import asyncio
+import hashlib
 import logging
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
@@ -19,7 +24,8 @@ from fastapi import Depends, Header, HTTPException, status, Request
 
 from ..core.security import decode_jwt_token
 from ..core.config import get_api_settings, ErrorCodes
-from ..core.database import fetch_one
+from ..core.database import fetch_one, execute
+from ..core.cache_invalidation import invalidation_bus, INVALIDATE_ALL
 
 logger = logging.getLogger(__name__)
 settings = get_api_settings()
@@ -121,6 +127,251 @@ async def extract_token(
     return None
 
 
+# ==================== USER CACHE ====================
+
+# LISTEN/NOTIFY channel for writes to users auth fields (payload: user_id or "*")
+AUTH_USERS_CHANNEL = "auth_users"
+
+
+def _auth_user_from_row(user: Dict[str, Any]) -> AuthenticatedUser:
+    return AuthenticatedUser(
+        user_id=user['user_id'],
+        username=user['username'],
+        display_name=user.get('display_name', user['username']),
+        referral_code=user.get('referral_code', ''),
+        role=user.get('role', 'user'),
+        is_active=user.get('is_active', True)
+    )
+
+
+class AuthUserCache:
+    """
+    user_id -> AuthenticatedUser, bounded (LRU) with a TTL.
+    
+    Every authenticated request resolves its user here instead of querying
+    users. Writes to is_active / role / username / display_name /
+    referral_code call invalidate_auth_user(), which drops the entry on
+    every worker; auth_user_cache_ttl_seconds bounds how long any other
+    change (including a deactivation) can go unnoticed.
+    """
+    
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[float, AuthenticatedUser]]" = OrderedDict()
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+    
+    def invalidate(self, payload: str = INVALIDATE_ALL):
+        self._generation += 1
+        if payload == INVALIDATE_ALL:
+            self._entries.clear()
+        else:
+            self._entries.pop(payload, None)
+    
+    async def get(self, user_id: str) -> Optional[AuthenticatedUser]:
+        cached = self._entries.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            self._entries.move_to_end(user_id)
+            self._hits += 1
+            return cached[1]
+        
+        self._misses += 1
+        generation = self._generation
+        user = await fetch_one(
+            """SELECT user_id, username, display_name, referral_code, role, is_active 
+               FROM users WHERE user_id = $1""",
+            user_id
+        )
+        if not user:
+            self._entries.pop(user_id, None)
+            return None
+        
+        auth_user = _auth_user_from_row(user)
+        self.store(auth_user, generation)
+        return auth_user
+    
+    @property
+    def generation(self) -> int:
+        return self._generation
+    
+    def store(self, auth_user: AuthenticatedUser, generation: int):
+        """Cache a user loaded elsewhere; generation = self.generation read before the query"""
+        # An invalidation that raced with the query wins - don't cache
+        if generation != self._generation:
+            return
+        self._entries[auth_user.user_id] = (time.monotonic() + settings.auth_user_cache_ttl_seconds, auth_user)
+        self._entries.move_to_end(auth_user.user_id)
+        while len(self._entries) > settings.auth_user_cache_max_entries:
+            self._entries.popitem(last=False)
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": settings.auth_user_cache_max_entries,
+            "ttl_seconds": settings.auth_user_cache_ttl_seconds,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+
+auth_user_cache = AuthUserCache()
+invalidation_bus.subscribe(AUTH_USERS_CHANNEL, auth_user_cache.invalidate)
+
+
+async def invalidate_auth_user(user_id: str, conn=None):
+    """Call after changing a user's is_active / role / username / display_name / referral_code"""
+    await invalidation_bus.publish(AUTH_USERS_CHANNEL, user_id, conn=conn)
+
+
+# ==================== PORTAL SESSIONS ====================
+
+# LISTEN/NOTIFY channel for portal session revocation (payload: token hash or "*")
+PORTAL_SESSIONS_CHANNEL = "portal_sessions"
+
+PORTAL_SESSION_USER_SQL = """
+    SELECT ps.expires_at,
+           u.user_id, u.username, u.display_name, u.referral_code, u.role, u.is_active
+    FROM portal_sessions ps
+    JOIN users u ON u.user_id = ps.user_id
+    WHERE ps.session_token = $1 AND ps.expires_at > NOW()
+"""
+
+
+def _token_key(token: str) -> str:
+    """Cache key for a session token - raw tokens are never kept in memory"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class PortalSessionCache:
+    """
+    sha256(session_token) -> (user_id, expires_at), bounded (LRU) with a TTL.
+    
+    Misses run one joined portal_sessions + users query and also prime
+    auth_user_cache, so hits resolve the user there (and see its
+    invalidations). Entries never outlive the session's expires_at, and
+    revoke_portal_session() evicts a token on every worker.
+    """
+    
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[float, str, datetime]]" = OrderedDict()
+        self._generation = 0
+    
+    def invalidate(self, payload: str = INVALIDATE_ALL):
+        self._generation += 1
+        if payload == INVALIDATE_ALL:
+            self._entries.clear()
+        else:
+            self._entries.pop(payload, None)
+    
+    async def resolve(self, token: str) -> Optional[AuthenticatedUser]:
+        key = _token_key(token)
+        cached = self._entries.get(key)
+        if cached:
+            cache_until, user_id, expires_at = cached
+            if cache_until > time.monotonic() and expires_at > datetime.now(timezone.utc):
+                self._entries.move_to_end(key)
+                return await auth_user_cache.get(user_id)
+            self._entries.pop(key, None)
+        
+        generation = self._generation
+        user_generation = auth_user_cache.generation
+        row = await fetch_one(PORTAL_SESSION_USER_SQL, token)
+        if not row:
+            return None
+        
+        auth_user = _auth_user_from_row(row)
+        auth_user_cache.store(auth_user, user_generation)
+        
+        # A revocation that raced with this query wins - don't cache
+        if generation == self._generation:
+            self._entries[key] = (
+                time.monotonic() + settings.portal_session_cache_ttl_seconds,
+                auth_user.user_id,
+                row['expires_at']
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.portal_session_cache_max_entries:
+                self._entries.popitem(last=False)
+        return auth_user
+
+
+portal_session_cache = PortalSessionCache()
+invalidation_bus.subscribe(PORTAL_SESSIONS_CHANNEL, portal_session_cache.invalidate)
+
+
+async def revoke_portal_session(token: str) -> bool:
+    """Delete a portal session (logout) and evict it from every worker's cache"""
+    deleted = await fetch_one(
+        "DELETE FROM portal_sessions WHERE session_token = $1 RETURNING session_id",
+        token
+    )
+    await invalidation_bus.publish(PORTAL_SESSIONS_CHANNEL, _token_key(token))
+    return deleted is not None
+
+
+class PortalSessionSweeper:
+    """Background task that deletes expired portal_sessions rows in batches"""
+    
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        if self.is_running:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info("Portal session sweeper started")
+    
+    async def stop(self):
+        if not self.is_running:
+            return
+        self._stopping = True
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Portal session sweeper stopped")
+    
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Portal session sweep error: {e}")
+            await asyncio.sleep(settings.portal_session_sweep_seconds)
+    
+    async def sweep(self) -> int:
+        """Delete every expired session. Returns the number deleted."""
+        deleted = 0
+        while True:
+            result = await execute("""
+                DELETE FROM portal_sessions
+                WHERE session_id IN (
+                    SELECT session_id FROM portal_sessions
+                    WHERE expires_at <= NOW()
+                    LIMIT $1
+                )
+            """, settings.portal_session_sweep_batch)
+            count = int(result.split()[-1]) if result else 0
+            deleted += count
+            if count < settings.portal_session_sweep_batch:
+                break
+        if deleted:
+            logger.info(f"Deleted {deleted} expired portal session(s)")
+        return deleted
+
+
+# Process-wide sweeper
+portal_session_sweeper = PortalSessionSweeper()
+
+
 # ==================== USER RESOLUTION ====================
 
 async def resolve_user_from_jwt(token: str) -> Optional[AuthenticatedUser]:
@@ -139,56 +390,15 @@ async def resolve_user_from_jwt(token: str) -> Optional[AuthenticatedUser]:
     if not user_id:
         return None
     
-    # Verify user exists and is active
-    user = await fetch_one(
-        """SELECT user_id, username, display_name, referral_code, role, is_active 
-           FROM users WHERE user_id = $1""",
-        user_id
-    )
-    
-    if not user:
-        return None
-    
-    return AuthenticatedUser(
-        user_id=user['user_id'],
-        username=user['username'],
-        display_name=user.get('display_name', user['username']),
-        referral_code=user.get('referral_code', ''),
-        role=user.get('role', 'user'),
-        is_active=user.get('is_active', True)
-    )
+    # Verify user exists (is_active is checked by the caller)
+    return await auth_user_cache.get(user_id)
 
 
 async def resolve_user_from_portal_token(token: str) -> Optional[AuthenticatedUser]:
     """
     Resolve user from portal session token (legacy support).
     """
-    session = await fetch_one(
-        """SELECT user_id FROM portal_sessions 
-           WHERE session_token = $1 AND expires_at > NOW()""",
-        token
-    )
-    
-    if not session:
-        return None
-    
-    user = await fetch_one(
-        """SELECT user_id, username, display_name, referral_code, role, is_active 
-           FROM users WHERE user_id = $1""",
-        session['user_id']
-    )
-    
-    if not user:
-        return None
-    
-    return AuthenticatedUser(
-        user_id=user['user_id'],
-        username=user['username'],
-        display_name=user.get('display_name', user['username']),
-        referral_code=user.get('referral_code', ''),
-        role=user.get('role', 'user'),
-        is_active=user.get('is_active', True)
-    )
+    return await portal_session_cache.resolve(token)
 
 
 # ==================== CORE AUTH DEPENDENCIES ====================
@@ -436,6 +646,15 @@ __all__ = [
     "AuthenticatedUser",
     "AuthErrorCode",
     
+    # User cache
+    "auth_user_cache",
+    "invalidate_auth_user",
+    
+    # Portal sessions
+    "portal_session_cache",
+    "revoke_portal_session",
+    "portal_session_sweeper",
+    
     # Primary dependencies
     "get_current_user",
     "get_current_user_optional",
@@ -0,0 +1,133 @@
+"""
+Cache Invalidation Bus - Postgres LISTEN/NOTIFY fan-out across workers
+
+In-process caches (bot subscription index, auth caches, ...) register a
+handler per channel. publish() runs the local handlers immediately and sends
+a pg_notify so every other uvicorn worker drops its copy too.
+
+- publish(conn=...) inside a transaction: Postgres delivers the NOTIFY only
+  on commit, so other workers never reload before the change is visible.
+- If the listener connection drops, notifications may have been missed, so
+  every handler is called with payload "*" (full invalidation) after reconnect.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+import asyncpg
+
+from .config import get_api_settings
+
+logger = logging.getLogger(__name__)
+settings = get_api_settings()
+
+# Payload meaning "drop everything"
+INVALIDATE_ALL = "*"
+
+RECONNECT_DELAY_SECONDS = 5.0
+
+InvalidationHandler = Callable[[str], None]
+
+
+class CacheInvalidationBus:
+    """Dedicated LISTEN connection plus per-channel handler registry"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[InvalidationHandler]] = {}
+        self._conn: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def is_listening(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    def subscribe(self, channel: str, handler: InvalidationHandler):
+        """Register a handler (payload: str) for a channel. Call before start()."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def _dispatch(self, channel: str, payload: str):
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception as e:
+                logger.error(f"Cache invalidation handler failed on {channel}: {e}")
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self._dispatch(channel, payload or INVALIDATE_ALL)
+
+    def _on_termination(self, connection):
+        if self._stopping:
+            return
+        logger.warning("Cache invalidation listener disconnected - reconnecting")
+        self._conn = None
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _connect(self):
+        conn = await asyncpg.connect(settings.database_url)
+        conn.add_termination_listener(self._on_termination)
+        for channel in self._handlers:
+            await conn.add_listener(channel, self._on_notify)
+        self._conn = conn
+
+    async def _reconnect(self):
+        while not self._stopping:
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+            try:
+                await self._connect()
+            except Exception as e:
+                logger.warning(f"Cache invalidation reconnect failed: {e}")
+                continue
+            # Anything could have changed while we were deaf
+            for channel in self._handlers:
+                self._dispatch(channel, INVALIDATE_ALL)
+            logger.info("Cache invalidation listener reconnected")
+            return
+
+    async def start(self):
+        """Open the LISTEN connection (call on startup)"""
+        self._stopping = False
+        try:
+            await self._connect()
+            logger.info(f"Cache invalidation listening on: {', '.join(self._handlers) or '(none)'}")
+        except Exception as e:
+            # Caches still work per-process; cross-worker invalidation resumes on reconnect
+            logger.error(f"Cache invalidation listener failed to start: {e}")
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def stop(self):
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._conn is not None:
+            try:
+                await self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    async def publish(self, channel: str, payload: str = INVALIDATE_ALL, conn=None):
+        """
+        Invalidate locally and notify all other workers.
+
+        Args:
+            channel: Channel name
+            payload: Key to invalidate, or "*" for everything
+            conn: Optional connection - inside a transaction, the NOTIFY is
+                  delivered to other workers only on commit
+        """
+        self._dispatch(channel, payload)
+        try:
+            if conn is not None:
+                await conn.execute("SELECT pg_notify($1, $2)", channel, payload)
+            else:
+                from .database import execute
+                await execute("SELECT pg_notify($1, $2)", channel, payload)
+        except Exception as e:
+            logger.error(f"Failed to publish cache invalidation on {channel}: {e}")
+
+
+# Process-wide bus
+invalidation_bus = CacheInvalidationBus()
@@ -86,12 +86,42 @@ class APIv1Settings(BaseSettings):
     webhook_retry_attempts: int = 3
     webhook_retry_delay_seconds: int = 5
     webhook_timeout_seconds: int = 10
+    # DB-backed delivery worker (polls webhook_deliveries by next_retry_at)
+    webhook_worker_concurrency: int = 10
+    webhook_batch_size: int = 50
+    webhook_poll_seconds: float = 1.0
+    webhook_delivery_lease_seconds: int = 60
+    webhook_max_connections_per_host: int = 10
+    webhook_subscription_cache_ttl_seconds: int = 30
+    # Per-webhook circuit breaker
+    webhook_breaker_failure_threshold: int = 5
+    webhook_breaker_open_seconds: int = 60
     # DEV DEFAULT: Insecure placeholder - MUST be overridden in production
     webhook_signing_secret: str = "default-webhook-secret-change-me"
     
     # ==================== Security ====================
     password_min_length: int = 8
     referral_code_length: int = 8
+    # bcrypt work factor; hashes made with a different factor are rehashed on login
+    bcrypt_rounds: int = 12
+    # bcrypt runs on a dedicated thread pool of this size (per worker)
+    password_hash_workers: int = 4
+    # Authenticated-user cache (per worker). Writes to auth fields invalidate
+    # it on every worker; the TTL bounds staleness for anything else, e.g. a
+    # deactivation made directly in the database.
+    auth_user_cache_ttl_seconds: int = 30
+    auth_user_cache_max_entries: int = 10000
+    # sessions.last_used_at is written behind: batched every flush interval,
+    # and only when the stored value is older than the granularity
+    session_activity_flush_seconds: float = 5.0
+    session_last_used_granularity_seconds: int = 60
+    session_activity_max_pending: int = 100000
+    # Portal session token -> user_id cache (never outlives the session's expires_at)
+    portal_session_cache_ttl_seconds: int = 30
+    portal_session_cache_max_entries: int = 10000
+    # Expired portal_sessions rows are deleted in the background
+    portal_session_sweep_seconds: float = 300.0
+    portal_session_sweep_batch: int = 1000
     
     # ==================== Bot/Internal API ====================
     # DEV DEFAULT: Insecure placeholder - MUST be overridden in production
@@ -99,11 +129,55 @@ class APIv1Settings(BaseSettings):
     # Production bot token (static bearer token for bot auth)
     # Must be set in production, token issuance endpoint disabled
     bot_api_token: Optional[str] = None
+    # API key lookups (key hash -> key) are cached per worker; unknown hashes
+    # are cached too so floods of bogus keys never reach the database
+    api_key_cache_ttl_seconds: int = 60
+    api_key_negative_cache_ttl_seconds: int = 30
+    api_key_cache_max_entries: int = 10000
+    # Negative entries are bounded separately so they can't evict real keys
+    api_key_negative_cache_max_entries: int = 2000
+    # api_keys.last_used_at is written in batches
+    api_key_usage_flush_seconds: float = 10.0
     
     # ==================== Telegram ====================
     telegram_bot_token: Optional[str] = None
     telegram_webhook_secret: Optional[str] = None
     telegram_chat_id: Optional[str] = None
+    # Notification fan-out: one pooled HTTP client per process, bounded concurrency per event
+    telegram_http_timeout_seconds: float = 30.0
+    telegram_max_connections: int = 50
+    notification_max_concurrency: int = 8
+    # Telegram rate limits: ~30 msg/s per bot, ~1 msg/s per chat
+    telegram_bot_rate_per_second: float = 30.0
+    telegram_chat_rate_per_second: float = 1.0
+    telegram_chat_burst: int = 3
+    telegram_429_max_retries: int = 5
+    
+    # ==================== Notification Outbox ====================
+    # Events are written to notification_outbox and delivered by a background dispatcher
+    notification_outbox_enabled: bool = True
+    notification_outbox_poll_seconds: float = 1.0
+    notification_outbox_batch_size: int = 20
+    notification_outbox_max_attempts: int = 8
+    notification_outbox_retry_base_seconds: float = 2.0
+    notification_outbox_lease_seconds: int = 120
+    notification_outbox_retention_days: int = 7
+    
+    # notification_logs are buffered and written in batches (COPY)
+    notification_log_batch_size: int = 200
+    notification_log_flush_ms: int = 500
+    notification_log_max_buffer: int = 10000
+    
+    # ==================== Order Lifecycle ====================
+    # transition_order: guarded UPDATE + audit INSERT as one CTE statement
+    order_transition_fast_path: bool = True
+    
+    # ==================== Game Transfers ====================
+    # Game load/redeem: reserve -> Games API call -> settle. Pending reservations
+    # older than the window (longer than the worst-case Games API call) are
+    # released by the sweeper.
+    game_transfer_reservation_seconds: int = 300
+    game_transfer_sweep_seconds: float = 60.0
     
     # ==================== Portal/Frontend URLs ====================
     portal_url: str = "http://localhost:3000"
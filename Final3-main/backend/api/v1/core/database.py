@@ -497,6 +497,26 @@ async def init_api_v1_db():
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_rules_type_scope ON rules(rule_type, scope)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_audit_created ON audit_logs(created_at DESC)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_logs(user_id)')
+        # Rules engine client context (rules_service.load_client_context)
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_rules_client_active
+            ON rules(scope_id, priority DESC) WHERE scope = 'client' AND is_active = TRUE
+        ''')
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_orders_user_game_approved_deposits
+            ON orders(user_id, game_name, approved_at DESC)
+            WHERE order_type = 'deposit' AND status = 'APPROVED_EXECUTED'
+        ''')
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_webhooks_subscribed_events
+            ON webhooks USING GIN (subscribed_events) WHERE is_active = TRUE
+        ''')
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_webhook_deliveries_due
+            ON webhook_deliveries(next_retry_at) WHERE status IN ('pending', 'retrying', 'delivering')
+        ''')
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_portal_sessions_expires ON portal_sessions(expires_at)')
+        await conn.execute('CREATE INDEX IF NOT EXISTS idx_api_keys_hash ON api_keys(key_hash) WHERE is_active = TRUE')
         
         # ==================== SEED DEFAULT DATA ====================
         # Seed games if empty
@@ -621,7 +641,37 @@ async def init_api_v1_db():
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_wallet_load_user ON wallet_load_requests(user_id)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_wallet_load_status ON wallet_load_requests(status)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_wallet_ledger_user ON wallet_ledger(user_id)')
+        
+        # Game transfer saga columns (reserve -> Games API -> settle)
+        game_load_columns = [
+            ("transfer_type", "VARCHAR(10) DEFAULT 'load'"),
+            ("account_id", "VARCHAR(36)"),
+            ("game_balance_before", "FLOAT"),
+            ("game_balance_after", "FLOAT"),
+            ("idempotency_key", "VARCHAR(100)"),
+            ("transfer_details", "JSONB DEFAULT '{}'"),
+            ("reserved_until", "TIMESTAMPTZ"),
+            ("settled_at", "TIMESTAMPTZ"),
+            ("last_error", "TEXT"),
+        ]
+        for col_name, col_def in game_load_columns:
+            try:
+                await conn.execute(f'ALTER TABLE game_loads ADD COLUMN IF NOT EXISTS {col_name} {col_def}')
+            except Exception as e:
+                logger.debug(f"Column {col_name} may already exist: {e}")
+        
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_game_loads_user ON game_loads(user_id)')
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_game_loads_pending
+            ON game_loads(reserved_until) WHERE status = 'pending'
+        ''')
+        # One live (pending/completed) load per Idempotency-Key; failed and
+        # expired attempts may be retried with the same key
+        await conn.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_game_loads_idempotency
+            ON game_loads(idempotency_key)
+            WHERE idempotency_key IS NOT NULL AND status IN ('pending', 'completed')
+        ''')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_payment_qr_method ON payment_qr(payment_method)')
         
         # ==================== TELEGRAM BOTS (MULTI-BOT SYSTEM) ====================
@@ -669,12 +719,34 @@ async def init_api_v1_db():
             )
         ''')
         
+        # ==================== NOTIFICATION OUTBOX ====================
+        # Written in the same transaction as the business change, drained by
+        # the background dispatcher (core/notification_outbox.py).
+        # PROOF IMAGE POLICY: payloads with raw image data are never queued here.
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                outbox_id VARCHAR(36) PRIMARY KEY,
+                event_type VARCHAR(50) NOT NULL,
+                payload JSONB NOT NULL,
+                status VARCHAR(20) DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                next_attempt_at TIMESTAMPTZ DEFAULT NOW(),
+                last_error TEXT,
+                created_at TIMESTAMPTZ DEFAULT NOW(),
+                delivered_at TIMESTAMPTZ
+            )
+        ''')
+        
         # Indexes for notification system
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_telegram_bots_active ON telegram_bots(is_active)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_bot_permissions_bot ON telegram_bot_event_permissions(bot_id)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_bot_permissions_event ON telegram_bot_event_permissions(event_type)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_notification_logs_event ON notification_logs(event_type)')
         await conn.execute('CREATE INDEX IF NOT EXISTS idx_notification_logs_created ON notification_logs(created_at)')
+        await conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_notification_outbox_due
+            ON notification_outbox(next_attempt_at) WHERE status = 'pending'
+        ''')
         
         logger.info("Unified database initialized successfully")
 
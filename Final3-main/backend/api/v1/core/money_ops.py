@@ -0,0 +1,96 @@
+"""
+Money Operations - Per-user serialization of balance changes
+
+Every code path that changes a user's balances (real_balance, bonus_balance,
+play_credits) runs under the user's money lock:
+
+- In-process: a keyed asyncio.Lock per user_id, so waiters in one worker
+  queue without holding a pool connection
+- Cross-process: pg_advisory_xact_lock(MONEY_LOCK_NAMESPACE, hashtext(user_id))
+  taken inside the operation's transaction and released on commit/rollback
+
+Different users proceed fully in parallel; one user's operations never
+interleave, and the hot users row is only locked for the final UPDATE.
+
+Usage:
+    async with money_executor.user_transaction(user_id) as conn:
+        ...  # reads + writes for this user, one transaction
+
+    # Already inside a transaction (e.g. order approval):
+    await lock_users(conn, [user_id])
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, AsyncIterator
+
+from .database import get_pool
+
+logger = logging.getLogger(__name__)
+
+# First key of the two-key advisory lock - keeps money locks apart from any
+# other advisory lock users of the database
+MONEY_LOCK_NAMESPACE = 0x4D4F4E  # "MON"
+
+
+async def lock_users(conn, user_ids: Iterable[str]):
+    """
+    Take the money lock for each user inside the caller's transaction.
+    Locks are taken in sorted order so multi-user batches cannot deadlock.
+    """
+    for user_id in sorted(set(user_ids)):
+        await conn.execute(
+            "SELECT pg_advisory_xact_lock($1, hashtext($2))",
+            MONEY_LOCK_NAMESPACE, user_id
+        )
+
+
+class _KeyedLock:
+    """asyncio.Lock with a waiter count, so idle keys can be dropped"""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class MoneyOperationExecutor:
+    """Runs balance-changing work serialized per user_id"""
+
+    def __init__(self):
+        self._locks: Dict[str, _KeyedLock] = {}
+
+    @asynccontextmanager
+    async def _local_lock(self, user_id: str) -> AsyncIterator[None]:
+        entry = self._locks.get(user_id)
+        if entry is None:
+            entry = self._locks[user_id] = _KeyedLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                self._locks.pop(user_id, None)
+
+    @asynccontextmanager
+    async def user_transaction(self, user_id: str) -> AsyncIterator:
+        """
+        Open a transaction holding user_id's money lock; yields the connection.
+        """
+        async with self._local_lock(user_id):
+            pool = await get_pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    await lock_users(conn, [user_id])
+                    yield conn
+
+    def active_locks(self) -> int:
+        """Number of users with an operation running or queued in this process"""
+        return len(self._locks)
+
+
+# Process-wide executor
+money_executor = MoneyOperationExecutor()
@@ -0,0 +1,172 @@
+"""
+Notification Log Writer - Buffered, batched inserts into notification_logs
+
+NotificationRouter._log_notification() appends a row to an in-memory buffer
+instead of doing one INSERT per event. The buffer is flushed with
+COPY (copy_records_to_table) when it reaches notification_log_batch_size
+rows, every notification_log_flush_ms milliseconds, and on shutdown.
+
+If a flush fails the rows are put back (bounded by notification_log_max_buffer;
+the oldest rows are dropped beyond that and counted in the status).
+"""
+import asyncio
+import json
+import time
+import logging
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
+
+from .config import get_api_settings
+from .database import get_pool
+
+logger = logging.getLogger(__name__)
+settings = get_api_settings()
+
+LOG_COLUMNS = [
+    "log_id", "event_type", "payload", "sent_to_bot_ids", "success_bot_ids",
+    "failed_bot_ids", "status", "error_details", "created_at"
+]
+
+
+class NotificationLogWriter:
+    """Accumulates notification_logs rows and writes them in batches"""
+
+    def __init__(self):
+        self._buffer: List[Tuple] = []
+        self._task: Optional[asyncio.Task] = None
+        self._flush_now = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        # Status counters
+        self._rows_written = 0
+        self._rows_dropped = 0
+        self._flush_count = 0
+        self._flush_failures = 0
+        self._last_flush_ms: Optional[float] = None
+        self._max_flush_ms: float = 0.0
+        self._last_flush_at: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add(
+        self,
+        log_id: str,
+        event_type: str,
+        payload: Dict,
+        sent_to: List[str],
+        success: List[str],
+        failed: List[str],
+        status: str,
+        details: List[Dict],
+        created_at: datetime
+    ):
+        """Queue one notification_logs row (payload must already be redacted)"""
+        self._buffer.append((
+            log_id, event_type, json.dumps(payload), sent_to, success, failed,
+            status, json.dumps(details), created_at
+        ))
+        if len(self._buffer) >= settings.notification_log_batch_size:
+            self._flush_now.set()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stopping = False
+        self._flush_now = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Notification log writer started")
+
+    async def stop(self):
+        """Stop the timer loop and flush whatever is buffered"""
+        if self.is_running:
+            self._stopping = True
+            self._flush_now.set()
+            try:
+                await asyncio.wait_for(self._task, timeout=10.0)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+            self._task = None
+        await self.flush()
+        logger.info(f"Notification log writer stopped ({len(self._buffer)} rows left unflushed)")
+
+    async def _run(self):
+        interval = settings.notification_log_flush_ms / 1000.0
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write all buffered rows. Returns the number of rows written."""
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+            rows, self._buffer = self._buffer, []
+
+            started = time.perf_counter()
+            try:
+                pool = await get_pool()
+                async with pool.acquire() as conn:
+                    try:
+                        await conn.copy_records_to_table(
+                            "notification_logs", records=rows, columns=LOG_COLUMNS
+                        )
+                    except Exception as copy_err:
+                        # COPY is all-or-nothing; fall back to a batched INSERT
+                        logger.warning(f"notification_logs COPY failed, using executemany: {copy_err}")
+                        await conn.executemany("""
+                            INSERT INTO notification_logs
+                            (log_id, event_type, payload, sent_to_bot_ids, success_bot_ids,
+                             failed_bot_ids, status, error_details, created_at)
+                            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                            ON CONFLICT (log_id) DO NOTHING
+                        """, rows)
+            except Exception as e:
+                self._flush_failures += 1
+                self._last_error = str(e)
+                logger.error(f"Failed to flush {len(rows)} notification logs: {e}")
+                self._requeue(rows)
+                return 0
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._flush_count += 1
+            self._rows_written += len(rows)
+            self._last_flush_ms = elapsed_ms
+            self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+            self._last_flush_at = datetime.now(timezone.utc)
+            return len(rows)
+
+    def _requeue(self, rows: List[Tuple]):
+        merged = rows + self._buffer
+        overflow = len(merged) - settings.notification_log_max_buffer
+        if overflow > 0:
+            self._rows_dropped += overflow
+            logger.error(f"Notification log buffer full - dropped {overflow} oldest rows")
+            merged = merged[overflow:]
+        self._buffer = merged
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "buffer_depth": len(self._buffer),
+            "batch_size": settings.notification_log_batch_size,
+            "flush_interval_ms": settings.notification_log_flush_ms,
+            "rows_written": self._rows_written,
+            "rows_dropped": self._rows_dropped,
+            "flush_count": self._flush_count,
+            "flush_failures": self._flush_failures,
+            "last_flush_latency_ms": round(self._last_flush_ms, 2) if self._last_flush_ms is not None else None,
+            "max_flush_latency_ms": round(self._max_flush_ms, 2),
+            "last_flush_at": self._last_flush_at.isoformat() if self._last_flush_at else None,
+            "last_error": self._last_error,
+        }
+
+
+# Process-wide writer
+notification_log_writer = NotificationLogWriter()
@@ -0,0 +1,271 @@
+"""
+Notification Outbox - Transactional event queue + background dispatcher
+
+Routes no longer wait on the Telegram API. emit_event() writes a row to
+notification_outbox (optionally inside the caller's transaction, so the
+event commits or rolls back together with the business change) and returns.
+The dispatcher drains the table in the background, delivers through
+NotificationRouter.emit(), retries with exponential backoff and marks rows
+delivered.
+
+DELIVERY GUARANTEES:
+- At-least-once: a claimed row carries a lease (next_attempt_at in the future).
+  If the process dies mid-send, the lease expires and another worker re-claims it.
+- Multiple workers/processes drain the same table safely (FOR UPDATE SKIP LOCKED).
+
+PROOF IMAGE POLICY:
+- Image data is NEVER stored in the database, so payloads carrying raw image
+  data (extra_data['proof_image'] / ['image_data']) are not queued here -
+  emit_event() delivers those inline.
+"""
+import asyncio
+import json
+import uuid
+import logging
+from typing import Optional, Dict, Any
+
+from .config import get_api_settings
+from .database import get_pool
+
+logger = logging.getLogger(__name__)
+settings = get_api_settings()
+
+# Raw image keys that must never be persisted (see PROOF IMAGE POLICY)
+IMAGE_DATA_KEYS = ("proof_image", "image_data")
+
+MAX_BACKOFF_SECONDS = 300
+
+# How often delivered rows older than the retention window are purged
+PURGE_INTERVAL_SECONDS = 3600
+
+
+def carries_image_data(payload_dict: Dict[str, Any]) -> bool:
+    """Check if a payload holds raw image data that must not be stored"""
+    extra = payload_dict.get("extra_data") or {}
+    return any(extra.get(key) for key in IMAGE_DATA_KEYS)
+
+
+async def enqueue_notification(payload_dict: Dict[str, Any], conn=None) -> str:
+    """
+    Write a notification to the outbox.
+
+    Args:
+        payload_dict: NotificationPayload.to_dict() output
+        conn: Optional connection - pass the caller's connection to write the
+              outbox row in the same transaction as the business change
+
+    Returns:
+        outbox_id
+    """
+    outbox_id = str(uuid.uuid4())
+    query = """
+        INSERT INTO notification_outbox (outbox_id, event_type, payload, status, next_attempt_at, created_at)
+        VALUES ($1, $2, $3, 'pending', NOW(), NOW())
+    """
+    args = (outbox_id, payload_dict["event_type"], json.dumps(payload_dict))
+
+    if conn is not None:
+        await conn.execute(query, *args)
+    else:
+        pool = await get_pool()
+        async with pool.acquire() as own_conn:
+            await own_conn.execute(query, *args)
+
+    notification_dispatcher.wake()
+    return outbox_id
+
+
+def _backoff_seconds(attempts: int) -> float:
+    """Exponential backoff for the Nth failed attempt"""
+    base = max(1.0, settings.notification_outbox_retry_base_seconds)
+    return min(base * (2 ** max(0, attempts - 1)), MAX_BACKOFF_SECONDS)
+
+
+class NotificationDispatcher:
+    """
+    Background worker that drains notification_outbox.
+
+    Started on application startup (one per worker process). Wakes up every
+    poll interval, or immediately when this process enqueues an event.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._last_purge = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def wake(self):
+        """Signal the dispatcher that new rows may be available"""
+        self._wakeup.set()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Notification outbox dispatcher started")
+
+    async def stop(self):
+        if not self.is_running:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=10.0)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+        logger.info("Notification outbox dispatcher stopped")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                processed = await self.dispatch_batch()
+            except Exception as e:
+                logger.error(f"Notification outbox dispatch error: {e}")
+                processed = 0
+
+            # Keep draining while full batches come back
+            if processed >= settings.notification_outbox_batch_size:
+                continue
+
+            await self._maybe_purge()
+
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    timeout=settings.notification_outbox_poll_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _maybe_purge(self):
+        """Drop delivered rows past the retention window (keeps the table small)"""
+        loop_time = asyncio.get_running_loop().time()
+        if loop_time - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = loop_time
+        try:
+            pool = await get_pool()
+            async with pool.acquire() as conn:
+                await conn.execute("""
+                    DELETE FROM notification_outbox
+                    WHERE status = 'delivered'
+                      AND delivered_at < NOW() - make_interval(days => $1)
+                """, settings.notification_outbox_retention_days)
+        except Exception as e:
+            logger.warning(f"Notification outbox purge failed: {e}")
+
+    async def _claim_batch(self):
+        """
+        Claim due rows by pushing their next_attempt_at out by the lease.
+        SKIP LOCKED lets concurrent dispatchers claim disjoint rows.
+        """
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            return await conn.fetch("""
+                UPDATE notification_outbox
+                SET attempts = attempts + 1,
+                    next_attempt_at = NOW() + make_interval(secs => $2)
+                WHERE outbox_id IN (
+                    SELECT outbox_id FROM notification_outbox
+                    WHERE status = 'pending' AND next_attempt_at <= NOW()
+                    ORDER BY created_at
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING outbox_id, event_type, payload, attempts
+            """, settings.notification_outbox_batch_size,
+                float(settings.notification_outbox_lease_seconds))
+
+    async def dispatch_batch(self) -> int:
+        """Claim and deliver one batch. Returns the number of rows claimed."""
+        rows = await self._claim_batch()
+        if not rows:
+            return 0
+        await asyncio.gather(*(self._deliver(row) for row in rows))
+        return len(rows)
+
+    async def _deliver(self, row):
+        from .notification_router import NotificationRouter, NotificationPayload
+
+        outbox_id = row['outbox_id']
+        try:
+            payload_data = row['payload']
+            if isinstance(payload_data, str):
+                payload_data = json.loads(payload_data)
+            payload = NotificationPayload.from_dict(payload_data)
+
+            result = await NotificationRouter.emit(payload.event_type, payload)
+
+            # Retry only when nothing got through - resending after a partial
+            # success would duplicate messages on the bots that did receive it
+            if result.get("error"):
+                raise RuntimeError(result["error"])
+            if result.get("sent_count", 0) > 0 and result.get("success_count", 0) == 0:
+                errors = [d.get("error") for d in result.get("details", []) if d.get("error")]
+                raise RuntimeError(f"All bots failed: {errors[:3]}")
+
+            await self._mark_delivered(outbox_id)
+        except Exception as e:
+            await self._mark_failed_attempt(outbox_id, row['attempts'], str(e))
+
+    async def _mark_delivered(self, outbox_id: str):
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            await conn.execute("""
+                UPDATE notification_outbox
+                SET status = 'delivered', delivered_at = NOW(), last_error = NULL
+                WHERE outbox_id = $1
+            """, outbox_id)
+
+    async def _mark_failed_attempt(self, outbox_id: str, attempts: int, error: str):
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            if attempts >= settings.notification_outbox_max_attempts:
+                logger.error(f"Notification {outbox_id} dropped after {attempts} attempts: {error}")
+                await conn.execute("""
+                    UPDATE notification_outbox
+                    SET status = 'failed', last_error = $2
+                    WHERE outbox_id = $1
+                """, outbox_id, error[:2000])
+            else:
+                delay = _backoff_seconds(attempts)
+                logger.warning(f"Notification {outbox_id} attempt {attempts} failed, retrying in {delay:.0f}s: {error}")
+                await conn.execute("""
+                    UPDATE notification_outbox
+                    SET next_attempt_at = NOW() + make_interval(secs => $2), last_error = $3
+                    WHERE outbox_id = $1
+                """, outbox_id, delay, error[:2000])
+
+
+# Process-wide dispatcher
+notification_dispatcher = NotificationDispatcher()
+
+
+async def get_outbox_stats() -> Dict[str, Any]:
+    """Outbox depth by status (for monitoring)"""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT status, COUNT(*) AS count, MIN(created_at) AS oldest
+            FROM notification_outbox
+            GROUP BY status
+        """)
+    return {
+        "dispatcher_running": notification_dispatcher.is_running,
+        "by_status": {
+            r['status']: {
+                "count": r['count'],
+                "oldest": r['oldest'].isoformat() if r['oldest'] else None
+            }
+            for r in rows
+        }
+    }
@@ -22,9 +22,43 @@ from typing import Optional, List, Dict, Any
 from enum import Enum
 from dataclasses import dataclass
 
+from .config import get_api_settings
 from .database import fetch_one, fetch_all, execute, get_pool
+from .telegram_rate_limiter import telegram_scheduler
+from .cache_invalidation import invalidation_bus
+from .notification_log_writer import notification_log_writer
 
 logger = logging.getLogger(__name__)
+settings = get_api_settings()
+
+
+# ==================== SHARED TELEGRAM HTTP CLIENT ====================
+# One long-lived pooled client per process: keep-alive connections to
+# api.telegram.org are reused across events instead of a TLS handshake per send.
+
+_telegram_client: Optional[httpx.AsyncClient] = None
+
+
+def get_telegram_client() -> httpx.AsyncClient:
+    """Get the process-wide pooled HTTP client for the Telegram Bot API"""
+    global _telegram_client
+    if _telegram_client is None or _telegram_client.is_closed:
+        _telegram_client = httpx.AsyncClient(
+            timeout=settings.telegram_http_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=settings.telegram_max_connections,
+                max_keepalive_connections=settings.telegram_max_connections,
+            ),
+        )
+    return _telegram_client
+
+
+async def close_telegram_client():
+    """Close the shared Telegram HTTP client (call on shutdown)"""
+    global _telegram_client
+    if _telegram_client is not None:
+        await _telegram_client.aclose()
+        _telegram_client = None
 
 
 # ==================== EVENT TYPE DEFINITIONS ====================
@@ -297,10 +331,219 @@ class NotificationPayload:
             "action_data": self.action_data or {},
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "NotificationPayload":
+        """Rebuild a payload from to_dict() output (used by the outbox dispatcher)"""
+        event_type = data["event_type"]
+        try:
+            event_type = EventType(event_type)
+        except ValueError:
+            pass
+        return cls(
+            event_type=event_type,
+            title=data.get("title", ""),
+            message=data.get("message", ""),
+            reference_id=data.get("reference_id"),
+            reference_type=data.get("reference_type"),
+            user_id=data.get("user_id"),
+            username=data.get("username"),
+            display_name=data.get("display_name"),
+            amount=data.get("amount"),
+            extra_data=data.get("extra_data") or None,
+            image_url=data.get("image_url"),
+            requires_action=data.get("requires_action", False),
+            action_data=data.get("action_data") or None,
+        )
+
+
+# ==================== BOT SUBSCRIPTION INDEX ====================
+
+# LISTEN/NOTIFY channel for bot / permission changes
+BOT_SUBSCRIPTIONS_CHANNEL = "telegram_bot_subscriptions"
+
+
+class BotSubscriptionIndex:
+    """
+    In-memory index: event_type -> active bots with that event enabled.
+    
+    Bot configuration changes rarely, so instead of joining telegram_bots and
+    telegram_bot_event_permissions on every emit, the index is loaded once
+    (at startup or on first use) and rebuilt after invalidation.
+    telegram_routes invalidates it on every bot/permission write, and the
+    change is broadcast to all workers via LISTEN/NOTIFY (cache_invalidation).
+    """
+    
+    def __init__(self):
+        self._by_event: Dict[str, List[Dict]] = {}
+        self._loaded = False
+        self._generation = 0
+        self._lock = asyncio.Lock()
+    
+    def invalidate(self, payload: str = "*"):
+        """Drop the index; the next lookup reloads it"""
+        self._generation += 1
+        self._loaded = False
+    
+    async def load(self):
+        """(Re)build the index with a single query"""
+        generation = self._generation
+        rows = await fetch_all("""
+            SELECT tb.bot_id, tb.name, tb.bot_token, tb.chat_id,
+                   tb.can_approve_payments, tb.can_approve_wallet_loads, tb.can_approve_withdrawals,
+                   tbep.event_type
+            FROM telegram_bots tb
+            JOIN telegram_bot_event_permissions tbep ON tb.bot_id = tbep.bot_id
+            WHERE tb.is_active = TRUE
+              AND tbep.enabled = TRUE
+        """)
+        
+        by_event: Dict[str, List[Dict]] = {}
+        for row in rows:
+            event_type = row.pop('event_type')
+            by_event.setdefault(event_type, []).append(row)
+        
+        self._by_event = by_event
+        # An invalidation that raced with this load wins - reload next time
+        self._loaded = generation == self._generation
+        logger.info(f"Bot subscription index loaded: {len(rows)} subscriptions")
+    
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._lock:
+            if not self._loaded:
+                await self.load()
+    
+    async def get_bots(self, event_type: str) -> List[Dict]:
+        """Active bots subscribed to event_type"""
+        await self._ensure_loaded()
+        return list(self._by_event.get(event_type, []))
+    
+    async def get_bot(self, bot_id: str, event_type: str) -> Optional[Dict]:
+        """A bot's record if it is active and subscribed to event_type"""
+        for bot in await self.get_bots(event_type):
+            if bot['bot_id'] == bot_id:
+                return bot
+        return None
+
+
+bot_subscription_index = BotSubscriptionIndex()
+invalidation_bus.subscribe(BOT_SUBSCRIPTIONS_CHANNEL, bot_subscription_index.invalidate)
+
+
+async def invalidate_bot_subscriptions(conn=None):
+    """Call after any telegram_bots / telegram_bot_event_permissions write"""
+    await invalidation_bus.publish(BOT_SUBSCRIPTIONS_CHANNEL, conn=conn)
+
+
+# ==================== PROOF MEDIA ====================
+
+class ProofMedia:
+    """
+    Proof image for one event, shared by every bot the event fans out to.
+    
+    - The base64 payload is decoded once (not once per bot)
+    - The bytes are uploaded once per bot token; Telegram file_ids are only
+      valid for the bot that received the upload, so later sends through the
+      same token reference the cached file_id instead of re-uploading
+    - Lives only for the duration of emit() - never persisted (PROOF IMAGE POLICY)
+    """
+    
+    def __init__(self, data: bytes, filename: str, mime_type: str, caption: str):
+        self.data = data
+        self.filename = filename
+        self.mime_type = mime_type
+        self.caption = caption
+        self._file_ids: Dict[str, str] = {}
+        self._upload_locks: Dict[str, asyncio.Lock] = {}
+    
+    @classmethod
+    def from_payload(cls, payload: "NotificationPayload") -> Optional["ProofMedia"]:
+        """Decode extra_data['proof_image'] (base64 or data URL). None if absent/invalid."""
+        extra_data = payload.extra_data or {}
+        base64_proof = extra_data.get('proof_image')
+        if not base64_proof:
+            return None
+        
+        try:
+            # Remove data URL prefix if present
+            if ',' in base64_proof:
+                base64_proof = base64_proof.split(',', 1)[1]
+            image_bytes = base64.b64decode(base64_proof)
+        except Exception as e:
+            logger.warning(f"Failed to decode base64 proof image for {payload.reference_id}: {e}")
+            return None
+        
+        # Determine file extension from image_type if available
+        image_type = extra_data.get('image_type', 'image/jpeg')
+        ext = 'jpg'
+        if 'png' in image_type:
+            ext = 'png'
+        elif 'gif' in image_type:
+            ext = 'gif'
+        
+        ref_short = payload.reference_id[:8] if payload.reference_id else 'proof'
+        return cls(
+            data=image_bytes,
+            filename=f"payment_proof_{ref_short}.{ext}",
+            mime_type=image_type,
+            caption=f"📎 Payment Proof for {payload.reference_type or 'request'} {ref_short}..."
+        )
+    
+    async def send(self, bot: Dict) -> bool:
+        """Send the proof document to a bot's chat. Returns True on success."""
+        bot_token = bot['bot_token']
+        
+        if bot_token not in self._file_ids:
+            lock = self._upload_locks.setdefault(bot_token, asyncio.Lock())
+            async with lock:
+                if bot_token not in self._file_ids:
+                    return await self._upload(bot)
+        
+        # Re-send by reference - no upload
+        response = await telegram_scheduler.post(bot, "sendDocument", json={
+            "chat_id": bot['chat_id'],
+            "document": self._file_ids[bot_token],
+            "caption": self.caption
+        })
+        if response.status_code != 200:
+            logger.warning(f"Failed to send proof image by file_id: {response.text}")
+        return response.status_code == 200
+    
+    async def _upload(self, bot: Dict) -> bool:
+        # Send as document (file upload) - more reliable for large images
+        # Raw bytes (not a stream) so a 429 retry can re-send the body
+        response = await telegram_scheduler.post(
+            bot, "sendDocument",
+            data={'chat_id': bot['chat_id'], 'caption': self.caption},
+            files={'document': (self.filename, self.data, self.mime_type)}
+        )
+        if response.status_code != 200:
+            logger.warning(f"Failed to upload proof image: {response.text}")
+            return False
+        
+        document = response.json().get('result', {}).get('document') or {}
+        if document.get('file_id'):
+            self._file_ids[bot['bot_token']] = document['file_id']
+        return True
 
 
 # ==================== NOTIFICATION ROUTER ====================
 
+# Keys never written to notification_logs (PROOF IMAGE POLICY)
+REDACTED_IMAGE_KEYS = frozenset({'proof_image', 'image_data', 'image_url'})
+REDACTED_PLACEHOLDER = '[REDACTED - sent to Telegram directly]'
+
+
+def _redact_images(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Shallow copy of data with image keys replaced by a placeholder"""
+    return {
+        key: (REDACTED_PLACEHOLDER if key in REDACTED_IMAGE_KEYS else value)
+        for key, value in data.items()
+    }
+
+
 class NotificationRouter:
     """
     Central notification routing service
@@ -309,7 +552,7 @@ class NotificationRouter:
     1. System action completes
     2. emit() called with event_type and payload
     3. Router fetches active bots with event permission
-    4. Sends formatted message to each bot
+    4. Sends formatted message to all bots concurrently (shared pooled client)
     5. Logs result
     """
     
@@ -345,12 +588,13 @@ class NotificationRouter:
             event_meta = EVENT_METADATA.get(event_type, {})
             requires_approval = event_meta.get("requires_approval", False) and payload.requires_action
             
-            sent_to = []
-            success = []
-            failed = []
-            details = []
+            # Decode the proof image once for all bots
+            proof_media = ProofMedia.from_payload(payload)
+            
+            # Fan out to all bots concurrently, capped by notification_max_concurrency
+            semaphore = asyncio.Semaphore(max(1, settings.notification_max_concurrency))
             
-            for bot in bots:
+            async def deliver(bot: Dict) -> Dict[str, Any]:
                 # For approval events, only bots with approval permission get buttons
                 show_buttons = False
                 if requires_approval:
@@ -359,39 +603,37 @@ class NotificationRouter:
                     elif event_type == EventType.WITHDRAW_REQUESTED:
                         show_buttons = bot.get('can_approve_withdrawals')
                 
-                sent_to.append(bot['bot_id'])
+                async with semaphore:
+                    try:
+                        result = await NotificationRouter._send_to_bot(
+                            bot=bot,
+                            payload=payload,
+                            show_approval_buttons=show_buttons,
+                            proof_media=proof_media
+                        )
+                    except Exception as e:
+                        result = {"success": False, "error": str(e)}
                 
-                try:
-                    result = await NotificationRouter._send_to_bot(
-                        bot=bot,
-                        payload=payload,
-                        show_approval_buttons=show_buttons
-                    )
-                    
-                    if result.get('success'):
-                        success.append(bot['bot_id'])
-                        details.append({
-                            "bot_id": bot['bot_id'],
-                            "bot_name": bot['name'],
-                            "success": True,
-                            "message_id": result.get('message_id')
-                        })
-                    else:
-                        failed.append(bot['bot_id'])
-                        details.append({
-                            "bot_id": bot['bot_id'],
-                            "bot_name": bot['name'],
-                            "success": False,
-                            "error": result.get('error')
-                        })
-                except Exception as e:
-                    failed.append(bot['bot_id'])
-                    details.append({
+                if result.get('success'):
+                    return {
                         "bot_id": bot['bot_id'],
                         "bot_name": bot['name'],
-                        "success": False,
-                        "error": str(e)
-                    })
+                        "success": True,
+                        "message_id": result.get('message_id')
+                    }
+                return {
+                    "bot_id": bot['bot_id'],
+                    "bot_name": bot['name'],
+                    "success": False,
+                    "error": result.get('error')
+                }
+            
+            # gather() preserves bot order, so details line up with sent_to
+            details = list(await asyncio.gather(*(deliver(bot) for bot in bots)))
+            
+            sent_to = [bot['bot_id'] for bot in bots]
+            success = [d['bot_id'] for d in details if d['success']]
+            failed = [d['bot_id'] for d in details if not d['success']]
             
             # Log the notification
             if not skip_logging:
@@ -425,35 +667,28 @@ class NotificationRouter:
     
     @staticmethod
     async def _get_subscribed_bots(event_type: str) -> List[Dict]:
-        """Get all active bots subscribed to this event type"""
-        bots = await fetch_all("""
-            SELECT tb.bot_id, tb.name, tb.bot_token, tb.chat_id, 
-                   tb.can_approve_payments, tb.can_approve_wallet_loads, tb.can_approve_withdrawals
-            FROM telegram_bots tb
-            JOIN telegram_bot_event_permissions tbep ON tb.bot_id = tbep.bot_id
-            WHERE tb.is_active = TRUE 
-              AND tbep.event_type = $1 
-              AND tbep.enabled = TRUE
-        """, event_type)
-        return bots
+        """Get all active bots subscribed to this event type (cached index)"""
+        return await bot_subscription_index.get_bots(event_type)
     
     @staticmethod
     async def _send_to_bot(
         bot: Dict,
         payload: NotificationPayload,
-        show_approval_buttons: bool = False
+        show_approval_buttons: bool = False,
+        proof_media: Optional["ProofMedia"] = None
     ) -> Dict[str, Any]:
         """
         Send notification to a specific Telegram bot.
         
         PROOF IMAGE HANDLING:
         - Checks extra_data for 'proof_image' (base64) or 'image_url' (URL)
-        - Base64 images are decoded and sent via sendDocument as file upload
+        - Base64 images are decoded once per event (ProofMedia, built by emit())
+          and uploaded via sendDocument once per bot token; other bots sharing
+          the token re-send the returned file_id
         - URL images are sent via sendPhoto
         - Images are NEVER stored in database
         """
         try:
-            bot_token = bot['bot_token']
             chat_id = bot['chat_id']
             
             # Build message
@@ -486,98 +721,58 @@ class NotificationRouter:
                 
                 reply_markup = {"inline_keyboard": buttons}
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Send text message
-                msg_data = {
-                    "chat_id": chat_id,
-                    "text": message,
-                    "parse_mode": "Markdown"
-                }
-                if reply_markup:
-                    msg_data["reply_markup"] = reply_markup
+            # Send text message (paced per bot/chat by telegram_scheduler)
+            msg_data = {
+                "chat_id": chat_id,
+                "text": message,
+                "parse_mode": "Markdown"
+            }
+            if reply_markup:
+                msg_data["reply_markup"] = reply_markup
+            
+            response = await telegram_scheduler.post(bot, "sendMessage", json=msg_data)
+            
+            if response.status_code == 200:
+                result = response.json()
+                message_id = result.get('result', {}).get('message_id')
                 
-                response = await client.post(
-                    f"https://api.telegram.org/bot{bot_token}/sendMessage",
-                    json=msg_data
-                )
+                # Handle proof images - check both extra_data and payload.image_url
+                proof_image_sent = False
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    message_id = result.get('result', {}).get('message_id')
-                    
-                    # Handle proof images - check both extra_data and payload.image_url
-                    proof_image_sent = False
-                    
-                    # Check for base64 proof_image in extra_data (SITE UPLOADS)
-                    extra_data = payload.extra_data or {}
-                    base64_proof = extra_data.get('proof_image')
-                    
-                    if base64_proof:
-                        try:
-                            # Remove data URL prefix if present
-                            if ',' in base64_proof:
-                                base64_proof = base64_proof.split(',', 1)[1]
-                            
-                            # Decode base64 to bytes
-                            image_bytes = base64.b64decode(base64_proof)
-                            
-                            # Determine file extension from image_type if available
-                            image_type = extra_data.get('image_type', 'image/jpeg')
-                            ext = 'jpg'
-                            if 'png' in image_type:
-                                ext = 'png'
-                            elif 'gif' in image_type:
-                                ext = 'gif'
-                            
-                            # Create filename
-                            ref_short = payload.reference_id[:8] if payload.reference_id else 'proof'
-                            filename = f"payment_proof_{ref_short}.{ext}"
-                            
-                            # Send as document (file upload) - more reliable for large images
-                            files = {
-                                'document': (filename, io.BytesIO(image_bytes), image_type)
-                            }
-                            form_data = {
-                                'chat_id': chat_id,
-                                'caption': f"📎 Payment Proof for {payload.reference_type or 'request'} {ref_short}..."
+                # Base64 proof image (SITE UPLOADS) - decoded once per event
+                extra_data = payload.extra_data or {}
+                if proof_media is None and extra_data.get('proof_image'):
+                    proof_media = ProofMedia.from_payload(payload)
+                
+                if proof_media is not None:
+                    try:
+                        proof_image_sent = await proof_media.send(bot)
+                        if proof_image_sent:
+                            logger.info(f"Base64 proof image sent to bot {bot['name']} for {payload.reference_id}")
+                    except Exception as img_err:
+                        logger.warning(f"Failed to send base64 proof image to bot {bot['name']}: {img_err}")
+                
+                # Check for image_url in extra_data (CHATWOOT/WEBHOOK UPLOADS)
+                image_url = extra_data.get('image_url') or payload.image_url
+                if image_url and not proof_image_sent:
+                    try:
+                        await telegram_scheduler.post(
+                            bot, "sendPhoto",
+                            json={
+                                "chat_id": chat_id,
+                                "photo": image_url,
+                                "caption": f"📎 Proof for {payload.reference_type or 'request'} {payload.reference_id[:8] if payload.reference_id else 'N/A'}..."
                             }
-                            
-                            img_response = await client.post(
-                                f"https://api.telegram.org/bot{bot_token}/sendDocument",
-                                data=form_data,
-                                files=files
-                            )
-                            
-                            if img_response.status_code == 200:
-                                proof_image_sent = True
-                                logger.info(f"Base64 proof image sent to bot {bot['name']} for {payload.reference_id}")
-                            else:
-                                logger.warning(f"Failed to send base64 proof image: {img_response.text}")
-                                
-                        except Exception as img_err:
-                            logger.warning(f"Failed to decode/send base64 proof image to bot {bot['name']}: {img_err}")
-                    
-                    # Check for image_url in extra_data (CHATWOOT/WEBHOOK UPLOADS)
-                    image_url = extra_data.get('image_url') or payload.image_url
-                    if image_url and not proof_image_sent:
-                        try:
-                            await client.post(
-                                f"https://api.telegram.org/bot{bot_token}/sendPhoto",
-                                json={
-                                    "chat_id": chat_id,
-                                    "photo": image_url,
-                                    "caption": f"📎 Proof for {payload.reference_type or 'request'} {payload.reference_id[:8] if payload.reference_id else 'N/A'}..."
-                                }
-                            )
-                            proof_image_sent = True
-                            logger.info(f"URL proof image sent to bot {bot['name']} for {payload.reference_id}")
-                        except Exception as img_err:
-                            logger.warning(f"Failed to send URL image to bot {bot['name']}: {img_err}")
-                    
-                    return {"success": True, "message_id": message_id, "proof_image_sent": proof_image_sent}
-                else:
-                    return {"success": False, "error": response.text}
-                    
+                        )
+                        proof_image_sent = True
+                        logger.info(f"URL proof image sent to bot {bot['name']} for {payload.reference_id}")
+                    except Exception as img_err:
+                        logger.warning(f"Failed to send URL image to bot {bot['name']}: {img_err}")
+                
+                return {"success": True, "message_id": message_id, "proof_image_sent": proof_image_sent}
+            else:
+                return {"success": False, "error": response.text}
+                
         except Exception as e:
             logger.error(f"Failed to send to bot {bot.get('name')}: {e}")
             return {"success": False, "error": str(e)}
@@ -643,21 +838,25 @@ class NotificationRouter:
         """
         status = "success" if not failed else ("partial" if success else "failed")
         
-        # REDACT sensitive image data before storing
-        redacted_payload = payload.copy()
+        # REDACT sensitive image data before storing (single pass, no deep copy)
+        redacted_payload = _redact_images(payload)
+        if isinstance(redacted_payload.get('extra_data'), dict):
+            redacted_payload['extra_data'] = _redact_images(redacted_payload['extra_data'])
         
-        # Redact from top level
-        for key in ['proof_image', 'image_data', 'image_url']:
-            if key in redacted_payload:
-                redacted_payload[key] = '[REDACTED - sent to Telegram directly]'
-        
-        # Redact from extra_data if present
-        if 'extra_data' in redacted_payload and isinstance(redacted_payload['extra_data'], dict):
-            extra = redacted_payload['extra_data'].copy()
-            for key in ['proof_image', 'image_data', 'image_url']:
-                if key in extra:
-                    extra[key] = '[REDACTED - sent to Telegram directly]'
-            redacted_payload['extra_data'] = extra
+        # Buffered batch write when the writer is running (app), direct INSERT otherwise
+        if notification_log_writer.is_running:
+            notification_log_writer.add(
+                log_id=log_id,
+                event_type=event_type,
+                payload=redacted_payload,
+                sent_to=sent_to,
+                success=success,
+                failed=failed,
+                status=status,
+                details=details,
+                created_at=datetime.now(timezone.utc)
+            )
+            return
         
         await execute("""
             INSERT INTO notification_logs 
@@ -683,15 +882,10 @@ class NotificationRouter:
     @staticmethod
     async def verify_bot_approval_permission(bot_id: str, event_type: str) -> bool:
         """Verify if a bot has permission to approve for this event type"""
-        bot = await fetch_one("""
-            SELECT tb.*, tbep.enabled as event_enabled
-            FROM telegram_bots tb
-            LEFT JOIN telegram_bot_event_permissions tbep 
-              ON tb.bot_id = tbep.bot_id AND tbep.event_type = $2
-            WHERE tb.bot_id = $1 AND tb.is_active = TRUE
-        """, bot_id, event_type)
+        # Index only holds active bots with the event enabled
+        bot = await bot_subscription_index.get_bot(bot_id, event_type)
         
-        if not bot or not bot.get('event_enabled'):
+        if not bot:
             return False
         
         # Check specific approval permissions
@@ -719,11 +913,19 @@ async def emit_event(
     image_url: str = None,
     requires_action: bool = False,
     entity_type: str = None,  # STANDARDIZED: action:entity_type:entity_id
-    action_prefix: str = None  # DEPRECATED: kept for backwards compatibility
+    action_prefix: str = None,  # DEPRECATED: kept for backwards compatibility
+    conn=None,
+    deliver_inline: bool = False
 ) -> Dict[str, Any]:
     """
     Convenience function to emit an event
     
+    By default the event is written to the notification outbox and delivered
+    by the background dispatcher, so callers never wait on the Telegram API.
+    Pass `conn` to write the outbox row inside the caller's transaction.
+    Events carrying raw image data (or deliver_inline=True, or the outbox
+    disabled) are sent inline via NotificationRouter.emit().
+    
     Usage:
         from ..core.notification_router import emit_event, EventType
         
@@ -765,4 +967,18 @@ async def emit_event(
         } if requires_action else None
     )
     
+    payload_dict = payload.to_dict()
+    
+    from .notification_outbox import enqueue_notification, carries_image_data
+    if settings.notification_outbox_enabled and not deliver_inline and not carries_image_data(payload_dict):
+        outbox_id = await enqueue_notification(payload_dict, conn=conn)
+        return {
+            "queued": True,
+            "outbox_id": outbox_id,
+            "sent_count": 0,
+            "success_count": 0,
+            "failed_count": 0,
+            "details": []
+        }
+    
     return await NotificationRouter.emit(event_type, payload)
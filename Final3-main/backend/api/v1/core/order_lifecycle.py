@@ -40,15 +40,17 @@ import logging
 import uuid
 import json
 from enum import Enum
-from typing import Optional, Dict, Any, Tuple, Set, Literal
+from typing import Optional, Dict, Any, Tuple, Set, Literal, List, Callable, Awaitable
 from datetime import datetime, timezone
 from dataclasses import dataclass
 from decimal import Decimal
 
 from .database import fetch_one, execute, get_pool
+from .config import get_api_settings
 from .structured_logging import get_correlation_id
 
 logger = logging.getLogger(__name__)
+settings = get_api_settings()
 
 
 # ==================== CANONICAL ORDER STATUS ====================
@@ -222,6 +224,24 @@ def get_allowed_transitions(from_status: str) -> Set[str]:
     return base | legacy
 
 
+def _known_statuses() -> Set[str]:
+    return (
+        set(ALLOWED_TRANSITIONS) | set(LEGACY_TRANSITIONS)
+        | OrderStatus.pending_variants() | OrderStatus.approved_variants()
+    )
+
+
+# Inverse of the state machine: to_status -> every stored status (canonical
+# and legacy) it may be reached from. Passed to the CTE fast path as a parameter.
+ALLOWED_FROM_STATUSES: Dict[str, List[str]] = {
+    to_status: sorted(
+        s for s in _known_statuses()
+        if s != to_status and not OrderStatus.is_terminal(s) and is_valid_transition(s, to_status)
+    )
+    for to_status in {t for targets in ALLOWED_TRANSITIONS.values() for t in targets}
+}
+
+
 # ==================== ERROR CODES ====================
 
 class OrderErrorCode(str, Enum):
@@ -283,8 +303,15 @@ def _safe_float(value: Any, default: float = 0.0) -> float:
         return default
 
 
-async def write_order_audit(
-    conn,
+AUDIT_INSERT_SQL = """
+    INSERT INTO audit_logs (
+        log_id, user_id, username, action, 
+        resource_type, resource_id, details, created_at
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+"""
+
+
+def build_order_audit_row(
     order_id: str,
     user_id: str,
     username: str,
@@ -295,16 +322,8 @@ async def write_order_audit(
     actor_type: str,
     amount: Optional[float] = None,
     details: Optional[Dict[str, Any]] = None
-) -> str:
-    """
-    Write to the CANONICAL audit_logs table.
-    
-    This is the SINGLE SOURCE OF TRUTH for order auditing.
-    All transitions and creations MUST use this function.
-    
-    Returns:
-        audit_log_id
-    """
+) -> Tuple:
+    """Build one audit_logs row (AUDIT_INSERT_SQL parameters)"""
     audit_log_id = str(uuid.uuid4())
     correlation_id = get_correlation_id()
     now = datetime.now(timezone.utc)
@@ -323,22 +342,158 @@ async def write_order_audit(
     if details:
         audit_details.update(details)
     
+    return (audit_log_id, user_id, username, action,
+            "order", order_id, json.dumps(audit_details), now)
+
+
+async def write_order_audit(
+    conn,
+    order_id: str,
+    user_id: str,
+    username: str,
+    action: str,
+    from_status: Optional[str],
+    to_status: str,
+    actor_id: str,
+    actor_type: str,
+    amount: Optional[float] = None,
+    details: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Write to the CANONICAL audit_logs table.
+    
+    This is the SINGLE SOURCE OF TRUTH for order auditing.
+    All transitions and creations MUST use this function
+    (or write_order_audits for several rows at once).
+    
+    Returns:
+        audit_log_id
+    """
+    row = build_order_audit_row(
+        order_id, user_id, username, action, from_status, to_status,
+        actor_id, actor_type, amount, details
+    )
+    
     # Write to canonical audit_logs table
-    await conn.execute("""
-        INSERT INTO audit_logs (
-            log_id, user_id, username, action, 
-            resource_type, resource_id, details, created_at
-        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-    """, audit_log_id, user_id, username, action,
-         "order", order_id, json.dumps(audit_details), now)
+    await conn.execute(AUDIT_INSERT_SQL, *row)
     
     logger.debug(f"Audit log written: {action} for order {order_id}")
     
-    return audit_log_id
+    return row[0]
+
+
+async def write_order_audits(conn, rows: List[Tuple]) -> List[str]:
+    """
+    Write several audit rows (from build_order_audit_row) in one batch.
+    
+    Returns:
+        audit_log_ids in row order
+    """
+    if rows:
+        await conn.executemany(AUDIT_INSERT_SQL, rows)
+    return [row[0] for row in rows]
 
 
 # ==================== CORE TRANSITION FUNCTION ====================
 
+def _check_transition(
+    order_id: str,
+    current_status: str,
+    to_status: str,
+    expected_from_status: Optional[str] = None
+) -> Optional[TransitionResult]:
+    """
+    Validate a transition for a locked order.
+    
+    Returns:
+        None if the transition may proceed, otherwise the no-op / failure result
+    """
+    # IDEMPOTENCY: Already in target status = no-op success
+    if current_status == to_status:
+        logger.info(f"Order {order_id} already in status {to_status} (no-op)")
+        return TransitionResult(
+            success=True,
+            order_id=order_id,
+            from_status=current_status,
+            to_status=to_status,
+            message=f"Order already in '{to_status}' status",
+            is_noop=True
+        )
+    
+    # Check expected status if provided
+    if expected_from_status is not None:
+        normalized_current = OrderStatus.normalize(current_status)
+        normalized_expected = OrderStatus.normalize(expected_from_status)
+        
+        if normalized_current != normalized_expected:
+            return TransitionResult(
+                success=False,
+                order_id=order_id,
+                from_status=current_status,
+                to_status=to_status,
+                message=f"Order status mismatch: expected '{expected_from_status}', found '{current_status}'",
+                error_code=OrderErrorCode.CONCURRENT_MODIFICATION.value
+            )
+    
+    # TERMINAL STATE CHECK: Cannot transition out of terminal states
+    if OrderStatus.is_terminal(current_status):
+        return TransitionResult(
+            success=False,
+            order_id=order_id,
+            from_status=current_status,
+            to_status=to_status,
+            message=f"Cannot transition from terminal state '{current_status}'",
+            error_code=OrderErrorCode.ALREADY_PROCESSED.value
+        )
+    
+    # VALIDATE TRANSITION
+    if not is_valid_transition(current_status, to_status):
+        allowed = get_allowed_transitions(current_status)
+        return TransitionResult(
+            success=False,
+            order_id=order_id,
+            from_status=current_status,
+            to_status=to_status,
+            message=f"Invalid transition: '{current_status}' -> '{to_status}'. Allowed: {allowed}",
+            error_code=OrderErrorCode.INVALID_TRANSITION.value
+        )
+    
+    return None
+
+
+# Merge a JSON patch into orders.metadata server-side, so the (possibly
+# large) existing document is never shipped to Python and back.
+# Top-level keys are replaced, same as dict.update(). Format with patch=<SQL expr>.
+METADATA_MERGE_SQL = (
+    "(CASE WHEN jsonb_typeof(metadata) = 'object' THEN metadata ELSE '{{}}'::jsonb END) || {patch}::jsonb"
+)
+
+
+def _transition_metadata(
+    order: Dict[str, Any],
+    to_status: str,
+    actor_id: str,
+    actor_type: str,
+    reason: Optional[str],
+    metadata_patch: Optional[Dict[str, Any]],
+    correlation_id: Optional[str]
+) -> Dict[str, Any]:
+    """Metadata patch for a transition: caller's patch + last_transition record"""
+    patch = dict(metadata_patch or {})
+    
+    # Add transition metadata
+    patch['last_transition'] = {
+        'from': order['status'],
+        'to': to_status,
+        'actor_id': actor_id,
+        'actor_type': actor_type,
+        'reason': reason,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'correlation_id': correlation_id
+    }
+    return patch
+
+
 async def transition_order(
     order_id: str,
     to_status: str,
@@ -356,7 +511,8 @@ async def transition_order(
     1. Acquires a row lock (SELECT FOR UPDATE)
     2. Validates current status matches expected (if provided)
     3. Validates the transition is allowed by state machine
-    4. Updates the order status atomically
+    4. Updates the order status atomically (metadata_patch is merged
+       server-side with jsonb ||, the existing document is never read)
     5. Creates an audit log entry
     6. Returns detailed result
     
@@ -387,11 +543,20 @@ async def transition_order(
         conn = await pool.acquire()
     
     try:
+        # FAST PATH: one statement, no explicit transaction needed
+        if (settings.order_transition_fast_path
+                and expected_from_status is None
+                and to_status in ALLOWED_FROM_STATUSES):
+            return await _transition_order_cte(
+                conn, order_id, to_status, actor_id, actor_type,
+                reason, metadata_patch, correlation_id
+            )
+        
         # Start transaction
         async with conn.transaction():
             # Lock the order row - INCLUDE amount for audit logging!
             order = await conn.fetchrow("""
-                SELECT order_id, status, order_type, user_id, username, metadata, amount
+                SELECT order_id, status, user_id, username, amount
                 FROM orders 
                 WHERE order_id = $1 
                 FOR UPDATE
@@ -409,85 +574,23 @@ async def transition_order(
             
             current_status = order['status']
             
-            # IDEMPOTENCY: Already in target status = no-op success
-            if current_status == to_status:
-                logger.info(f"Order {order_id} already in status {to_status} (no-op)")
-                return TransitionResult(
-                    success=True,
-                    order_id=order_id,
-                    from_status=current_status,
-                    to_status=to_status,
-                    message=f"Order already in '{to_status}' status",
-                    is_noop=True
-                )
-            
-            # Check expected status if provided
-            if expected_from_status is not None:
-                normalized_current = OrderStatus.normalize(current_status)
-                normalized_expected = OrderStatus.normalize(expected_from_status)
-                
-                if normalized_current != normalized_expected:
-                    return TransitionResult(
-                        success=False,
-                        order_id=order_id,
-                        from_status=current_status,
-                        to_status=to_status,
-                        message=f"Order status mismatch: expected '{expected_from_status}', found '{current_status}'",
-                        error_code=OrderErrorCode.CONCURRENT_MODIFICATION.value
-                    )
-            
-            # TERMINAL STATE CHECK: Cannot transition out of terminal states
-            if OrderStatus.is_terminal(current_status):
-                return TransitionResult(
-                    success=False,
-                    order_id=order_id,
-                    from_status=current_status,
-                    to_status=to_status,
-                    message=f"Cannot transition from terminal state '{current_status}'",
-                    error_code=OrderErrorCode.ALREADY_PROCESSED.value
-                )
-            
-            # VALIDATE TRANSITION
-            if not is_valid_transition(current_status, to_status):
-                allowed = get_allowed_transitions(current_status)
-                return TransitionResult(
-                    success=False,
-                    order_id=order_id,
-                    from_status=current_status,
-                    to_status=to_status,
-                    message=f"Invalid transition: '{current_status}' -> '{to_status}'. Allowed: {allowed}",
-                    error_code=OrderErrorCode.INVALID_TRANSITION.value
-                )
-            
-            # Prepare metadata update
-            existing_metadata = order['metadata']
-            if isinstance(existing_metadata, str):
-                existing_metadata = json.loads(existing_metadata)
-            existing_metadata = existing_metadata or {}
-            
-            if metadata_patch:
-                existing_metadata.update(metadata_patch)
+            rejection = _check_transition(order_id, current_status, to_status, expected_from_status)
+            if rejection:
+                return rejection
             
-            # Add transition metadata
-            existing_metadata['last_transition'] = {
-                'from': current_status,
-                'to': to_status,
-                'actor_id': actor_id,
-                'actor_type': actor_type,
-                'reason': reason,
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-                'correlation_id': correlation_id
-            }
+            patch = _transition_metadata(
+                order, to_status, actor_id, actor_type, reason, metadata_patch, correlation_id
+            )
             
             # Update order status
             now = datetime.now(timezone.utc)
-            await conn.execute("""
+            await conn.execute(f"""
                 UPDATE orders 
                 SET status = $1, 
-                    metadata = $2,
+                    metadata = {METADATA_MERGE_SQL.format(patch="$2")},
                     updated_at = $3
                 WHERE order_id = $4
-            """, to_status, json.dumps(existing_metadata), now, order_id)
+            """, to_status, json.dumps(patch), now, order_id)
             
             # Get amount safely for audit logging
             order_amount = _safe_float(order.get('amount'))
@@ -526,6 +629,232 @@ async def transition_order(
             await pool.release(conn)
 
 
+async def _transition_order_cte(
+    conn,
+    order_id: str,
+    to_status: str,
+    actor_id: str,
+    actor_type: str,
+    reason: Optional[str],
+    metadata_patch: Optional[Dict[str, Any]],
+    correlation_id: Optional[str]
+) -> TransitionResult:
+    """
+    transition_order as ONE data-modifying CTE: lock + guarded UPDATE +
+    audit INSERT in a single round trip, so the row lock is held for one
+    statement instead of three.
+    
+    The UPDATE only fires if the current status is in
+    ALLOWED_FROM_STATUSES[to_status]; otherwise the locked status is returned
+    and the usual no-op / failure result is built in Python.
+    """
+    now = datetime.now(timezone.utc)
+    audit_log_id = str(uuid.uuid4())
+    
+    patch = dict(metadata_patch or {})
+    last_transition = {
+        'to': to_status,
+        'actor_id': actor_id,
+        'actor_type': actor_type,
+        'reason': reason,
+        'timestamp': now.isoformat(),
+        'correlation_id': correlation_id
+    }
+    # Same details as write_order_audit; from_status / amount are added in SQL
+    audit_details = {
+        "order_id": order_id,
+        "to_status": to_status,
+        "actor_id": actor_id,
+        "actor_type": actor_type,
+        "correlation_id": correlation_id,
+        "reason": reason,
+    }
+    
+    row = await conn.fetchrow(f"""
+        WITH cur AS (
+            SELECT order_id, status, user_id, username, COALESCE(amount, 0) AS amount
+            FROM orders
+            WHERE order_id = $1
+            FOR UPDATE
+        ), upd AS (
+            UPDATE orders o
+            SET status = $2,
+                metadata = {METADATA_MERGE_SQL.format(
+                    patch="($3::jsonb || jsonb_build_object('last_transition', $4::jsonb || jsonb_build_object('from', cur.status)))"
+                )},
+                updated_at = $5
+            FROM cur
+            WHERE o.order_id = cur.order_id
+              AND cur.status = ANY($6::varchar[])
+            RETURNING o.order_id
+        ), audit AS (
+            INSERT INTO audit_logs (
+                log_id, user_id, username, action,
+                resource_type, resource_id, details, created_at
+            )
+            SELECT $7, cur.user_id, cur.username, 'order.transition.' || $2,
+                   'order', cur.order_id,
+                   $8::jsonb || jsonb_build_object('from_status', cur.status, 'amount', cur.amount),
+                   $5
+            FROM cur JOIN upd ON upd.order_id = cur.order_id
+            RETURNING log_id
+        )
+        SELECT cur.status, (SELECT COUNT(*) FROM audit) AS transitioned
+        FROM cur
+    """, order_id, to_status, json.dumps(patch), json.dumps(last_transition), now,
+        ALLOWED_FROM_STATUSES[to_status], audit_log_id, json.dumps(audit_details))
+    
+    if not row:
+        return TransitionResult(
+            success=False,
+            order_id=order_id,
+            from_status="",
+            to_status=to_status,
+            message="Order not found",
+            error_code=OrderErrorCode.ORDER_NOT_FOUND.value
+        )
+    
+    current_status = row['status']
+    if not row['transitioned']:
+        rejection = _check_transition(order_id, current_status, to_status)
+        if rejection:
+            return rejection
+        # Not in ALLOWED_FROM_STATUSES but valid (unknown legacy status) - use the slow path
+        return await transition_order(
+            order_id, to_status, actor_id, actor_type, reason, metadata_patch,
+            expected_from_status=current_status, conn=conn
+        )
+    
+    logger.info(
+        f"Order {order_id} transitioned: {current_status} -> {to_status} "
+        f"by {actor_type}:{actor_id} (reason: {reason})"
+    )
+    
+    return TransitionResult(
+        success=True,
+        order_id=order_id,
+        from_status=current_status,
+        to_status=to_status,
+        message=f"Successfully transitioned to '{to_status}'",
+        audit_log_id=audit_log_id
+    )
+
+
+async def transition_orders_batch(
+    order_ids: List[str],
+    to_status: str,
+    actor_id: str,
+    actor_type: Literal["admin", "telegram_bot", "system", "user"] = "system",
+    reason: Optional[str] = None,
+    metadata_patch: Optional[Dict[str, Any]] = None,
+    expected_from_status: Optional[str] = None,
+    conn=None
+) -> List[TransitionResult]:
+    """
+    Batched transition_order: move many orders to to_status in ONE transaction.
+    
+    1. Locks all rows with one SELECT ... FOR UPDATE ordered by order_id
+       (consistent lock order - concurrent batches cannot deadlock)
+    2. Validates every transition against the state machine in memory
+    3. Writes all status/metadata changes with one UPDATE ... FROM unnest()
+    4. Writes all audit rows in one batch
+    
+    Orders that fail validation are skipped; the others still transition.
+    
+    Returns:
+        One TransitionResult per order_id, in input order
+    """
+    correlation_id = get_correlation_id()
+    unique_ids = list(dict.fromkeys(order_ids))
+    
+    pool = await get_pool()
+    should_close = conn is None
+    
+    if conn is None:
+        conn = await pool.acquire()
+    
+    try:
+        async with conn.transaction():
+            rows = await conn.fetch("""
+                SELECT order_id, status, user_id, username, amount
+                FROM orders 
+                WHERE order_id = ANY($1::varchar[])
+                ORDER BY order_id
+                FOR UPDATE
+            """, unique_ids)
+            locked = {row['order_id']: row for row in rows}
+            
+            results: Dict[str, TransitionResult] = {}
+            update_ids, patches, audit_rows = [], [], []
+            
+            for order_id in unique_ids:
+                order = locked.get(order_id)
+                if not order:
+                    results[order_id] = TransitionResult(
+                        success=False,
+                        order_id=order_id,
+                        from_status="",
+                        to_status=to_status,
+                        message="Order not found",
+                        error_code=OrderErrorCode.ORDER_NOT_FOUND.value
+                    )
+                    continue
+                
+                rejection = _check_transition(order_id, order['status'], to_status, expected_from_status)
+                if rejection:
+                    results[order_id] = rejection
+                    continue
+                
+                patch = _transition_metadata(
+                    order, to_status, actor_id, actor_type, reason, metadata_patch, correlation_id
+                )
+                audit_row = build_order_audit_row(
+                    order_id=order_id,
+                    user_id=order['user_id'],
+                    username=order['username'],
+                    action=f"order.transition.{to_status}",
+                    from_status=order['status'],
+                    to_status=to_status,
+                    actor_id=actor_id,
+                    actor_type=actor_type,
+                    amount=_safe_float(order.get('amount')),
+                    details={"reason": reason}
+                )
+                update_ids.append(order_id)
+                patches.append(json.dumps(patch))
+                audit_rows.append(audit_row)
+                results[order_id] = TransitionResult(
+                    success=True,
+                    order_id=order_id,
+                    from_status=order['status'],
+                    to_status=to_status,
+                    message=f"Successfully transitioned to '{to_status}'",
+                    audit_log_id=audit_row[0]
+                )
+            
+            if update_ids:
+                await conn.execute(f"""
+                    UPDATE orders o
+                    SET status = $1,
+                        metadata = {METADATA_MERGE_SQL.format(patch="v.patch")},
+                        updated_at = NOW()
+                    FROM unnest($2::varchar[], $3::text[]) AS v(order_id, patch)
+                    WHERE o.order_id = v.order_id
+                """, to_status, update_ids, patches)
+                await write_order_audits(conn, audit_rows)
+            
+            logger.info(
+                f"Batch transition to {to_status} by {actor_type}:{actor_id}: "
+                f"{len(update_ids)}/{len(unique_ids)} orders"
+            )
+            
+            return [results[order_id] for order_id in order_ids]
+    
+    finally:
+        if should_close:
+            await pool.release(conn)
+
+
 # ==================== ORDER CREATION ====================
 
 async def create_order(
@@ -760,11 +1089,362 @@ async def approve_order(
     )
 
 
+# Side-effect callback for approve_and_execute_order:
+# (conn, locked order row) -> execution result message; raise to fail the order
+ApprovalExecutor = Callable[[Any, Dict[str, Any]], Awaitable[str]]
+
+# Side-effect callback for approve_and_execute_orders_batch:
+# (conn, locked order rows) -> {order_id: (success, execution result / error)}
+BatchApprovalExecutor = Callable[[Any, List[Dict[str, Any]]], Awaitable[Dict[str, Tuple[bool, str]]]]
+
+_ORDER_LOCK_COLUMNS = (
+    "order_id, status, order_type, user_id, username, amount, bonus_amount, "
+    "metadata->>'payment_method' AS payment_method"
+)
+
+
+def _plan_approval(order_id: str, order: Optional[Dict[str, Any]]) -> Tuple[Optional[TransitionResult], List[str]]:
+    """
+    Validate an approve -> processing chain for a locked order.
+    
+    Returns:
+        (failure result or None, steps to walk before the final status)
+    """
+    approved = OrderStatus.APPROVED.value
+    if not order:
+        return TransitionResult(
+            success=False,
+            order_id=order_id,
+            from_status="",
+            to_status=approved,
+            message="Order not found",
+            error_code=OrderErrorCode.ORDER_NOT_FOUND.value
+        ), []
+    
+    current_status = order['status']
+    
+    if is_direct_execution(order['order_type']):
+        return TransitionResult(
+            success=False,
+            order_id=order_id,
+            from_status=current_status,
+            to_status=approved,
+            message=f"Order type '{order['order_type']}' does not require approval",
+            error_code=OrderErrorCode.NOT_APPROVABLE.value
+        ), []
+    
+    # Steps to walk: approved (unless already there) then processing
+    if current_status == approved:
+        return None, [OrderStatus.PROCESSING.value]
+    if OrderStatus.is_terminal(current_status):
+        return TransitionResult(
+            success=False,
+            order_id=order_id,
+            from_status=current_status,
+            to_status=approved,
+            message=f"Cannot transition from terminal state '{current_status}'",
+            error_code=OrderErrorCode.ALREADY_PROCESSED.value
+        ), []
+    if is_valid_transition(current_status, approved):
+        return None, [approved, OrderStatus.PROCESSING.value]
+    return TransitionResult(
+        success=False,
+        order_id=order_id,
+        from_status=current_status,
+        to_status=approved,
+        message=f"Invalid transition: '{current_status}' -> '{approved}'. "
+                f"Allowed: {get_allowed_transitions(current_status)}",
+        error_code=OrderErrorCode.INVALID_TRANSITION.value
+    ), []
+
+
+def _finish_approval(
+    order: Dict[str, Any],
+    steps: List[str],
+    execution_success: bool,
+    execution_result: str,
+    actor_id: str,
+    actor_type: str,
+    reason: Optional[str],
+    final_amount: Optional[float],
+    correlation_id: Optional[str]
+) -> Tuple[str, Dict[str, Any], List[Tuple]]:
+    """
+    Build the final status, the metadata patch (same keys as the step
+    helpers) and the per-step audit rows for an executed approval chain.
+    """
+    approved = OrderStatus.APPROVED.value
+    metadata: Dict[str, Any] = {}
+    
+    now_iso = datetime.now(timezone.utc).isoformat()
+    order_amount = _safe_float(order.get('amount'))
+    if approved in steps:
+        metadata["approved_by"] = actor_id
+        metadata["approved_at"] = now_iso
+        if final_amount is not None and final_amount != order_amount:
+            metadata["amount_adjusted"] = True
+            metadata["original_amount"] = order_amount
+            metadata["adjusted_amount"] = final_amount
+            metadata["adjusted_by"] = actor_id
+    if execution_success:
+        final_status = OrderStatus.COMPLETED.value
+        metadata["completed_at"] = now_iso
+        metadata["execution_result"] = execution_result
+        final_reason = execution_result or "Completed successfully"
+    else:
+        final_status = OrderStatus.FAILED.value
+        metadata["failed_at"] = now_iso
+        metadata["error_message"] = execution_result
+        final_reason = execution_result or "Processing failed"
+    
+    metadata['last_transition'] = {
+        'from': OrderStatus.PROCESSING.value,
+        'to': final_status,
+        'actor_id': actor_id,
+        'actor_type': actor_type,
+        'reason': final_reason,
+        'timestamp': now_iso,
+        'correlation_id': correlation_id
+    }
+    
+    # Same audit trail as the step-by-step path
+    reasons = {
+        approved: reason or "Approved",
+        OrderStatus.PROCESSING.value: "Processing started",
+        final_status: final_reason,
+    }
+    audit_rows = []
+    from_status = order['status']
+    for to_status in steps + [final_status]:
+        audit_rows.append(build_order_audit_row(
+            order_id=order['order_id'],
+            user_id=order['user_id'],
+            username=order['username'],
+            action=f"order.transition.{to_status}",
+            from_status=from_status,
+            to_status=to_status,
+            actor_id=actor_id,
+            actor_type=actor_type,
+            amount=order_amount,
+            details={"reason": reasons[to_status]}
+        ))
+        from_status = to_status
+    
+    return final_status, metadata, audit_rows
+
+
+async def approve_and_execute_order(
+    order_id: str,
+    actor_id: str,
+    actor_type: Literal["admin", "telegram_bot"],
+    execute_fn: ApprovalExecutor,
+    final_amount: Optional[float] = None,
+    reason: Optional[str] = None,
+    conn=None
+) -> TransitionResult:
+    """
+    Approve -> processing -> execute -> completed/failed in ONE transaction.
+    
+    Equivalent to approve_order + start_processing + (side effects) +
+    complete_order/fail_order, but the order row is locked once, the status
+    and metadata are written with a single UPDATE and the per-step audit rows
+    (order.transition.approved / .processing / .completed|.failed) are written
+    in one batch.
+    
+    execute_fn runs inside a savepoint: if it raises, its writes are rolled
+    back and the order ends in 'failed' (EXECUTION HONESTY / MONEY SAFETY).
+    
+    Args:
+        order_id: The order to approve
+        actor_id: Who is approving
+        actor_type: admin or telegram_bot
+        execute_fn: Side effects - async (conn, order) -> execution result
+        final_amount: Optional adjusted amount
+        reason: Optional approval reason
+        conn: Optional database connection (for transaction reuse)
+    
+    Returns:
+        TransitionResult - on success, to_status is 'completed' or 'failed'
+        and message carries the execution result / error. An order already
+        'approved' resumes at processing (same as approve_order's no-op).
+    """
+    correlation_id = get_correlation_id()
+    
+    pool = await get_pool()
+    should_close = conn is None
+    
+    if conn is None:
+        conn = await pool.acquire()
+    
+    try:
+        async with conn.transaction():
+            order = await conn.fetchrow(f"""
+                SELECT {_ORDER_LOCK_COLUMNS}
+                FROM orders 
+                WHERE order_id = $1 
+                FOR UPDATE
+            """, order_id)
+            
+            failure, steps = _plan_approval(order_id, order)
+            if failure:
+                return failure
+            order = dict(order)
+            
+            # STEP: side effects (savepoint - rolled back alone on failure)
+            try:
+                async with conn.transaction():
+                    execution_result = await execute_fn(conn, order)
+                execution_success = True
+            except Exception as e:
+                logger.error(f"Order {order_id} execution failed: {e}")
+                execution_result = str(e)
+                execution_success = False
+            
+            final_status, metadata, audit_rows = _finish_approval(
+                order, steps, execution_success, execution_result,
+                actor_id, actor_type, reason, final_amount, correlation_id
+            )
+            
+            await conn.execute(f"""
+                UPDATE orders 
+                SET status = $1, 
+                    metadata = {METADATA_MERGE_SQL.format(patch="$2")},
+                    updated_at = NOW()
+                WHERE order_id = $3
+            """, final_status, json.dumps(metadata), order_id)
+            
+            audit_log_ids = await write_order_audits(conn, audit_rows)
+            
+            logger.info(
+                f"Order {order_id} transitioned: {order['status']} -> {' -> '.join(steps)} -> {final_status} "
+                f"by {actor_type}:{actor_id}"
+            )
+            
+            return TransitionResult(
+                success=True,
+                order_id=order_id,
+                from_status=order['status'],
+                to_status=final_status,
+                message=execution_result,
+                audit_log_id=audit_log_ids[-1]
+            )
+    
+    finally:
+        if should_close:
+            await pool.release(conn)
+
+
+async def approve_and_execute_orders_batch(
+    order_ids: List[str],
+    actor_id: str,
+    actor_type: Literal["admin", "telegram_bot"],
+    execute_batch_fn: BatchApprovalExecutor,
+    reason: Optional[str] = None,
+    conn=None
+) -> List[TransitionResult]:
+    """
+    Batched approve_and_execute_order for many orders in ONE transaction.
+    
+    All order rows are locked with one SELECT ... FOR UPDATE (ordered by
+    order_id, so concurrent batches cannot deadlock), every chain is
+    validated in memory, execute_batch_fn applies the side effects for all
+    valid orders at once (inside a savepoint - if it raises, every order in
+    the batch ends 'failed'), then statuses are written with one UPDATE and
+    audit rows in one batch.
+    
+    Returns:
+        One TransitionResult per order_id, in input order
+    """
+    correlation_id = get_correlation_id()
+    unique_ids = list(dict.fromkeys(order_ids))
+    
+    pool = await get_pool()
+    should_close = conn is None
+    
+    if conn is None:
+        conn = await pool.acquire()
+    
+    try:
+        async with conn.transaction():
+            rows = await conn.fetch(f"""
+                SELECT {_ORDER_LOCK_COLUMNS}
+                FROM orders 
+                WHERE order_id = ANY($1::varchar[])
+                ORDER BY order_id
+                FOR UPDATE
+            """, unique_ids)
+            locked = {row['order_id']: dict(row) for row in rows}
+            
+            results: Dict[str, TransitionResult] = {}
+            plans: Dict[str, List[str]] = {}
+            for order_id in unique_ids:
+                failure, steps = _plan_approval(order_id, locked.get(order_id))
+                if failure:
+                    results[order_id] = failure
+                else:
+                    plans[order_id] = steps
+            
+            if plans:
+                executable = [locked[order_id] for order_id in plans]
+                try:
+                    async with conn.transaction():
+                        outcomes = await execute_batch_fn(conn, executable)
+                except Exception as e:
+                    logger.error(f"Batch execution failed for {len(executable)} orders: {e}")
+                    outcomes = {order['order_id']: (False, str(e)) for order in executable}
+                
+                status_ids, statuses, patches, audit_rows = [], [], [], []
+                for order in executable:
+                    order_id = order['order_id']
+                    execution_success, execution_result = outcomes.get(
+                        order_id, (False, "No execution result")
+                    )
+                    final_status, metadata, order_audits = _finish_approval(
+                        order, plans[order_id], execution_success, execution_result,
+                        actor_id, actor_type, reason, None, correlation_id
+                    )
+                    status_ids.append(order_id)
+                    statuses.append(final_status)
+                    patches.append(json.dumps(metadata))
+                    audit_rows.extend(order_audits)
+                    results[order_id] = TransitionResult(
+                        success=True,
+                        order_id=order_id,
+                        from_status=order['status'],
+                        to_status=final_status,
+                        message=execution_result,
+                        audit_log_id=order_audits[-1][0]
+                    )
+                
+                await conn.execute(f"""
+                    UPDATE orders o
+                    SET status = v.status,
+                        metadata = {METADATA_MERGE_SQL.format(patch="v.patch")},
+                        updated_at = NOW()
+                    FROM unnest($1::varchar[], $2::varchar[], $3::text[]) AS v(order_id, status, patch)
+                    WHERE o.order_id = v.order_id
+                """, status_ids, statuses, patches)
+                
+                await write_order_audits(conn, audit_rows)
+            
+            logger.info(
+                f"Batch approval by {actor_type}:{actor_id}: {len(plans)} executed, "
+                f"{len(unique_ids) - len(plans)} skipped"
+            )
+            
+            return [results[order_id] for order_id in order_ids]
+    
+    finally:
+        if should_close:
+            await pool.release(conn)
+
+
 async def reject_order(
     order_id: str,
     actor_id: str,
     actor_type: Literal["admin", "telegram_bot"] = "admin",
-    reason: Optional[str] = None
+    reason: Optional[str] = None,
+    conn=None
 ) -> TransitionResult:
     """
     Reject an order (transition pending_approval -> rejected).
@@ -781,7 +1461,8 @@ async def reject_order(
         actor_id=actor_id,
         actor_type=actor_type,
         reason=reason or "Rejected by reviewer",
-        metadata_patch=metadata_patch
+        metadata_patch=metadata_patch,
+        conn=conn
     )
 
 
@@ -884,11 +1565,14 @@ __all__ = [
     
     # Core functions
     "transition_order",
+    "transition_orders_batch",
     "create_order",
     "TransitionResult",
     
     # Approval helpers
     "approve_order",
+    "approve_and_execute_order",
+    "approve_and_execute_orders_batch",
     "reject_order",
     "start_processing",
     "complete_order",
@@ -896,6 +1580,8 @@ __all__ = [
     
     # Audit
     "write_order_audit",
+    "write_order_audits",
+    "build_order_audit_row",
     
     # Setup (deprecated - using audit_logs)
     "ensure_audit_table_exists",
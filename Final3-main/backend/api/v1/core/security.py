@@ -2,12 +2,14 @@
 API v1 Security Utilities
 Password hashing, token generation, HMAC signing, rate limiting
 """
+import asyncio
 import hashlib
 import hmac
 import secrets
 import string
 import time
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple, Dict, Any
 from jose import JWTError, jwt
@@ -22,18 +24,111 @@ _brute_force_store: Dict[str, Dict] = {}
 
 
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Hash a password using bcrypt (blocking - use hash_password_async in handlers)"""
+    salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
+    """Verify a password against its hash (blocking - use verify_password_async in handlers)"""
     try:
         return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
     except Exception:
         return False
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if a bcrypt hash was made with a work factor other than settings.bcrypt_rounds"""
+    # Format: $2b$12$<salt+hash>
+    try:
+        return int(hashed_password.split('$')[2]) != settings.bcrypt_rounds
+    except (IndexError, ValueError):
+        return False
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated thread pool so hashing never blocks the event
+    loop. bcrypt releases the GIL, so password_hash_workers calls run in
+    parallel; further calls queue, and their queue wait is measured.
+    """
+    
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self._completed = 0
+        self._total_queue_ms = 0.0
+        self._max_queue_ms = 0.0
+        self._total_run_ms = 0.0
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.password_hash_workers,
+                thread_name_prefix="password-hash"
+            )
+        return self._executor
+    
+    async def _run(self, fn, *args):
+        def timed():
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started, time.perf_counter()
+        
+        # Counters are only touched on the event loop thread
+        submitted = time.perf_counter()
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(self._get_executor(), timed)
+        finally:
+            self._in_flight -= 1
+        
+        queue_ms = (started - submitted) * 1000
+        self._completed += 1
+        self._total_queue_ms += queue_ms
+        self._max_queue_ms = max(self._max_queue_ms, queue_ms)
+        self._total_run_ms += (finished - started) * 1000
+        return result
+    
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+    
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def get_status(self) -> Dict[str, Any]:
+        completed = self._completed or 1
+        return {
+            "workers": settings.password_hash_workers,
+            "bcrypt_rounds": settings.bcrypt_rounds,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "avg_queue_ms": round(self._total_queue_ms / completed, 2),
+            "max_queue_ms": round(self._max_queue_ms, 2),
+            "avg_hash_ms": round(self._total_run_ms / completed, 2),
+        }
+
+
+# Process-wide hasher
+password_hasher = PasswordHasher()
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password hashing pool"""
+    return await password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password hashing pool"""
+    return await password_hasher.verify(plain_password, hashed_password)
+
+
 def generate_referral_code(length: int = 8) -> str:
     """Generate a unique referral code"""
     chars = string.ascii_uppercase + string.digits
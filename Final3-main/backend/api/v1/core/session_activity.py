@@ -0,0 +1,143 @@
+"""
+Session Activity Tracker - Write-behind sessions.last_used_at
+
+validate_token() records the access token's last use in memory instead of
+issuing an UPDATE per authenticated request. Every
+session_activity_flush_seconds the tracker writes all pending tokens in one
+UPDATE ... FROM unnest(...) statement (one row per token, latest use wins)
+and on shutdown.
+
+Rows whose stored last_used_at is already within
+session_last_used_granularity_seconds of the new value are skipped by the
+statement itself, so an active session is rewritten at most once per
+granularity window.
+"""
+import asyncio
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+from .config import get_api_settings
+from .database import execute
+
+logger = logging.getLogger(__name__)
+settings = get_api_settings()
+
+FLUSH_SQL = """
+    UPDATE sessions s
+    SET last_used_at = v.used_at
+    FROM unnest($1::text[], $2::timestamptz[]) AS v(access_token, used_at)
+    WHERE s.access_token = v.access_token
+      AND s.is_active = TRUE
+      AND (s.last_used_at IS NULL OR s.last_used_at < v.used_at - make_interval(secs => $3))
+"""
+
+
+class SessionActivityTracker:
+    """Deduplicates session last-use timestamps and writes them in batches"""
+
+    def __init__(self):
+        self._pending: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        # Status counters
+        self._recorded = 0
+        self._tokens_flushed = 0
+        self._rows_dropped = 0
+        self._flush_count = 0
+        self._flush_failures = 0
+        self._last_flush_ms: Optional[float] = None
+        self._last_error: Optional[str] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def record(self, access_token: str, used_at: Optional[datetime] = None):
+        """Note that access_token was used (latest timestamp per token is kept)"""
+        used_at = used_at or datetime.now(timezone.utc)
+        self._recorded += 1
+        previous = self._pending.get(access_token)
+        if previous is None:
+            if len(self._pending) >= settings.session_activity_max_pending:
+                # last_used_at is informational - drop rather than grow without bound
+                self._rows_dropped += 1
+                return
+            self._pending[access_token] = used_at
+        elif used_at > previous:
+            self._pending[access_token] = used_at
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info("Session activity tracker started")
+
+    async def stop(self):
+        """Stop the timer loop and flush whatever is pending"""
+        if self.is_running:
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        logger.info("Session activity tracker stopped")
+
+    async def _run(self):
+        while not self._stopping:
+            await asyncio.sleep(settings.session_activity_flush_seconds)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write all pending last-use timestamps. Returns the number of tokens sent."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+
+            started = time.perf_counter()
+            try:
+                await execute(
+                    FLUSH_SQL, list(pending.keys()), list(pending.values()),
+                    float(settings.session_last_used_granularity_seconds)
+                )
+            except Exception as e:
+                self._flush_failures += 1
+                self._last_error = str(e)
+                logger.error(f"Failed to flush {len(pending)} session last_used_at updates: {e}")
+                # Keep the newer of the failed and any newly recorded timestamps
+                for token, used_at in pending.items():
+                    current = self._pending.get(token)
+                    if current is None or used_at > current:
+                        self._pending[token] = used_at
+                return 0
+
+            self._flush_count += 1
+            self._tokens_flushed += len(pending)
+            self._last_flush_ms = (time.perf_counter() - started) * 1000
+            return len(pending)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "pending_tokens": len(self._pending),
+            "flush_interval_seconds": settings.session_activity_flush_seconds,
+            "granularity_seconds": settings.session_last_used_granularity_seconds,
+            "recorded": self._recorded,
+            "tokens_flushed": self._tokens_flushed,
+            "dropped": self._rows_dropped,
+            "flush_count": self._flush_count,
+            "flush_failures": self._flush_failures,
+            "last_flush_latency_ms": round(self._last_flush_ms, 2) if self._last_flush_ms is not None else None,
+            "last_error": self._last_error,
+        }
+
+
+# Process-wide tracker
+session_activity_tracker = SessionActivityTracker()
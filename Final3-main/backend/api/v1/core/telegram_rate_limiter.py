@@ -0,0 +1,175 @@
+"""
+Telegram Send Scheduler - Per-bot / per-chat token buckets
+
+Telegram throttles each bot at ~30 messages/second overall and ~1 message/second
+per chat. Every Bot API call made by the notification router goes through
+telegram_scheduler.post(), which:
+- Waits for a token from the bot's global bucket AND the target chat's bucket
+  (sends are queued and smoothed instead of failing)
+- On HTTP 429, honours parameters.retry_after by pausing both buckets, then retries
+- Tracks queue depth per bot for monitoring (GET /admin/telegram/send-queue)
+
+Buckets are in-process; each worker paces its own sends.
+"""
+import asyncio
+import time
+import logging
+from typing import Dict, Any, Tuple
+
+import httpx
+
+from .config import get_api_settings
+
+logger = logging.getLogger(__name__)
+settings = get_api_settings()
+
+TELEGRAM_API_BASE = "https://api.telegram.org"
+
+
+class TokenBucket:
+    """
+    Token bucket using reservations: callers take a token immediately (the
+    balance may go negative) and sleep for the returned delay. This keeps
+    waiters FIFO without a lock and spreads a burst evenly at `rate`.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()  # may sit in the future while paused
+
+    def reserve(self) -> float:
+        """Take one token. Returns seconds to wait before using it."""
+        now = time.monotonic()
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+        self._tokens -= 1
+        wait = self._updated - now
+        if self._tokens < 0:
+            wait += -self._tokens / self.rate
+        return max(0.0, wait)
+
+    def pause(self, seconds: float):
+        """Block the bucket for `seconds` (e.g. Telegram retry_after)"""
+        resume_at = time.monotonic() + seconds
+        if resume_at > self._updated:
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = resume_at
+
+
+class TelegramSendScheduler:
+    """Paces Bot API calls per bot_id (global limit) and per bot_id/chat_id"""
+
+    def __init__(self):
+        self._bot_buckets: Dict[str, TokenBucket] = {}
+        self._chat_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def _bot_bucket(self, bot_id: str) -> TokenBucket:
+        bucket = self._bot_buckets.get(bot_id)
+        if bucket is None:
+            rate = settings.telegram_bot_rate_per_second
+            bucket = self._bot_buckets[bot_id] = TokenBucket(rate, rate)
+        return bucket
+
+    def _chat_bucket(self, bot_id: str, chat_id: str) -> TokenBucket:
+        key = (bot_id, str(chat_id))
+        bucket = self._chat_buckets.get(key)
+        if bucket is None:
+            bucket = self._chat_buckets[key] = TokenBucket(
+                settings.telegram_chat_rate_per_second,
+                settings.telegram_chat_burst
+            )
+        return bucket
+
+    def _bot_stats(self, bot_id: str) -> Dict[str, Any]:
+        stats = self._stats.get(bot_id)
+        if stats is None:
+            stats = self._stats[bot_id] = {
+                "queued": 0,
+                "in_flight": 0,
+                "sent_total": 0,
+                "throttled_total": 0,
+                "last_retry_after": None,
+            }
+        return stats
+
+    async def post(
+        self,
+        bot: Dict[str, Any],
+        method: str,
+        **request_kwargs
+    ) -> httpx.Response:
+        """
+        Call a Bot API method for `bot` (needs bot_id, bot_token, chat_id),
+        waiting for rate-limit tokens and retrying on 429.
+
+        Returns the final httpx.Response (a 429 is returned only after
+        telegram_429_max_retries pauses).
+        """
+        from .notification_router import get_telegram_client
+
+        bot_id = bot.get('bot_id') or bot['bot_token']
+        chat_id = bot['chat_id']
+        url = f"{TELEGRAM_API_BASE}/bot{bot['bot_token']}/{method}"
+        stats = self._bot_stats(bot_id)
+
+        attempt = 0
+        while True:
+            stats["queued"] += 1
+            try:
+                delay = max(
+                    self._bot_bucket(bot_id).reserve(),
+                    self._chat_bucket(bot_id, chat_id).reserve()
+                )
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            finally:
+                stats["queued"] -= 1
+
+            stats["in_flight"] += 1
+            try:
+                response = await get_telegram_client().post(url, **request_kwargs)
+            finally:
+                stats["in_flight"] -= 1
+
+            if response.status_code != 429 or attempt >= settings.telegram_429_max_retries:
+                if response.status_code < 400:
+                    stats["sent_total"] += 1
+                return response
+
+            attempt += 1
+            retry_after = self._parse_retry_after(response)
+            stats["throttled_total"] += 1
+            stats["last_retry_after"] = retry_after
+            logger.warning(
+                f"Telegram 429 for bot {bot.get('name', bot_id)} on {method}: "
+                f"retry_after={retry_after}s (attempt {attempt})"
+            )
+            # A 429 may be either the chat or the bot-wide limit - pause both
+            self._bot_bucket(bot_id).pause(retry_after)
+            self._chat_bucket(bot_id, chat_id).pause(retry_after)
+
+    @staticmethod
+    def _parse_retry_after(response: httpx.Response) -> float:
+        try:
+            retry_after = response.json().get('parameters', {}).get('retry_after')
+            if retry_after is not None:
+                return float(retry_after)
+        except Exception:
+            pass
+        header = response.headers.get('Retry-After')
+        try:
+            return float(header) if header else 1.0
+        except ValueError:
+            return 1.0
+
+    def get_queue_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-bot queue depth and throttle counters"""
+        return {bot_id: dict(stats) for bot_id, stats in self._stats.items()}
+
+
+# Process-wide scheduler
+telegram_scheduler = TelegramSendScheduler()
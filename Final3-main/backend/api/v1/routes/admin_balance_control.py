@@ -13,6 +13,7 @@ import json
 
 from ..core.database import get_pool
 from ..core.auth import get_current_user, AuthenticatedUser
+from ..core.money_ops import money_executor
 
 router = APIRouter(prefix="/admin/balance-control", tags=["admin_balance"])
 logger = logging.getLogger(__name__)
@@ -58,22 +59,29 @@ async def admin_manual_load(
     
     SECURITY: Requires admin authentication.
     """
-    pool = await get_pool()
-    
-    async with pool.acquire() as conn:
+    # One transaction under the client's money lock
+    async with money_executor.user_transaction(request_data.user_id) as conn:
         # Get user
         user = await conn.fetchrow("""
-            SELECT user_id, username, real_balance, display_name
+            SELECT user_id, username, display_name
             FROM users WHERE user_id = $1
         """, request_data.user_id)
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
+        # Update user balance immediately (relative to the current value)
+        balance_after = float(await conn.fetchval("""
+            UPDATE users 
+            SET real_balance = COALESCE(real_balance, 0) + $1,
+                updated_at = NOW()
+            WHERE user_id = $2
+            RETURNING real_balance
+        """, request_data.amount, user['user_id']))
+        balance_before = balance_after - request_data.amount
+        
         # Create order with immediate approval
         order_id = str(uuid.uuid4())
-        balance_before = float(user['real_balance'] or 0)
-        balance_after = balance_before + request_data.amount
         
         # Insert order as approved and executed
         await conn.execute("""
@@ -93,14 +101,6 @@ async def admin_manual_load(
                  'balance_after': balance_after
              }), admin.user_id)
         
-        # Update user balance immediately
-        await conn.execute("""
-            UPDATE users 
-            SET real_balance = COALESCE(real_balance, 0) + $1,
-                updated_at = NOW()
-            WHERE user_id = $2
-        """, request_data.amount, user['user_id'])
-        
         # Log to wallet_ledger
         ledger_id = str(uuid.uuid4())
         await conn.execute("""
@@ -150,9 +150,8 @@ async def admin_manual_withdraw(
     
     SECURITY: Requires admin authentication.
     """
-    pool = await get_pool()
-    
-    async with pool.acquire() as conn:
+    # One transaction under the client's money lock
+    async with money_executor.user_transaction(request_data.user_id) as conn:
         # Get user
         user = await conn.fetchrow("""
             SELECT user_id, username, real_balance, display_name
@@ -162,12 +161,21 @@ async def admin_manual_withdraw(
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        balance_before = float(user['real_balance'] or 0)
+        # Deduct immediately - the balance check is part of the UPDATE
+        balance_after = await conn.fetchval("""
+            UPDATE users 
+            SET real_balance = COALESCE(real_balance, 0) - $1,
+                updated_at = NOW()
+            WHERE user_id = $2 AND COALESCE(real_balance, 0) >= $1
+            RETURNING real_balance
+        """, request_data.amount, user['user_id'])
         
-        if balance_before < request_data.amount:
+        if balance_after is None:
+            balance_before = float(user['real_balance'] or 0)
             raise HTTPException(status_code=400, detail=f"Insufficient balance. Current balance: ${balance_before:.2f}")
         
-        balance_after = balance_before - request_data.amount
+        balance_after = float(balance_after)
+        balance_before = balance_after + request_data.amount
         
         # Create order with immediate approval
         order_id = str(uuid.uuid4())
@@ -190,14 +198,6 @@ async def admin_manual_withdraw(
                  'balance_after': balance_after
              }), admin.user_id)
         
-        # Update user balance immediately
-        await conn.execute("""
-            UPDATE users 
-            SET real_balance = COALESCE(real_balance, 0) - $1,
-                updated_at = NOW()
-            WHERE user_id = $2
-        """, request_data.amount, user['user_id'])
-        
         # Log to wallet_ledger
         ledger_id = str(uuid.uuid4())
         await conn.execute("""
@@ -10,6 +10,7 @@ import uuid
 import json
 
 from ..core.database import fetch_one, fetch_all, execute
+from ..services.rules_service import invalidate_rules_snapshot
 from ..core.config import ErrorCodes
 from .dependencies import authenticate_request, require_auth
 
@@ -433,6 +434,7 @@ async def create_perk(
     ''', perk_id, data.referral_code.upper(), data.game_name.lower() if data.game_name else None,
         data.percent_bonus, data.flat_bonus, data.max_bonus, data.min_amount,
         now, data.valid_until, data.max_uses, data.is_active, auth.user_id, now)
+    await invalidate_rules_snapshot()
     
     await log_audit(auth.user_id, auth.username, "admin.perk_created", "perk", perk_id, data.model_dump())
     
@@ -467,6 +469,7 @@ async def update_perk(
             f"UPDATE referral_perks SET {', '.join(updates)} WHERE perk_id = ${len(params)}",
             *params
         )
+        await invalidate_rules_snapshot()
     
     await log_audit(auth.user_id, auth.username, "admin.perk_updated", "perk", perk_id, data.model_dump())
     
@@ -483,6 +486,7 @@ async def delete_perk(
     auth = await require_admin(request, authorization)
     
     await execute("UPDATE referral_perks SET is_active = FALSE WHERE perk_id = $1", perk_id)
+    await invalidate_rules_snapshot()
     await log_audit(auth.user_id, auth.username, "admin.perk_deleted", "perk", perk_id)
     
     return {"success": True, "message": "Perk deleted"}
@@ -624,6 +628,7 @@ async def update_system_settings(
             f"UPDATE system_settings SET {', '.join(updates)} WHERE id = 'global'",
             *params
         )
+        await invalidate_rules_snapshot()
     
     await log_audit(auth.user_id, auth.username, "admin.settings_updated", "config", "global", data.model_dump())
     
@@ -707,6 +712,7 @@ async def update_game_rules(
             f"UPDATE games SET {', '.join(updates)} WHERE game_id = ${len(params)}",
             *params
         )
+        await invalidate_rules_snapshot()
     
     await log_audit(auth.user_id, auth.username, "admin.game_rules_updated", "game", game_id, data.model_dump())
     
@@ -14,8 +14,8 @@ Following the authoritative admin structure:
 11. Audit Logs
 """
 from fastapi import APIRouter, Request, Header, HTTPException, status
-from typing import Optional, List
-from datetime import datetime, timezone, timedelta
+from typing import Optional, List, Dict, Any
+from datetime import date, datetime, timezone, timedelta
 from pydantic import BaseModel, Field
 import uuid
 import json
@@ -23,6 +23,8 @@ import secrets
 import string
 
 from ..core.database import fetch_one, fetch_all, execute
+from ..services.rules_service import invalidate_rules_snapshot
+from ..core.auth import invalidate_auth_user
 from ..core.config import ErrorCodes
 from .dependencies import authenticate_request, require_auth
 
@@ -110,6 +112,26 @@ class ApprovalAction(BaseModel):
     modified_amount: Optional[float] = None
 
 
+class BulkApprovalAction(BaseModel):
+    """Bulk approval action (no amount adjustment)"""
+    order_ids: List[str] = Field(..., min_length=1, max_length=200)
+    action: str = Field(..., pattern="^(approve|reject)$")
+    reason: Optional[str] = None
+
+
+class BonusSimulationRequest(BaseModel):
+    """Candidate bonus rules to replay over historical deposits"""
+    start: date
+    end: date = Field(..., description="Exclusive")
+    signup_bonus: Optional[float] = Field(None, ge=0, le=100)
+    default_deposit_bonus: Optional[float] = Field(None, ge=0, le=100)
+    default_referral_bonus: Optional[float] = Field(None, ge=0, le=100)
+    games: Optional[Dict[str, Dict[str, Any]]] = Field(
+        None, description="{game_name: {bonus_rules: {default|first_deposit: {...} or null}}}"
+    )
+    include_daily: bool = True
+
+
 # ==================== 1. DASHBOARD (READ-ONLY OVERVIEW) ====================
 
 @router.get("/dashboard", summary="Dashboard overview - read-only")
@@ -263,6 +285,49 @@ async def process_approval(
     }
 
 
+@router.post("/approvals/bulk", summary="Approve or reject many orders")
+async def process_bulk_approval(
+    request: Request,
+    data: BulkApprovalAction,
+    authorization: str = Header(...)
+):
+    """
+    Approve or reject up to 200 orders in one transaction.
+    
+    Returns a result per order; orders that can't transition (already
+    processed, wrong type, insufficient balance) don't block the others.
+    """
+    from ..core.approval_service import bulk_approve_or_reject_orders, ActorType
+    
+    auth = await require_admin_access(request, authorization)
+    
+    results = await bulk_approve_or_reject_orders(
+        order_ids=data.order_ids,
+        action=data.action,
+        actor_type=ActorType.ADMIN,
+        actor_id=auth.user_id,
+        rejection_reason=data.reason
+    )
+    succeeded = sum(1 for r in results if r['success'])
+    
+    # Audit log
+    await log_audit(auth.user_id, auth.username, f"approval.bulk_{data.action}", "order", None, {
+        "reason": data.reason,
+        "order_ids": data.order_ids,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded
+    })
+    
+    return {
+        "success": True,
+        "action": data.action,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
+
+
 # ==================== 3. ORDERS ====================
 
 @router.get("/orders", summary="List all orders with filters")
@@ -429,9 +494,8 @@ async def create_client(
             raise HTTPException(status_code=400, detail="Password must be at least 8 characters")
     
     # Hash password IMMEDIATELY
-    from passlib.context import CryptContext
-    pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
-    password_hash = pwd_context.hash(plaintext_password)
+    from ..core.security import hash_password_async
+    password_hash = await hash_password_async(plaintext_password)
     
     # Generate referral code
     chars = string.ascii_uppercase + string.digits
@@ -713,6 +777,7 @@ async def update_client(
         params.append(user_id)
         query = f"UPDATE users SET {', '.join(updates)} WHERE user_id = ${param_idx}"
         await execute(query, *params)
+        await invalidate_auth_user(user_id)
     
     # Log audit
     await log_audit(auth.user_id, auth.username, "client.updated", "user", user_id, {
@@ -1050,6 +1115,7 @@ async def create_game(
             json.dumps(body.get('bonus_rules', {})),
             json.dumps(body.get('withdrawal_rules', {}))
         )
+        await invalidate_rules_snapshot()
         
         await log_audit(
             auth['user_id'], auth.get('username', 'admin'), "game_created", "game", game_id,
@@ -1116,6 +1182,7 @@ async def update_game_config(
             f"UPDATE games SET {', '.join(updates)}, updated_at = NOW() WHERE game_id = ${len(params)}",
             *params
         )
+        await invalidate_rules_snapshot()
     
     await log_audit(auth.user_id, auth.username, "game.config_updated", "game", game_id, data.model_dump())
     
@@ -1170,12 +1237,41 @@ async def update_global_rules(
             f"UPDATE system_settings SET {', '.join(updates)}, updated_at = NOW() WHERE id = 'global'",
             *params
         )
+        await invalidate_rules_snapshot()
     
     await log_audit(auth.user_id, auth.username, "rules.global_updated", "config", "global", data.model_dump())
     
     return {"success": True, "message": "Global rules updated"}
 
 
+@router.post("/rules/simulate", summary="Simulate bonus rule changes on past deposits")
+async def simulate_bonus_rules(
+    request: Request,
+    data: BonusSimulationRequest,
+    authorization: str = Header(...)
+):
+    """
+    Replay candidate bonus settings over historical deposits and report the
+    bonus liability per game and per game/day against what was actually paid.
+    Read-only - nothing is changed.
+    """
+    auth = await require_admin_access(request, authorization)
+    
+    if data.end <= data.start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    
+    from ..services.bonus_simulation import run_bonus_simulation
+    
+    start = datetime.combine(data.start, datetime.min.time(), tzinfo=timezone.utc)
+    end = datetime.combine(data.end, datetime.min.time(), tzinfo=timezone.utc)
+    overrides = data.model_dump(exclude={"start", "end", "include_daily"}, exclude_none=True)
+    
+    report = await run_bonus_simulation(start, end, overrides)
+    if not data.include_daily:
+        report.pop("by_game_day", None)
+    return report
+
+
 # ==================== 7. REFERRALS ====================
 
 @router.get("/referrals/dashboard", summary="Referral dashboard")
@@ -1441,6 +1537,23 @@ async def get_void_report(
     }
 
 
+@router.get("/reports/cashout-exposure", summary="Cashout exposure")
+async def get_cashout_exposure_report(
+    request: Request,
+    authorization: str = Header(...)
+):
+    """
+    What if everyone cashed out now: every user holding a balance is evaluated
+    against the withdrawal rules of their last deposit. Returns total payout,
+    void and blocked amounts, plus payout per game.
+    """
+    auth = await require_admin_access(request, authorization)
+
+    from ..services.cashout_service import get_cashout_exposure
+
+    return await get_cashout_exposure()
+
+
 # ==================== 10. SYSTEM ====================
 
 @router.get("/system", summary="System configuration")
@@ -1489,6 +1602,7 @@ async def update_system_config(
             f"UPDATE system_settings SET {', '.join(updates)}, updated_at = NOW() WHERE id = 'global'",
             *params
         )
+        await invalidate_rules_snapshot()
     
     await log_audit(auth.user_id, auth.username, "system.config_updated", "config", "global", data.model_dump())
     
@@ -8,10 +8,10 @@ from datetime import datetime, timezone
 from pydantic import BaseModel, Field
 import uuid
 import secrets
-import hashlib
 
 from ..core.database import fetch_one, fetch_all, execute
 from ..core.config import ErrorCodes
+from ..core.api_keys import hash_api_key, invalidate_api_key
 from .dependencies import require_auth
 
 router = APIRouter(prefix="/admin/system", tags=["Admin System"])
@@ -90,7 +90,14 @@ async def list_admin_webhooks(
     request: Request,
     authorization: str = Header(..., alias="Authorization")
 ):
-    """List all admin-configured webhooks"""
+    """
+    List all admin-configured webhooks.
+    
+    circuit_breakers lists the delivery breakers this worker process is
+    tracking for user webhooks (keyed by webhooks.webhook_id).
+    """
+    from ..services.webhook_service import webhook_circuit_breakers
+    
     await require_admin_access(request, authorization)
     
     webhooks = await fetch_all("""
@@ -100,7 +107,10 @@ async def list_admin_webhooks(
         ORDER BY created_at DESC
     """)
     
-    return {"webhooks": [dict(w) for w in webhooks]}
+    return {
+        "webhooks": [dict(w) for w in webhooks],
+        "circuit_breakers": webhook_circuit_breakers.snapshot()
+    }
 
 
 @router.post("/webhooks")
@@ -249,13 +259,15 @@ async def create_api_key(
     api_key = f"sk_{secrets.token_urlsafe(40)}"
     
     # Hash the key for storage
-    key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+    key_hash = hash_api_key(api_key)
     key_prefix = api_key[:12]  # Store prefix for identification
     
     await execute("""
         INSERT INTO api_keys (key_id, name, key_hash, key_prefix, scopes, created_by, created_at, is_active)
         VALUES ($1, $2, $3, $4, $5, $6, NOW(), TRUE)
     """, key_id, data.name, key_hash, key_prefix, data.scopes, auth.user_id)
+    # Drop any negative cache entry for this hash
+    await invalidate_api_key(key_hash)
     
     return {
         "key_id": key_id,
@@ -273,7 +285,12 @@ async def delete_api_key(
     """Revoke an API key"""
     await require_admin_access(request, authorization)
     
-    await execute("UPDATE api_keys SET is_active = FALSE WHERE key_id = $1", key_id)
+    key = await fetch_one(
+        "UPDATE api_keys SET is_active = FALSE WHERE key_id = $1 RETURNING key_hash",
+        key_id
+    )
+    if key:
+        await invalidate_api_key(key['key_hash'])
     
     return {"message": "API key revoked successfully"}
 
@@ -624,6 +641,14 @@ async def get_wallet_load_detail(
     
 
 
+@router.get("/password-hasher", summary="Password hashing pool status")
+async def get_password_hasher_status(request: Request, authorization: str = Header(...)):
+    """Get bcrypt pool size, work factor, in-flight calls and queue wait (this worker)"""
+    await require_admin_access(request, authorization)
+
+    from ..core.security import password_hasher
+    return password_hasher.get_status()
+
 
 @router.get("/settings", summary="Get system settings")
 async def get_system_settings(request: Request, authorization: str = Header(...)):
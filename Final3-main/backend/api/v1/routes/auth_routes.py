@@ -17,6 +17,7 @@ from ..services import (
 )
 from ..core.config import ErrorCodes, get_api_settings
 from ..core.security import create_jwt_token
+from ..core.auth import invalidate_auth_user
 from .dependencies import get_client_ip, check_rate_limiting, authenticate_request, AuthResult
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -264,6 +265,7 @@ async def update_profile(
             f"UPDATE users SET {', '.join(updates)} WHERE user_id = $1",
             *params
         )
+        await invalidate_auth_user(auth.user_id)
     
     return {"success": True, "message": "Profile updated successfully"}
 
@@ -276,8 +278,7 @@ async def change_password(
     auth: AuthResult = Depends(authenticate_request)
 ):
     """Change user password"""
-    from passlib.context import CryptContext
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    from ..core.security import hash_password_async, verify_password_async
     
     pool = await get_pool()
     
@@ -292,11 +293,11 @@ async def change_password(
             raise HTTPException(404, "User not found")
         
         # Verify current password
-        if not pwd_context.verify(current_password, user['password_hash']):
+        if not await verify_password_async(current_password, user['password_hash']):
             raise HTTPException(401, "Current password is incorrect")
         
         # Hash new password
-        new_hash = pwd_context.hash(new_password)
+        new_hash = await hash_password_async(new_password)
         
         # Update password
         await conn.execute(
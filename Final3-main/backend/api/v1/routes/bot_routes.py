@@ -112,19 +112,13 @@ async def verify_bot_token(x_bot_token: str) -> bool:
     if internal_secret and _constant_time_compare(x_bot_token, internal_secret):
         return True
     
-    # Check 3: API key from database (for registered bots)
+    # Check 3: API key from database (for registered bots), via the key-hash cache
     try:
-        key_hash = hashlib.sha256(x_bot_token.encode()).hexdigest()
-        key = await fetch_one(
-            "SELECT key_id FROM api_keys WHERE key_hash = $1 AND is_active = TRUE",
-            key_hash
-        )
+        from ..core.api_keys import api_key_cache, api_key_usage_writer, hash_api_key
+        key = await api_key_cache.lookup(hash_api_key(x_bot_token))
         if key:
-            # Update last used timestamp
-            await execute(
-                "UPDATE api_keys SET last_used_at = NOW() WHERE key_id = $1",
-                key['key_id']
-            )
+            # Update last used timestamp (written in batches)
+            api_key_usage_writer.record(key['key_id'])
             return True
     except Exception as e:
         logger.warning(f"Error checking API key: {e}")
@@ -421,99 +415,69 @@ async def validate_order_bot(
     data: BotOrderCreate,
     authorization: str = Header(..., alias="Authorization")
 ):
-    """Validate order for bot - returns bonus calculation"""
+    """
+    Validate order for bot - returns bonus calculation.
+    
+    Served by the shared rules engine: one query for the user context,
+    games / global settings / referral perks from the cached rules snapshot.
+    """
     await require_bot_auth(authorization)
     await check_rate_limiting(request)
     
-    # Get user
-    user = await fetch_one("SELECT * FROM users WHERE user_id = $1", data.user_id)
-    if not user:
+    from ..services.rules_service import get_rules_snapshot, load_client_context, validate_deposit_order
+    
+    # Get user (single query: user row, client rules, last deposit for this game)
+    context = await load_client_context(data.user_id, data.game_name)
+    if not context:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Get game
-    game = await fetch_one(
-        "SELECT * FROM games WHERE game_name = $1 AND is_active = TRUE",
-        data.game_name.lower()
-    )
-    if not game:
+    game = (await get_rules_snapshot()).game(data.game_name)
+    if not game or not game['is_active']:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    # Validate amount
-    min_amount = game.get('min_deposit_amount', 10.0)
-    max_amount = game.get('max_deposit_amount', 10000.0)
-    
-    if data.amount < min_amount:
-        return {
-            "success": False,
-            "valid": False,
-            "message": f"Amount below minimum (${min_amount})",
-            "min_amount": min_amount,
-            "max_amount": max_amount
-        }
+    valid, result = await validate_deposit_order(
+        data.user_id, data.game_name, data.amount, data.referral_code, context=context
+    )
     
-    if data.amount > max_amount:
+    if not valid:
         return {
             "success": False,
             "valid": False,
-            "message": f"Amount above maximum (${max_amount})",
-            "min_amount": min_amount,
-            "max_amount": max_amount
+            "message": result.get('message'),
+            "error_code": result.get('error_code'),
+            "min_amount": result.get('min_amount', game['min_deposit_amount']),
+            "max_amount": result.get('max_amount', game['max_deposit_amount'])
         }
     
-    # Calculate bonus
-    bonus_rules = json.loads(game['bonus_rules']) if isinstance(game.get('bonus_rules'), str) else game.get('bonus_rules', {})
-    
-    # Determine which rule to apply
-    is_first_deposit = user.get('deposit_count', 0) == 0
-    rule = bonus_rules.get('first_deposit' if is_first_deposit else 'default', {})
-    
-    percent_bonus = data.amount * (rule.get('percent_bonus', 0) / 100)
-    flat_bonus = rule.get('flat_bonus', 0)
-    total_bonus = percent_bonus + flat_bonus
-    
-    # Apply max cap
-    max_bonus = rule.get('max_bonus')
-    if max_bonus and total_bonus > max_bonus:
-        total_bonus = max_bonus
-    
-    # Check referral bonus
-    referral_bonus = 0
-    if data.referral_code:
-        perk = await fetch_one(
-            "SELECT * FROM referral_perks WHERE referral_code = $1 AND is_active = TRUE AND (game_name IS NULL OR game_name = $2)",
-            data.referral_code.upper(), data.game_name.lower()
-        )
-        if perk:
-            ref_percent = data.amount * (perk.get('percent_bonus', 0) / 100)
-            ref_flat = perk.get('flat_bonus', 0)
-            referral_bonus = ref_percent + ref_flat
-            if perk.get('max_bonus') and referral_bonus > perk['max_bonus']:
-                referral_bonus = perk['max_bonus']
-    
-    total_bonus += referral_bonus
+    bonus = result['bonus_calculation']
+    breakdown = bonus['breakdown']
+    is_first_deposit = bonus['is_first_ever_deposit']
     
     return {
         "success": True,
         "valid": True,
         "user": {
-            "user_id": user['user_id'],
-            "username": user['username'],
-            "display_name": user['display_name'],
+            "user_id": context['user_id'],
+            "username": context['username'],
+            "display_name": context['display_name'],
             "is_first_deposit": is_first_deposit
         },
         "game": {
-            "game_name": game['game_name'],
-            "display_name": game['display_name']
+            "game_name": result['game_name'],
+            "display_name": result['game_display_name']
         },
         "amount": data.amount,
         "bonus_calculation": {
-            "percent_bonus": percent_bonus,
-            "flat_bonus": flat_bonus,
-            "referral_bonus": referral_bonus,
-            "total_bonus": total_bonus,
+            "signup_bonus": breakdown['signup_bonus'],
+            "deposit_bonus": breakdown['deposit_bonus'],
+            "client_bonus": breakdown['client_bonus'],
+            "referral_bonus": breakdown['referral_bonus'],
+            "total_bonus": bonus['total_bonus'],
+            "rules_applied": bonus['rules_applied'],
             "rule_applied": "first_deposit" if is_first_deposit else "default"
         },
-        "total_amount": data.amount + total_bonus
+        "total_amount": result['total_amount']
     }
 
 
@@ -551,10 +515,7 @@ async def create_order_bot(
     if not validation.get('valid'):
         return validation
     
-    # Get user
-    user = await fetch_one("SELECT * FROM users WHERE user_id = $1", data.user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = validation['user']
     
     # Build metadata with conversation info
     metadata = data.external_metadata or {}
@@ -798,6 +759,9 @@ async def register_order_webhook(
         VALUES ($1, 'system-bot', $2, $3, $4)
     ''', webhook_id, webhook_url, webhook_secret, ['order.status_changed', 'order.approved', 'order.rejected'])
     
+    from ..services.webhook_service import invalidate_webhook_subscriptions
+    await invalidate_webhook_subscriptions()
+    
     return {
         "success": True,
         "webhook_id": webhook_id,
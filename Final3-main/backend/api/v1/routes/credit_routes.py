@@ -8,6 +8,7 @@ import uuid
 from datetime import datetime, timezone
 import logging
 from ..core.database import get_pool
+from ..core.money_ops import lock_users
 from .dependencies import authenticate_request, AuthResult
 
 router = APIRouter(prefix="/portal/credits", tags=["credits"])
@@ -107,20 +108,26 @@ async def claim_welcome_credit(auth: AuthResult = Depends(authenticate_request))
         
         try:
             async with conn.transaction():
-                # Mark credit as claimed
-                await conn.execute("""
+                await lock_users(conn, [user['user_id']])
+
+                # Mark credit as claimed (guarded - a concurrent claim gets nothing)
+                claimed = await conn.fetchval("""
                     UPDATE user_credits
                     SET claimed = TRUE, claimed_at = NOW()
-                    WHERE credit_id = $1
+                    WHERE credit_id = $1 AND claimed = FALSE
+                    RETURNING credit_id
                 """, credit['credit_id'])
+                if not claimed:
+                    raise HTTPException(status_code=400, detail="No welcome credit available")
                 
                 # Add to wallet
-                new_balance = float(user['real_balance']) + float(credit['amount'])
-                await conn.execute("""
+                new_balance = float(await conn.fetchval("""
                     UPDATE users
-                    SET real_balance = $1, updated_at = NOW()
+                    SET real_balance = real_balance + $1, updated_at = NOW()
                     WHERE user_id = $2
-                """, new_balance, user['user_id'])
+                    RETURNING real_balance
+                """, credit['amount'], user['user_id']))
+                balance_before = new_balance - float(credit['amount'])
                 
                 # Create ledger entry
                 await conn.execute("""
@@ -130,7 +137,7 @@ async def claim_welcome_credit(auth: AuthResult = Depends(authenticate_request))
                         reference_id, description, created_at
                     ) VALUES ($1, $2, 'credit', $3, $4, $5, 'welcome_credit', $6, $7, NOW())
                 """, str(uuid.uuid4()), user['user_id'], credit['amount'],
-                     user['real_balance'], new_balance, credit['credit_id'],
+                     balance_before, new_balance, credit['credit_id'],
                      'Welcome bonus claimed')
             
             return {
@@ -139,6 +146,8 @@ async def claim_welcome_credit(auth: AuthResult = Depends(authenticate_request))
                 "new_balance": new_balance
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Credit claim failed: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to claim credit")
@@ -10,6 +10,15 @@ from datetime import datetime, timezone
 import json
 import logging
 from ..core.database import get_pool
+from ..core.money_ops import money_executor
+from ..services.game_transfer_service import (
+    has_pending_transfer,
+    reserve_game_load,
+    reserve_game_redeem,
+    claim_game_transfer,
+    settle_game_load,
+    fail_game_transfer,
+)
 
 router = APIRouter(prefix="/game-accounts", tags=["game_accounts"])
 logger = logging.getLogger(__name__)
@@ -156,12 +165,20 @@ async def load_game_account(request: LoadGameRequest):
     pool = await get_pool()
     
     async with pool.acquire() as conn:
-        user = await conn.fetchrow("""
-            SELECT user_id, username, real_balance FROM users WHERE username = 'testclient'
+        user_id = await conn.fetchval("""
+            SELECT user_id FROM users WHERE username = 'testclient'
         """)
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+    
+    if not user_id:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # ==================== RESERVE ====================
+    # Checks, wallet debit and a pending game_loads row in one short
+    # transaction under the user's money lock
+    async with money_executor.user_transaction(user_id) as conn:
+        user = await conn.fetchrow("""
+            SELECT user_id, username, real_balance FROM users WHERE user_id = $1
+        """, user_id)
         
         # Check balance
         if float(user['real_balance']) < request.amount:
@@ -195,6 +212,9 @@ async def load_game_account(request: LoadGameRequest):
         if not game_account:
             raise HTTPException(status_code=404, detail="Game account not found. Create account first.")
         
+        if await has_pending_transfer(conn, game_account['account_id']):
+            raise HTTPException(status_code=409, detail="Another transfer for this game account is in progress")
+        
         # RULE 1: Cannot load if GAME balance exceeds configured limit
         current_game_balance = float(game_account['balance'] or 0)
         if current_game_balance > game_balance_threshold:
@@ -209,76 +229,51 @@ async def load_game_account(request: LoadGameRequest):
             )
         
         load_id = str(uuid.uuid4())
-        new_wallet_balance = float(user['real_balance']) - request.amount
         new_game_balance = current_game_balance + request.amount
         
-        try:
-            # Call Games API to load
-            from ..services.games_api_service import GamesAPIClient
-            
-            async with GamesAPIClient() as games_api:
-                recharge_response = await games_api.recharge(
-                    game_id=game['game_id'],
-                    user_id=game_account['game_account_id'],
-                    amount=request.amount,
-                    remark=f"Load - {load_id[:8]}"
-                )
-            
-            logger.info(f"Game recharged: {recharge_response}")
-            
-            # Update database
-            async with conn.transaction():
-                # Deduct from wallet
-                await conn.execute("""
-                    UPDATE users SET real_balance = $1, updated_at = NOW()
-                    WHERE user_id = $2
-                """, new_wallet_balance, user['user_id'])
-                
-                # Update game account balance and track total loaded
-                await conn.execute("""
-                    UPDATE game_accounts 
-                    SET balance = balance + $1,
-                        updated_at = NOW()
-                    WHERE account_id = $2
-                """, request.amount, game_account['account_id'])
-                
-                # Record load with wagering tracking
-                await conn.execute("""
-                    INSERT INTO game_loads (
-                        load_id, user_id, game_id, game_name, amount,
-                        wallet_balance_before, wallet_balance_after,
-                        game_balance_before, game_balance_after,
-                        status, game_credentials, created_at
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, NOW())
-                """, load_id, user['user_id'], game['game_id'], game['game_name'],
-                     request.amount, user['real_balance'], new_wallet_balance,
-                     current_game_balance, new_game_balance,
-                     'completed', json.dumps(recharge_response))
-                
-                # Wallet ledger
-                await conn.execute("""
-                    INSERT INTO wallet_ledger (
-                        ledger_id, user_id, transaction_type, amount,
-                        balance_before, balance_after, reference_type,
-                        reference_id, description, created_at
-                    ) VALUES ($1, $2, 'debit', $3, $4, $5, 'game_load', $6, $7, NOW())
-                """, str(uuid.uuid4()), user['user_id'], request.amount,
-                     user['real_balance'], new_wallet_balance, load_id,
-                     f"Loaded {game['display_name']}")
-            
-            return {
-                "success": True,
-                "message": "Game loaded successfully",
-                "load_id": load_id,
-                "amount": request.amount,
-                "new_wallet_balance": new_wallet_balance,
-                "new_game_balance": new_game_balance,
-                "game": game['display_name']
-            }
-            
-        except Exception as e:
-            logger.error(f"Game load failed: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Failed to load game: {str(e)}")
+        new_wallet_balance = await reserve_game_load(
+            conn, load_id, user['user_id'], game, request.amount,
+            description=f"Loaded {game['display_name']}",
+            account_id=game_account['account_id'],
+            game_balance_before=current_game_balance
+        )
+        if new_wallet_balance is None:
+            raise HTTPException(status_code=400, detail="Insufficient wallet balance")
+    
+    # ==================== GAMES API (no connection held) ====================
+    try:
+        from ..services.games_api_service import GamesAPIClient
+        
+        async with GamesAPIClient() as games_api:
+            recharge_response = await games_api.recharge(
+                game_id=game['game_id'],
+                user_id=game_account['game_account_id'],
+                amount=request.amount,
+                remark=f"Load - {load_id[:8]}"
+            )
+        
+        logger.info(f"Game recharged: {recharge_response}")
+    except Exception as e:
+        logger.error(f"Game load failed: {str(e)}")
+        await fail_game_transfer(load_id, user_id, str(e))
+        raise HTTPException(status_code=500, detail=f"Failed to load game: {str(e)}")
+    
+    # ==================== SETTLE ====================
+    if not await settle_game_load(load_id, user_id, recharge_response, new_game_balance):
+        raise HTTPException(
+            status_code=409,
+            detail="Game load reservation expired before settlement - flagged for reconciliation"
+        )
+    
+    return {
+        "success": True,
+        "message": "Game loaded successfully",
+        "load_id": load_id,
+        "amount": request.amount,
+        "new_wallet_balance": new_wallet_balance,
+        "new_game_balance": new_game_balance,
+        "game": game['display_name']
+    }
 
 
 @router.post("/redeem")
@@ -298,12 +293,19 @@ async def redeem_from_game(
     pool = await get_pool()
     
     async with pool.acquire() as conn:
-        user = await conn.fetchrow("""
-            SELECT user_id, username, real_balance FROM users WHERE username = 'testclient'
+        user_id = await conn.fetchval("""
+            SELECT user_id FROM users WHERE username = 'testclient'
         """)
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+    
+    if not user_id:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # ==================== RESERVE ====================
+    # Wagering checks and a pending game_loads row under the user's money lock
+    async with money_executor.user_transaction(user_id) as conn:
+        user = await conn.fetchrow("""
+            SELECT user_id, username, real_balance FROM users WHERE user_id = $1
+        """, user_id)
         
         # Get game
         game = await conn.fetchrow("""
@@ -333,6 +335,9 @@ async def redeem_from_game(
         if not game_account:
             raise HTTPException(status_code=404, detail="Game account not found")
         
+        if await has_pending_transfer(conn, game_account['account_id']):
+            raise HTTPException(status_code=409, detail="Another transfer for this game account is in progress")
+        
         current_game_balance = float(game_account['balance'] or 0)
         
         # Calculate total loaded amount from game_loads since last withdrawal
@@ -340,6 +345,7 @@ async def redeem_from_game(
             SELECT COALESCE(SUM(amount), 0) as total_loaded
             FROM game_loads
             WHERE user_id = $1 AND game_id = $2 AND status = 'completed'
+            AND transfer_type = 'load'
             AND created_at > (
                 SELECT COALESCE(MAX(created_at), '1970-01-01'::timestamptz)
                 FROM orders
@@ -386,119 +392,142 @@ async def redeem_from_game(
             raise HTTPException(status_code=400, detail="No redeemable balance after voiding excess")
         
         order_id = str(uuid.uuid4())
+        redeem_id = str(uuid.uuid4())
         # New game balance after payout + void
         new_game_balance = 0  # Full redemption clears game balance
-        
-        try:
-            # Redeem FULL balance from game API (payout + voided)
-            total_to_redeem = actual_redeem + voided_amount
-            from ..services.games_api_service import GamesAPIClient
-            
-            async with GamesAPIClient() as games_api:
-                redeem_response = await games_api.redeem(
-                    game_id=game['game_id'],
-                    user_id=game_account['game_account_id'],
-                    amount=total_to_redeem,  # Redeem full balance
-                    remark=f"Redeem - {order_id[:8]}" + (f" (void ${voided_amount:.2f})" if voided_amount > 0 else "")
-                )
-            
-            logger.info(f"Game redeemed: {redeem_response}")
-            
-            # Add ONLY payout amount to wallet (voided amount is lost)
-            new_wallet_balance = float(user['real_balance']) + actual_redeem
-            
-            async with conn.transaction():
-                # Update wallet balance (only payout, not voided)
-                await conn.execute("""
-                    UPDATE users SET real_balance = $1, updated_at = NOW()
-                    WHERE user_id = $2
-                """, new_wallet_balance, user['user_id'])
-                
-                # Update game account balance to 0 (full redemption)
-                await conn.execute("""
-                    UPDATE game_accounts 
-                    SET balance = 0, updated_at = NOW()
-                    WHERE account_id = $1
-                """, game_account['account_id'])
-                
-                # Create withdrawal order with void recording
-                await conn.execute("""
-                    INSERT INTO orders (
-                        order_id, user_id, username, game_name, game_display_name,
-                        order_type, amount, total_amount, status, metadata, created_at
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NOW())
-                """, order_id, user['user_id'], user['username'],
-                     game['game_name'], game['display_name'],
-                     'withdrawal_game', actual_redeem, actual_redeem,
-                     'pending_approval', json.dumps({
-                         'withdrawal_method': request.withdrawal_method,
-                         'account_number': request.account_number,
-                         'account_name': request.account_name,
-                         'balance_deducted': False,
-                         'game_redeem_response': redeem_response,
-                         'wagering_met': True,
-                         'total_loaded': total_loaded,
-                         'min_multiplier': min_multiplier,
-                         'max_multiplier': max_multiplier,
-                         'min_cashout': min_cashout,
-                         'max_cashout': max_balance,
-                         'original_game_balance': current_game_balance,
-                         'payout_amount': actual_redeem,
-                         'voided_amount': voided_amount,
-                         'void_reason': 'EXCEEDS_MAX_MULTIPLIER' if voided_amount > 0 else None
-                     }))
-                
-                # Wallet ledger - record payout
-                await conn.execute("""
-                    INSERT INTO wallet_ledger (
-                        ledger_id, user_id, transaction_type, amount,
-                        balance_before, balance_after, reference_type,
-                        reference_id, description, created_at
-                    ) VALUES ($1, $2, 'credit', $3, $4, $5, 'game_redeem', $6, $7, NOW())
-                """, str(uuid.uuid4()), user['user_id'], actual_redeem,
-                     user['real_balance'], new_wallet_balance, order_id,
-                     f"Redeemed from {game['display_name']}" + (f" (voided: ${voided_amount:.2f})" if voided_amount > 0 else ""))
-                
-                # If void occurred, record it in audit
-                if voided_amount > 0:
-                    await conn.execute("""
-                        INSERT INTO audit_logs (
-                            log_id, user_id, username, action, resource_type, resource_id, details, created_at
-                        ) VALUES ($1, $2, $3, 'withdrawal.void', 'order', $4, $5, NOW())
-                    """, str(uuid.uuid4()), user['user_id'], user['username'], order_id,
-                         json.dumps({
-                             'voided_amount': voided_amount,
-                             'reason': 'EXCEEDS_MAX_MULTIPLIER',
-                             'max_multiplier': max_multiplier,
-                             'total_loaded': total_loaded,
-                             'original_balance': current_game_balance,
-                             'payout_amount': actual_redeem
-                         }))
-            
-            # Send to Telegram
-            background_tasks.add_task(send_redeem_telegram, order_id)
-            
-            return {
-                "success": True,
-                "message": "Redeemed successfully. Awaiting bank transfer approval." + (f" ${voided_amount:.2f} voided due to {max_multiplier}x limit." if voided_amount > 0 else ""),
-                "order_id": order_id,
-                "payout_amount": actual_redeem,
-                "voided_amount": voided_amount,
-                "wallet_balance": new_wallet_balance,
-                "remaining_game_balance": new_game_balance,
-                "wagering_info": {
-                    "total_loaded": total_loaded,
-                    "min_multiplier": min_multiplier,
-                    "max_multiplier": max_multiplier,
-                    "minimum_cashout": min_cashout,
-                    "maximum_cashout": max_balance,
-                    "wagering_met": True
-                }
+        # Redeem FULL balance from game API (payout + voided)
+        total_to_redeem = actual_redeem + voided_amount
+        
+        await reserve_game_redeem(
+            conn, redeem_id, user['user_id'], game, game_account['account_id'],
+            total_to_redeem, current_game_balance, float(user['real_balance']),
+            details={
+                'order_id': order_id,
+                'payout_amount': actual_redeem,
+                'voided_amount': voided_amount
             }
-            
-        except Exception as e:
-            logger.error(f"Redeem failed: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Failed to redeem: {str(e)}")
+        )
+    
+    # ==================== GAMES API (no connection held) ====================
+    try:
+        from ..services.games_api_service import GamesAPIClient
+        
+        async with GamesAPIClient() as games_api:
+            redeem_response = await games_api.redeem(
+                game_id=game['game_id'],
+                user_id=game_account['game_account_id'],
+                amount=total_to_redeem,  # Redeem full balance
+                remark=f"Redeem - {order_id[:8]}" + (f" (void ${voided_amount:.2f})" if voided_amount > 0 else "")
+            )
+        
+        logger.info(f"Game redeemed: {redeem_response}")
+    except Exception as e:
+        logger.error(f"Redeem failed: {str(e)}")
+        await fail_game_transfer(redeem_id, user_id, str(e))
+        raise HTTPException(status_code=500, detail=f"Failed to redeem: {str(e)}")
+    
+    # ==================== SETTLE ====================
+    async with money_executor.user_transaction(user_id) as conn:
+        # Add ONLY payout amount to wallet (voided amount is lost)
+        new_wallet_balance = float(await conn.fetchval("""
+            UPDATE users SET real_balance = real_balance + $1, updated_at = NOW()
+            WHERE user_id = $2
+            RETURNING real_balance
+        """, actual_redeem, user['user_id']))
+        wallet_balance_before = new_wallet_balance - actual_redeem
+        
+        if not await claim_game_transfer(
+            conn, redeem_id, redeem_response,
+            game_balance_after=new_game_balance, wallet_balance_after=new_wallet_balance
+        ):
+            # Rolls back the wallet credit
+            raise HTTPException(
+                status_code=409,
+                detail="Game redeem reservation expired before settlement - flagged for reconciliation"
+            )
+        
+        # Update game account balance to 0 (full redemption)
+        await conn.execute("""
+            UPDATE game_accounts 
+            SET balance = 0, updated_at = NOW()
+            WHERE account_id = $1
+        """, game_account['account_id'])
+        
+        # Create withdrawal order with void recording
+        await conn.execute("""
+            INSERT INTO orders (
+                order_id, user_id, username, game_name, game_display_name,
+                order_type, amount, total_amount, status, metadata, created_at
+            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NOW())
+        """, order_id, user['user_id'], user['username'],
+             game['game_name'], game['display_name'],
+             'withdrawal_game', actual_redeem, actual_redeem,
+             'pending_approval', json.dumps({
+                 'withdrawal_method': request.withdrawal_method,
+                 'account_number': request.account_number,
+                 'account_name': request.account_name,
+                 'balance_deducted': False,
+                 'game_redeem_response': redeem_response,
+                 'game_redeem_id': redeem_id,
+                 'wagering_met': True,
+                 'total_loaded': total_loaded,
+                 'min_multiplier': min_multiplier,
+                 'max_multiplier': max_multiplier,
+                 'min_cashout': min_cashout,
+                 'max_cashout': max_balance,
+                 'original_game_balance': current_game_balance,
+                 'payout_amount': actual_redeem,
+                 'voided_amount': voided_amount,
+                 'void_reason': 'EXCEEDS_MAX_MULTIPLIER' if voided_amount > 0 else None
+             }))
+        
+        # Wallet ledger - record payout
+        await conn.execute("""
+            INSERT INTO wallet_ledger (
+                ledger_id, user_id, transaction_type, amount,
+                balance_before, balance_after, reference_type,
+                reference_id, description, created_at
+            ) VALUES ($1, $2, 'credit', $3, $4, $5, 'game_redeem', $6, $7, NOW())
+        """, str(uuid.uuid4()), user['user_id'], actual_redeem,
+             wallet_balance_before, new_wallet_balance, order_id,
+             f"Redeemed from {game['display_name']}" + (f" (voided: ${voided_amount:.2f})" if voided_amount > 0 else ""))
+        
+        # If void occurred, record it in audit
+        if voided_amount > 0:
+            await conn.execute("""
+                INSERT INTO audit_logs (
+                    log_id, user_id, username, action, resource_type, resource_id, details, created_at
+                ) VALUES ($1, $2, $3, 'withdrawal.void', 'order', $4, $5, NOW())
+            """, str(uuid.uuid4()), user['user_id'], user['username'], order_id,
+                 json.dumps({
+                     'voided_amount': voided_amount,
+                     'reason': 'EXCEEDS_MAX_MULTIPLIER',
+                     'max_multiplier': max_multiplier,
+                     'total_loaded': total_loaded,
+                     'original_balance': current_game_balance,
+                     'payout_amount': actual_redeem
+                 }))
+    
+    # Send to Telegram
+    background_tasks.add_task(send_redeem_telegram, order_id)
+    
+    return {
+        "success": True,
+        "message": "Redeemed successfully. Awaiting bank transfer approval." + (f" ${voided_amount:.2f} voided due to {max_multiplier}x limit." if voided_amount > 0 else ""),
+        "order_id": order_id,
+        "payout_amount": actual_redeem,
+        "voided_amount": voided_amount,
+        "wallet_balance": new_wallet_balance,
+        "remaining_game_balance": new_game_balance,
+        "wagering_info": {
+            "total_loaded": total_loaded,
+            "min_multiplier": min_multiplier,
+            "max_multiplier": max_multiplier,
+            "minimum_cashout": min_cashout,
+            "maximum_cashout": max_balance,
+            "wagering_met": True
+        }
+    }
 
 
 @router.get("/my-accounts")
@@ -10,8 +10,10 @@ import uuid
 import json
 import logging
 
-from ..core.database import fetch_one, fetch_all, execute, get_pool
+from ..core.database import fetch_one, fetch_all, execute
 from ..core.config import get_api_settings
+from ..core.money_ops import money_executor
+from ..services.game_transfer_service import reserve_game_load, settle_game_load, fail_game_transfer
 from .dependencies import check_rate_limiting
 
 logger = logging.getLogger(__name__)
@@ -50,12 +52,10 @@ async def get_game_user(request: Request, portal_token: Optional[str], client_to
         if payload:
             user_id = payload.get('sub') or payload.get('user_id')
     elif portal_token:
-        session = await fetch_one("""
-            SELECT user_id FROM portal_sessions 
-            WHERE session_token = $1 AND expires_at > NOW()
-        """, portal_token)
-        if session:
-            user_id = session['user_id']
+        from ..core.auth import resolve_user_from_portal_token
+        session_user = await resolve_user_from_portal_token(portal_token)
+        if session_user:
+            user_id = session_user.user_id
     
     if not user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
@@ -67,6 +67,55 @@ async def get_game_user(request: Request, portal_token: Optional[str], client_to
     return user
 
 
+# ==================== IDEMPOTENCY HELPER ====================
+
+# Latest attempt for a key - failed/expired attempts may be followed by a retry
+GAME_LOAD_BY_IDEMPOTENCY_KEY_SQL = """
+    SELECT load_id, status, amount, wallet_balance_after, created_at
+    FROM game_loads WHERE idempotency_key = $1
+    ORDER BY created_at DESC LIMIT 1
+"""
+
+
+def _game_load_duplicate_response(existing, idempotency_key: str) -> Optional[dict]:
+    """
+    Response for a repeated Idempotency-Key, or None to go ahead with a new attempt.
+
+    - completed: duplicate, return the original result
+    - pending: the first request is still in flight -> 409
+    - failed / expired: the debit was refunded, a new attempt is allowed
+    """
+    if not existing:
+        return None
+
+    if existing['status'] == 'completed':
+        logger.info(f"Duplicate game load detected (idempotency_key={idempotency_key})")
+        return {
+            "success": True,
+            "load_id": existing['load_id'],
+            "message": "Game load already processed (duplicate detected)",
+            "duplicate": True,
+            "wallet_balance_remaining": float(existing['wallet_balance_after']),
+            "status": existing['status']
+        }
+
+    if existing['status'] == 'pending':
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "A game load with this Idempotency-Key is still in progress",
+                "error_code": "GAME_LOAD_IN_PROGRESS",
+                "load_id": existing['load_id']
+            }
+        )
+
+    logger.info(
+        f"Retrying game load after {existing['status']} attempt {existing['load_id']} "
+        f"(idempotency_key={idempotency_key})"
+    )
+    return None
+
+
 # ==================== ENDPOINTS ====================
 
 @router.get("/available")
@@ -130,8 +179,10 @@ async def load_game_from_wallet(
     - No order created
     - No approval_service call
     - Ledger source_type = "internal_transfer"
-    - Idempotency key support to prevent duplicate loads
-    - Games API called FIRST - wallet only debited on success
+    - Idempotency key support to prevent duplicate loads (a failed or
+      expired attempt may be retried with the same key)
+    - Wallet debited FIRST (pending reservation), then the Games API is
+      called; on failure the reservation is released and the debit refunded
     """
     await check_rate_limiting(request)
     
@@ -155,22 +206,12 @@ async def load_game_from_wallet(
         )
     
     # ==================== IDEMPOTENCY CHECK ====================
+    # Fast path; re-checked under the money lock before anything is reserved
     if idempotency_key:
-        existing = await fetch_one("""
-            SELECT load_id, status, amount, wallet_balance_after, created_at
-            FROM game_loads WHERE idempotency_key = $1
-        """, idempotency_key)
-        
-        if existing:
-            logger.info(f"Duplicate game load detected (idempotency_key={idempotency_key})")
-            return {
-                "success": True,
-                "load_id": existing['load_id'],
-                "message": "Game load already processed (duplicate detected)",
-                "duplicate": True,
-                "wallet_balance_remaining": float(existing['wallet_balance_after']),
-                "status": existing['status']
-            }
+        existing = await fetch_one(GAME_LOAD_BY_IDEMPOTENCY_KEY_SQL, idempotency_key)
+        duplicate = _game_load_duplicate_response(existing, idempotency_key)
+        if duplicate:
+            return duplicate
     
     # ==================== AUTO-LOAD TOGGLE CHECK ====================
     auto_game_load = user.get('auto_game_load', False)
@@ -235,128 +276,121 @@ async def load_game_from_wallet(
     load_id = str(uuid.uuid4())
     client_ip = request.client.host if request.client else None
     
-    # ==================== ATOMIC GAME LOAD ====================
-    # SAFE PATTERN: Call API first, only commit wallet debit on success
-    # This prevents deducting wallet if Games API fails
-    
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        async with conn.transaction():
-            # Lock user row to prevent race conditions
-            user_locked = await conn.fetchrow("""
-                SELECT user_id, real_balance FROM users 
-                WHERE user_id = $1 FOR UPDATE
-            """, user['user_id'])
-            
-            # Re-verify balance with lock (could have changed)
-            current_balance = float(user_locked['real_balance'])
-            if current_balance < data.amount:
-                raise HTTPException(
-                    status_code=400,
-                    detail={
-                        "message": "Insufficient balance (race condition detected)",
-                        "error_code": "INSUFFICIENT_BALANCE",
-                        "wallet_balance": current_balance,
-                        "requested_amount": data.amount
-                    }
-                )
-            
-            new_balance = current_balance - data.amount
-            
-            # ==================== CALL GAMES API FIRST ====================
-            try:
-                from ..services.games_api_service import GamesAPIClient
-                
-                async with GamesAPIClient() as games_api:
-                    game_response = await games_api.recharge(
-                        game_id=game['game_id'],
-                        user_id=user['user_id'],
-                        amount=data.amount,
-                        remark=f"Load from wallet - {load_id[:8]}"
-                    )
-                    
-                game_credentials = {
-                    "api_response": game_response,
-                    "game_account_id": game_response.get('account_id', user['user_id']),
-                    "loaded_at": datetime.now(timezone.utc).isoformat()
+    # ==================== GAME LOAD SAGA ====================
+    # Reserve (debit wallet + pending game_loads row) -> Games API -> settle.
+    # No pooled connection is held during the Games API call; if it fails the
+    # reservation is released and the wallet refunded.
+    
+    async with money_executor.user_transaction(user['user_id']) as conn:
+        if idempotency_key:
+            existing = await conn.fetchrow(GAME_LOAD_BY_IDEMPOTENCY_KEY_SQL, idempotency_key)
+            duplicate = _game_load_duplicate_response(existing, idempotency_key)
+            if duplicate:
+                return duplicate
+        
+        new_balance = await reserve_game_load(
+            conn, load_id, user['user_id'], game, data.amount,
+            description=f"Internal game load: {game['display_name']} (instant)",
+            idempotency_key=idempotency_key,
+            ip_address=client_ip
+        )
+        if new_balance is None:
+            current_balance = float(await conn.fetchval(
+                "SELECT real_balance FROM users WHERE user_id = $1", user['user_id']
+            ) or 0)
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "message": "Insufficient balance (race condition detected)",
+                    "error_code": "INSUFFICIENT_BALANCE",
+                    "wallet_balance": current_balance,
+                    "requested_amount": data.amount
                 }
-                api_success = True
-                
-            except Exception as e:
-                logger.error(f"Games API error: {str(e)}")
-                # DO NOT proceed with wallet debit - rollback transaction
-                raise HTTPException(
-                    status_code=503,
-                    detail={
-                        "message": "Game API unavailable. Your wallet was NOT charged.",
-                        "error_code": "GAMES_API_ERROR",
-                        "error": str(e),
-                        "retry": True
-                    }
-                )
-            
-            # API succeeded - now commit the wallet debit
-            await conn.execute("""
-                UPDATE users SET real_balance = $1, updated_at = NOW()
-                WHERE user_id = $2
-            """, new_balance, user['user_id'])
-            
-            # Record game load with idempotency key
-            await conn.execute("""
-                INSERT INTO game_loads 
-                (load_id, user_id, game_id, game_name, amount, wallet_balance_before, 
-                 wallet_balance_after, status, game_credentials, ip_address, idempotency_key, created_at)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, 'completed', $8, $9, $10, NOW())
-            """, load_id, user['user_id'], game['game_id'], game['game_name'],
-               data.amount, current_balance, new_balance, json.dumps(game_credentials), client_ip, idempotency_key)
-            
-            # Log to immutable wallet ledger (INTERNAL TRANSFER - NO APPROVAL)
-            await conn.execute("""
-                INSERT INTO wallet_ledger 
-                (ledger_id, user_id, transaction_type, amount, balance_before, balance_after,
-                 reference_type, reference_id, description, created_at)
-                VALUES ($1, $2, 'debit', $3, $4, $5, 'game_load', $6, $7, NOW())
-            """, str(uuid.uuid4()), user['user_id'], data.amount,
-               current_balance, new_balance, load_id,
-               f"Internal game load: {game['display_name']} (instant)")
+            )
+    
+    # ==================== CALL GAMES API ====================
+    try:
+        from ..services.games_api_service import GamesAPIClient
+        
+        async with GamesAPIClient() as games_api:
+            game_response = await games_api.recharge(
+                game_id=game['game_id'],
+                user_id=user['user_id'],
+                amount=data.amount,
+                remark=f"Load from wallet - {load_id[:8]}"
+            )
             
-            # Audit log
-            await conn.execute("""
-                INSERT INTO audit_logs 
-                (log_id, user_id, username, action, resource_type, resource_id, details, ip_address, created_at)
-                VALUES ($1, $2, $3, 'game.loaded_internal', 'game_load', $4, $5, $6, NOW())
-            """, str(uuid.uuid4()), user['user_id'], user['username'], load_id,
-               json.dumps({
-                   "game": game['game_name'],
-                   "amount": data.amount,
-                   "balance_before": wallet_balance,
-                   "balance_after": new_balance,
-                   "source_type": "internal_transfer",
-                   "auto_game_load": auto_game_load,
-                   "confirmed": data.confirmed
-               }), client_ip)
-    
-    # Emit game load notification
+        game_credentials = {
+            "api_response": game_response,
+            "game_account_id": game_response.get('account_id', user['user_id']),
+            "loaded_at": datetime.now(timezone.utc).isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Games API error: {str(e)}")
+        # Release the reservation - the wallet debit is refunded
+        await fail_game_transfer(load_id, user['user_id'], str(e))
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "message": "Game API unavailable. The wallet debit has been refunded.",
+                "error_code": "GAMES_API_ERROR",
+                "error": str(e),
+                "retry": True
+            }
+        )
+    
+    # ==================== SETTLE ====================
     from ..core.notification_router import emit_event, EventType
-    await emit_event(
-        event_type=EventType.GAME_LOAD_SUCCESS,
-        title="Game Load Successful (Internal)",
-        message=f"Client {user['display_name']} loaded ₱{data.amount:,.2f} to {game['display_name']}.\n\nRemaining wallet balance: ₱{new_balance:,.2f}\n\nSource: Internal wallet transfer (instant)",
-        reference_id=load_id,
-        reference_type="game_load",
-        user_id=user['user_id'],
-        username=user.get('username'),
-        display_name=user.get('display_name'),
-        amount=data.amount,
-        extra_data={
-            "game_name": game['game_name'],
-            "game_display_name": game['display_name'],
-            "wallet_balance_remaining": new_balance,
-            "source_type": "internal_transfer",
-            "requires_approval": False
-        },
-        requires_action=False
-    )
+
+    async def _queue_load_notification(conn):
+        # Outbox row commits with the settlement, never for a released load
+        await emit_event(
+            event_type=EventType.GAME_LOAD_SUCCESS,
+            title="Game Load Successful (Internal)",
+            message=f"Client {user['display_name']} loaded ₱{data.amount:,.2f} to {game['display_name']}.\n\nRemaining wallet balance: ₱{new_balance:,.2f}\n\nSource: Internal wallet transfer (instant)",
+            reference_id=load_id,
+            reference_type="game_load",
+            user_id=user['user_id'],
+            username=user.get('username'),
+            display_name=user.get('display_name'),
+            amount=data.amount,
+            extra_data={
+                "game_name": game['game_name'],
+                "game_display_name": game['display_name'],
+                "wallet_balance_remaining": new_balance,
+                "source_type": "internal_transfer",
+                "requires_approval": False
+            },
+            requires_action=False,
+            conn=conn
+        )
+
+    if not await settle_game_load(load_id, user['user_id'], game_credentials,
+                                  on_settled=_queue_load_notification):
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "Game load reservation expired before settlement. Support has been notified.",
+                "error_code": "GAME_LOAD_EXPIRED"
+            }
+        )
+    
+    # Audit log
+    await execute("""
+        INSERT INTO audit_logs 
+        (log_id, user_id, username, action, resource_type, resource_id, details, ip_address, created_at)
+        VALUES ($1, $2, $3, 'game.loaded_internal', 'game_load', $4, $5, $6, NOW())
+    """, str(uuid.uuid4()), user['user_id'], user['username'], load_id,
+       json.dumps({
+           "game": game['game_name'],
+           "amount": data.amount,
+           "balance_before": wallet_balance,
+           "balance_after": new_balance,
+           "source_type": "internal_transfer",
+           "auto_game_load": auto_game_load,
+           "confirmed": data.confirmed
+       }), client_ip)
     
     return {
         "success": True,
@@ -397,13 +431,13 @@ async def get_game_load_history(
                gl.wallet_balance_before, gl.wallet_balance_after, gl.status, gl.created_at
         FROM game_loads gl
         LEFT JOIN games g ON gl.game_id = g.game_id
-        WHERE gl.user_id = $1
+        WHERE gl.user_id = $1 AND gl.transfer_type = 'load'
         ORDER BY gl.created_at DESC
         LIMIT $2 OFFSET $3
     """, user['user_id'], limit, offset)
     
     total = await fetch_one("""
-        SELECT COUNT(*) as count FROM game_loads WHERE user_id = $1
+        SELECT COUNT(*) as count FROM game_loads WHERE user_id = $1 AND transfer_type = 'load'
     """, user['user_id'])
     
     return {
@@ -447,7 +481,7 @@ async def get_game_details(
     # Get user's load history for this game
     recent_loads = await fetch_all("""
         SELECT load_id, amount, created_at FROM game_loads 
-        WHERE user_id = $1 AND game_id = $2
+        WHERE user_id = $1 AND game_id = $2 AND transfer_type = 'load'
         ORDER BY created_at DESC LIMIT 5
     """, user['user_id'], game_id)
     
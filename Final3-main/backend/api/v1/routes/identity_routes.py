@@ -91,7 +91,7 @@ async def resolve_identity(request: Request, data: IdentityResolveRequest):
         }
     
     # Identity not found - create new user
-    from ..core.security import generate_referral_code, hash_password
+    from ..core.security import generate_referral_code, hash_password_async
     import secrets
     
     user_id = str(uuid.uuid4())
@@ -108,7 +108,7 @@ async def resolve_identity(request: Request, data: IdentityResolveRequest):
     await execute('''
         INSERT INTO users (user_id, username, password_hash, display_name, referral_code)
         VALUES ($1, $2, $3, $4, $5)
-    ''', user_id, username, hash_password(temp_password), display_name, referral_code)
+    ''', user_id, username, await hash_password_async(temp_password), display_name, referral_code)
     
     # Create identity link
     identity_id = str(uuid.uuid4())
@@ -10,6 +10,7 @@ import uuid
 import json
 
 from ..core.database import fetch_one, fetch_all, execute
+from ..core.money_ops import money_executor
 from ..core.config import ErrorCodes
 from ..services import (
     validate_deposit_order,
@@ -282,76 +283,87 @@ async def create_withdrawal(
                 "order": format_order(existing)
             }
     
-    # Validate with full cashout calculation
-    success, validation = await validate_withdrawal_order(
-        user_id=auth.user_id,
-        game_name=data.game_name
-    )
-    
-    if not success:
-        return {
-            "success": False,
-            "message": validation.get('message', 'Validation failed'),
-            "error_code": validation.get('error_code'),
-            "details": validation
+    # Validate, deduct and create the order under the user's money lock so
+    # concurrent withdrawals cannot both spend the same balance
+    async with money_executor.user_transaction(auth.user_id) as conn:
+        # Validate with full cashout calculation
+        success, validation = await validate_withdrawal_order(
+            user_id=auth.user_id,
+            game_name=data.game_name
+        )
+        
+        if not success:
+            return {
+                "success": False,
+                "message": validation.get('message', 'Validation failed'),
+                "error_code": validation.get('error_code'),
+                "details": validation
+            }
+        
+        # Extract cashout calculation
+        cashout = validation['cashout_calculation']
+        
+        # Deduct balance immediately (pending withdrawal) - guarded, nothing
+        # is written if the balance moved since validation
+        deducted = await conn.fetchval('''
+            UPDATE users 
+            SET real_balance = real_balance - $1,
+                bonus_balance = bonus_balance - $2,
+                updated_at = NOW()
+            WHERE user_id = $3 AND real_balance >= $1 AND bonus_balance >= $2
+            RETURNING user_id
+        ''', 
+            cashout['cash_consumed'] + cashout.get('cash_voided', 0),
+            cashout['bonus_consumed'] + cashout.get('bonus_voided', 0),
+            auth.user_id
+        )
+        if deducted is None:
+            return {
+                "success": False,
+                "message": "Balance changed during withdrawal, please retry",
+                "error_code": "E3013"
+            }
+        
+        # Create withdrawal order
+        order_id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc)
+        
+        # Store all details in metadata for audit
+        order_metadata = {
+            **(data.metadata or {}),
+            'last_deposit_order_id': validation.get('last_deposit_order_id'),
+            'last_deposit_amount': validation.get('last_deposit_amount'),
+            'min_multiplier': validation.get('min_multiplier'),
+            'max_multiplier': validation.get('max_multiplier'),
+            'balance_before': validation.get('current_balance'),
+            'cashout_calculation': cashout,
+            'rules_applied': validation.get('rules_applied', [])
         }
-    
-    # Extract cashout calculation
-    cashout = validation['cashout_calculation']
-    
-    # Create withdrawal order
-    order_id = str(uuid.uuid4())
-    now = datetime.now(timezone.utc)
-    
-    # Store all details in metadata for audit
-    order_metadata = {
-        **(data.metadata or {}),
-        'last_deposit_order_id': validation.get('last_deposit_order_id'),
-        'last_deposit_amount': validation.get('last_deposit_amount'),
-        'min_multiplier': validation.get('min_multiplier'),
-        'max_multiplier': validation.get('max_multiplier'),
-        'balance_before': validation.get('current_balance'),
-        'cashout_calculation': cashout,
-        'rules_applied': validation.get('rules_applied', [])
-    }
-    
-    await execute('''
-        INSERT INTO orders (
-            order_id, user_id, username, order_type, game_name, game_display_name,
-            amount, bonus_amount, total_amount, 
-            payout_amount, void_amount, void_reason,
-            cash_consumed, bonus_consumed,
-            status, idempotency_key, metadata, created_at
-        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18)
-    ''',
-        order_id, auth.user_id, auth.username, 'withdrawal',
-        validation['game_name'], validation['game_display_name'],
-        validation['current_balance']['total'],  # Total balance being withdrawn
-        0,  # No bonus added for withdrawals
-        validation['current_balance']['total'],  # Total is the full balance
-        cashout['payout_amount'],
-        cashout['void_amount'],
-        cashout.get('void_reason'),
-        cashout['cash_consumed'],
-        cashout['bonus_consumed'],
-        'pending_review',  # Withdrawals need review
-        idempotency_key,
-        json.dumps(order_metadata),
-        now
-    )
-    
-    # Deduct balance immediately (pending withdrawal)
-    await execute('''
-        UPDATE users 
-        SET real_balance = real_balance - $1,
-            bonus_balance = bonus_balance - $2,
-            updated_at = NOW()
-        WHERE user_id = $3
-    ''', 
-        cashout['cash_consumed'] + cashout.get('cash_voided', 0),
-        cashout['bonus_consumed'] + cashout.get('bonus_voided', 0),
-        auth.user_id
-    )
+        
+        await conn.execute('''
+            INSERT INTO orders (
+                order_id, user_id, username, order_type, game_name, game_display_name,
+                amount, bonus_amount, total_amount, 
+                payout_amount, void_amount, void_reason,
+                cash_consumed, bonus_consumed,
+                status, idempotency_key, metadata, created_at
+            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18)
+        ''',
+            order_id, auth.user_id, auth.username, 'withdrawal',
+            validation['game_name'], validation['game_display_name'],
+            validation['current_balance']['total'],  # Total balance being withdrawn
+            0,  # No bonus added for withdrawals
+            validation['current_balance']['total'],  # Total is the full balance
+            cashout['payout_amount'],
+            cashout['void_amount'],
+            cashout.get('void_reason'),
+            cashout['cash_consumed'],
+            cashout['bonus_consumed'],
+            'pending_review',  # Withdrawals need review
+            idempotency_key,
+            json.dumps(order_metadata),
+            now
+        )
     
     # Log audit
     await log_audit(
@@ -12,6 +12,7 @@ import json
 import logging
 
 from ..core.database import fetch_one, fetch_all, execute, get_pool
+from ..core.money_ops import money_executor
 from ..core.config import get_api_settings
 from ..core.notification_router import emit_event, EventType
 from .dependencies import check_rate_limiting, require_auth
@@ -188,32 +189,57 @@ async def process_order_action(
         # CANONICAL STATUS: APPROVED_EXECUTED
         new_status = 'APPROVED_EXECUTED'
         
-        # Update user balances based on order type
-        if order['order_type'] == 'deposit':
-            await execute('''
-                UPDATE users 
-                SET real_balance = real_balance + $1,
-                    bonus_balance = bonus_balance + $2,
-                    deposit_count = deposit_count + 1,
-                    total_deposited = total_deposited + $3,
-                    updated_at = NOW()
-                WHERE user_id = $4
-            ''', order['amount'], order['bonus_amount'], order['amount'], order['user_id'])
-        elif order['order_type'] == 'withdrawal':
-            await execute('''
-                UPDATE users 
-                SET real_balance = real_balance - $1,
-                    total_withdrawn = total_withdrawn + $1,
-                    updated_at = NOW()
-                WHERE user_id = $2
-            ''', order['amount'], order['user_id'])
-        
-        await execute('''
-            UPDATE orders 
-            SET status = $1, approved_by = $2, approved_at = $3, executed_at = $4, 
-                execution_result = 'Executed via admin UI', updated_at = NOW()
-            WHERE order_id = $5
-        ''', new_status, auth.user_id, now, now, order_id)
+        # Claim the order and apply its balance change in one transaction under
+        # the user's money lock - a concurrent approval finds the order claimed
+        async with money_executor.user_transaction(order['user_id']) as conn:
+            claimed = await conn.fetchval('''
+                UPDATE orders 
+                SET status = $1, approved_by = $2, approved_at = $3, executed_at = $4, 
+                    execution_result = 'Executed via admin UI', updated_at = NOW()
+                WHERE order_id = $5 AND status = ANY($6::text[])
+                RETURNING order_id
+            ''', new_status, auth.user_id, now, now, order_id, valid_pending_statuses)
+            if claimed is None:
+                raise HTTPException(status_code=409, detail="Order was already processed")
+            
+            # Update user balances based on order type
+            if order['order_type'] == 'deposit':
+                await conn.execute('''
+                    UPDATE users 
+                    SET real_balance = real_balance + $1,
+                        bonus_balance = bonus_balance + $2,
+                        deposit_count = deposit_count + 1,
+                        total_deposited = total_deposited + $3,
+                        updated_at = NOW()
+                    WHERE user_id = $4
+                ''', order['amount'], order['bonus_amount'], order['amount'], order['user_id'])
+            elif order['order_type'] == 'withdrawal':
+                debited = await conn.fetchval('''
+                    UPDATE users 
+                    SET real_balance = real_balance - $1,
+                        total_withdrawn = total_withdrawn + $1,
+                        updated_at = NOW()
+                    WHERE user_id = $2 AND real_balance >= $1
+                    RETURNING user_id
+                ''', order['amount'], order['user_id'])
+                if debited is None:
+                    # Rolls back the claim - the order stays pending
+                    raise HTTPException(status_code=400, detail="Insufficient balance for withdrawal")
+            
+            # Emit ORDER_APPROVED notification (outbox row commits with the approval)
+            await emit_event(
+                event_type=EventType.ORDER_APPROVED,
+                title="✅ Order Approved & Executed",
+                message=f"Order for @{order['username']} approved\nAmount: ₱{order['amount']:,.2f}",
+                reference_id=order_id,
+                reference_type="order",
+                user_id=order['user_id'],
+                username=order['username'],
+                amount=order['amount'],
+                extra_data={"final_status": "APPROVED_EXECUTED"},
+                requires_action=False,
+                conn=conn
+            )
         
         await log_audit(auth.user_id, auth.username, "order.approved", "order", order_id, {
             "amount": order['amount'],
@@ -221,47 +247,37 @@ async def process_order_action(
             "final_status": "APPROVED_EXECUTED"
         })
         
-        # Emit ORDER_APPROVED notification
-        await emit_event(
-            event_type=EventType.ORDER_APPROVED,
-            title="✅ Order Approved & Executed",
-            message=f"Order for @{order['username']} approved\nAmount: ₱{order['amount']:,.2f}",
-            reference_id=order_id,
-            reference_type="order",
-            user_id=order['user_id'],
-            username=order['username'],
-            amount=order['amount'],
-            extra_data={"final_status": "APPROVED_EXECUTED"},
-            requires_action=False
-        )
-        
     elif data.action == 'reject':
         # CANONICAL STATUS: REJECTED
         new_status = 'REJECTED'
         
-        await execute('''
-            UPDATE orders 
-            SET status = $1, rejection_reason = $2, approved_by = $3, approved_at = $4, updated_at = NOW()
-            WHERE order_id = $5
-        ''', new_status, data.reason or 'Rejected by admin', auth.user_id, now, order_id)
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute('''
+                    UPDATE orders 
+                    SET status = $1, rejection_reason = $2, approved_by = $3, approved_at = $4, updated_at = NOW()
+                    WHERE order_id = $5
+                ''', new_status, data.reason or 'Rejected by admin', auth.user_id, now, order_id)
+                
+                # Emit ORDER_REJECTED notification (outbox row commits with the rejection)
+                await emit_event(
+                    event_type=EventType.ORDER_REJECTED,
+                    title="❌ Order Rejected",
+                    message=f"Order for @{order['username']} rejected\nReason: {data.reason or 'Admin rejection'}",
+                    reference_id=order_id,
+                    reference_type="order",
+                    user_id=order['user_id'],
+                    username=order['username'],
+                    amount=order['amount'],
+                    extra_data={"reason": data.reason, "final_status": "REJECTED"},
+                    requires_action=False,
+                    conn=conn
+                )
         
         await log_audit(auth.user_id, auth.username, "order.rejected", "order", order_id, {
             "reason": data.reason
         })
-        
-        # Emit ORDER_REJECTED notification
-        await emit_event(
-            event_type=EventType.ORDER_REJECTED,
-            title="❌ Order Rejected",
-            message=f"Order for @{order['username']} rejected\nReason: {data.reason or 'Admin rejection'}",
-            reference_id=order_id,
-            reference_type="order",
-            user_id=order['user_id'],
-            username=order['username'],
-            amount=order['amount'],
-            extra_data={"reason": data.reason, "final_status": "REJECTED"},
-            requires_action=False
-        )
     else:
         raise HTTPException(status_code=400, detail="Invalid action. Use 'approve' or 'reject'")
     
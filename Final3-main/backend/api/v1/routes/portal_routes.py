@@ -12,7 +12,9 @@ import json
 
 from ..core.database import fetch_one, fetch_all, execute
 from ..core.config import ErrorCodes
-from ..services import log_audit, validate_withdrawal_order
+from ..core.money_ops import money_executor
+from ..core.auth import invalidate_auth_user
+from ..services import log_audit
 
 router = APIRouter(prefix="/portal", tags=["Client Portal"])
 
@@ -126,56 +128,39 @@ async def get_bonus_progress(
     Get bonus progress tracker with multiplier requirements
     Tab B: Bonus & Promo
     """
+    from ..services.cashout_service import get_cashout_previews
+    
     client_token = authorization.replace("Bearer ", "") if authorization else None
     user = await get_portal_user(request, x_portal_token, client_token)
     
-    # Get system settings for multipliers
-    settings = await fetch_one("SELECT * FROM system_settings WHERE id = 'global'")
-    min_multiplier = float(settings.get('min_cashout_multiplier', 1) if settings else 1)
-    max_multiplier = float(settings.get('max_cashout_multiplier', 3) if settings else 3)
-    
-    # Get last deposit to calculate required play-through
-    last_deposit = await fetch_one("""
-        SELECT amount, bonus_amount FROM orders 
-        WHERE user_id = $1 AND order_type = 'deposit' AND status = 'APPROVED_EXECUTED'
-        ORDER BY approved_at DESC LIMIT 1
-    """, user['user_id'])
-    
-    deposit_amount = float(last_deposit['amount'] or 0) if last_deposit else 0
+    # Multipliers (CLIENT > GAME > GLOBAL) and last deposit on any game
+    preview = (await get_cashout_previews([user['user_id']])).get(user['user_id'], {})
+    min_multiplier = float(preview.get('min_multiplier', 1))
+    max_multiplier = float(preview.get('max_multiplier', 3))
+    deposit_amount = float(preview.get('last_deposit_amount') or 0)
     
     # Required play-through = deposit * min_multiplier
     required_playthrough = deposit_amount * min_multiplier
     
-    # Get total played/wagered (from game loads)
-    total_wagered = await fetch_one("""
-        SELECT COALESCE(SUM(amount + COALESCE(bonus_amount, 0)), 0) as total
-        FROM orders 
+    # Played/wagered and bonus breakdown by source in one pass
+    totals = await fetch_one("""
+        SELECT COALESCE(SUM(amount + COALESCE(bonus_amount, 0)), 0) AS total_wagered,
+               COALESCE(SUM(bonus_amount) FILTER (WHERE metadata::text LIKE '%signup%'), 0) AS signup_bonus,
+               COALESCE(SUM(bonus_amount) FILTER (WHERE order_type = 'deposit'), 0) AS deposit_bonus,
+               (SELECT COALESCE(SUM(credit_amount), 0) FROM promo_redemptions WHERE user_id = $1) AS promo_credits
+        FROM orders
         WHERE user_id = $1 AND status = 'APPROVED_EXECUTED'
     """, user['user_id'])
     
-    current_playthrough = float(total_wagered['total'] or 0)
+    current_playthrough = float(totals['total_wagered'] or 0)
     
     # Calculate progress percentage
     progress_pct = min(100, (current_playthrough / required_playthrough * 100) if required_playthrough > 0 else 100)
     remaining = max(0, required_playthrough - current_playthrough)
     
-    # Get bonus breakdown by source
-    signup_bonus = await fetch_one("""
-        SELECT COALESCE(SUM(bonus_amount), 0) as total
-        FROM orders WHERE user_id = $1 AND status = 'APPROVED_EXECUTED'
-        AND metadata::text LIKE '%signup%'
-    """, user['user_id'])
-    
-    deposit_bonus = await fetch_one("""
-        SELECT COALESCE(SUM(bonus_amount), 0) as total
-        FROM orders WHERE user_id = $1 AND order_type = 'deposit' AND status = 'APPROVED_EXECUTED'
-    """, user['user_id'])
-    
-    # Get promo credits from redemptions
-    promo_credits = await fetch_one("""
-        SELECT COALESCE(SUM(credit_amount), 0) as total
-        FROM promo_redemptions WHERE user_id = $1
-    """, user['user_id'])
+    signup_bonus = float(totals['signup_bonus'] or 0)
+    deposit_bonus = float(totals['deposit_bonus'] or 0)
+    promo_credits = float(totals['promo_credits'] or 0)
     
     return {
         "progress_tracker": {
@@ -189,14 +174,10 @@ async def get_bonus_progress(
             "is_eligible_for_withdrawal": progress_pct >= 100
         },
         "bonus_sources": {
-            "signup_bonus": round(float(signup_bonus['total'] or 0), 2),
-            "deposit_bonus": round(float(deposit_bonus['total'] or 0), 2),
-            "promo_credits": round(float(promo_credits['total'] or 0), 2),
-            "total_bonus_received": round(
-                float(signup_bonus['total'] or 0) + 
-                float(deposit_bonus['total'] or 0) + 
-                float(promo_credits['total'] or 0), 2
-            )
+            "signup_bonus": round(signup_bonus, 2),
+            "deposit_bonus": round(deposit_bonus, 2),
+            "promo_credits": round(promo_credits, 2),
+            "total_bonus_received": round(signup_bonus + deposit_bonus + promo_credits, 2)
         },
         "current_bonus_balance": round(float(user.get('bonus_balance', 0) or 0), 2)
     }
@@ -215,6 +196,8 @@ async def get_cashout_preview(
     Preview what would happen if user withdraws now
     Tab C: Cashout Preview (READ-ONLY)
     """
+    from ..services.cashout_service import get_cashout_previews
+    
     client_token = authorization.replace("Bearer ", "") if authorization else None
     user = await get_portal_user(request, x_portal_token, client_token)
     
@@ -223,13 +206,12 @@ async def get_cashout_preview(
         game = await fetch_one("SELECT game_name FROM games WHERE is_active = TRUE LIMIT 1")
         game_name = game['game_name'] if game else 'default'
     
-    # Use the withdrawal validation to get accurate calculation
-    success, result = await validate_withdrawal_order(
-        user_id=user['user_id'],
-        game_name=game_name
-    )
+    # Same calculation as withdrawal validation, from the batch evaluator
+    result = (await get_cashout_previews([user['user_id']], game_name)).get(user['user_id'])
+    if result is None:
+        result = {'eligible': False, 'message': 'User not found', 'error_code': 'E1002'}
     
-    if not success:
+    if not result['eligible']:
         # Return preview with block reason
         return {
             "can_withdraw": False,
@@ -332,76 +314,85 @@ async def redeem_promo_code(
                 }
             )
         
-        # 4. Check if user already redeemed this code
-        existing = await fetch_one("""
-            SELECT * FROM promo_redemptions 
-            WHERE code_id = $1 AND user_id = $2
-        """, promo['code_id'], user['user_id'])
-        
-        if existing:
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "success": False,
-                    "message": "You have already redeemed this promo code."
-                }
-            )
-        
-        # 5. Check usage limit (current_redemptions >= max_redemptions)
-        max_redemptions = promo.get('max_redemptions')
-        current_redemptions = promo.get('current_redemptions', 0) or 0
-        
-        if max_redemptions and current_redemptions >= max_redemptions:
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "success": False,
-                    "message": "This promo code has reached its usage limit."
-                }
-            )
-        
-        # 6. SUCCESS - Apply reward
-        bonus_amount = float(promo.get('credit_amount', 0))
-        
-        if bonus_amount <= 0:
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "success": False,
-                    "message": "This promo code has no value."
-                }
-            )
-        
-        # Record redemption
+        # 4-6 run in one transaction under the user's money lock, so a double
+        # submit cannot redeem twice and the usage limit is enforced atomically
         redemption_id = str(uuid.uuid4())
-        await execute("""
-            INSERT INTO promo_redemptions (redemption_id, code_id, user_id, credit_amount, redeemed_at)
-            VALUES ($1, $2, $3, $4, NOW())
-        """, redemption_id, promo['code_id'], user['user_id'], bonus_amount)
-        
-        # Increment current_redemptions on promo_codes table
-        await execute("""
-            UPDATE promo_codes 
-            SET current_redemptions = COALESCE(current_redemptions, 0) + 1
-            WHERE code_id = $1
-        """, promo['code_id'])
-        
-        # Add play credits to user balance
-        await execute("""
-            UPDATE users 
-            SET play_credits = COALESCE(play_credits, 0) + $1,
-                updated_at = NOW()
-            WHERE user_id = $2
-        """, bonus_amount, user['user_id'])
-        
-        # Log audit
-        await log_audit(
-            user['user_id'], user['username'], "promo.redeemed", "promo", promo['code_id'],
-            {"code": code, "bonus_amount": bonus_amount}
-        )
-        
-        # Emit promo code redeemed notification (non-blocking)
-        try:
+        async with money_executor.user_transaction(user['user_id']) as conn:
+            # 4. Check if user already redeemed this code
+            existing = await conn.fetchrow("""
+                SELECT redemption_id FROM promo_redemptions 
+                WHERE code_id = $1 AND user_id = $2
+            """, promo['code_id'], user['user_id'])
+            
+            if existing:
+                return JSONResponse(
+                    status_code=400,
+                    content={
+                        "success": False,
+                        "message": "You have already redeemed this promo code."
+                    }
+                )
+            
+            # 5. Check usage limit (current_redemptions >= max_redemptions)
+            max_redemptions = promo.get('max_redemptions')
+            current_redemptions = promo.get('current_redemptions', 0) or 0
+            
+            if max_redemptions and current_redemptions >= max_redemptions:
+                return JSONResponse(
+                    status_code=400,
+                    content={
+                        "success": False,
+                        "message": "This promo code has reached its usage limit."
+                    }
+                )
+            
+            # 6. SUCCESS - Apply reward
+            bonus_amount = float(promo.get('credit_amount', 0))
+            
+            if bonus_amount <= 0:
+                return JSONResponse(
+                    status_code=400,
+                    content={
+                        "success": False,
+                        "message": "This promo code has no value."
+                    }
+                )
+            
+            # Increment current_redemptions on promo_codes table (re-checks the
+            # limit, other users may have redeemed since the read above)
+            claimed = await conn.fetchval("""
+                UPDATE promo_codes 
+                SET current_redemptions = COALESCE(current_redemptions, 0) + 1
+                WHERE code_id = $1
+                  AND (COALESCE(max_redemptions, 0) = 0
+                       OR COALESCE(current_redemptions, 0) < max_redemptions)
+                RETURNING code_id
+            """, promo['code_id'])
+            
+            if not claimed:
+                return JSONResponse(
+                    status_code=400,
+                    content={
+                        "success": False,
+                        "message": "This promo code has reached its usage limit."
+                    }
+                )
+            
+            # Record redemption
+            await conn.execute("""
+                INSERT INTO promo_redemptions (redemption_id, code_id, user_id, credit_amount, redeemed_at)
+                VALUES ($1, $2, $3, $4, NOW())
+            """, redemption_id, promo['code_id'], user['user_id'], bonus_amount)
+            
+            # Add play credits to user balance
+            await conn.execute("""
+                UPDATE users 
+                SET play_credits = COALESCE(play_credits, 0) + $1,
+                    updated_at = NOW()
+                WHERE user_id = $2
+            """, bonus_amount, user['user_id'])
+            
+            # Emit promo code redeemed notification (outbox row commits with the redemption)
             from ..core.notification_router import emit_event, EventType
             await emit_event(
                 event_type=EventType.PROMO_CODE_REDEEMED,
@@ -414,11 +405,16 @@ async def redeem_promo_code(
                 display_name=user.get('display_name'),
                 amount=bonus_amount,
                 extra_data={"code": code},
-                requires_action=False
+                requires_action=False,
+                conn=conn
             )
-        except Exception as e:
-            import logging
-            logging.getLogger(__name__).warning(f"Failed to send promo notification: {e}")
+        
+        # Log audit
+        await log_audit(
+            user['user_id'], user['username'], "promo.redeemed", "promo", promo['code_id'],
+            {"code": code, "bonus_amount": bonus_amount}
+        )
+        
         
         # SUCCESS RESPONSE (200)
         return {
@@ -1010,8 +1006,8 @@ async def set_client_password(
             )
         
         # Hash password
-        from ..core.security import hash_password
-        password_hash = hash_password(password)
+        from ..core.security import hash_password_async
+        password_hash = await hash_password_async(password)
         
         # Update user
         await execute("""
@@ -1019,6 +1015,7 @@ async def set_client_password(
             SET username = $1, password_hash = $2, has_password = true
             WHERE user_id = $3
         """, username, password_hash, user_id)
+        await invalidate_auth_user(user_id)
         
         return {
             "success": True,
@@ -1031,3 +1028,23 @@ async def set_client_password(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={"message": f"Failed to set password: {str(err)}", "error_code": "E5001"}
         )
+
+
+@router.post("/security/logout")
+async def logout_portal_session(
+    portal_token: Optional[str] = Header(None, alias="X-Portal-Token")
+):
+    """End a portal session - the token stops working on every worker immediately"""
+    if not portal_token:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "X-Portal-Token required", "error_code": "E1001"}
+        )
+    
+    from ..core.auth import revoke_portal_session
+    revoked = await revoke_portal_session(portal_token.strip())
+    
+    return {
+        "success": True,
+        "revoked": revoked
+    }
@@ -10,6 +10,7 @@ import uuid
 import json
 
 from ..core.database import fetch_one, fetch_all, execute
+from ..core.money_ops import money_executor
 from ..services import log_audit
 
 router = APIRouter(prefix="/admin/rewards", tags=["Admin Rewards"])
@@ -231,6 +232,20 @@ async def delete_reward(
 
 # ==================== GRANT MANAGEMENT ====================
 
+async def _credit_reward(conn, reward_type: str, amount: float, user_id: str):
+    """Credit a granted reward (PLAY CREDITS ONLY for promo/rewards)"""
+    if reward_type == 'play_credits':
+        await conn.execute("""
+            UPDATE users SET play_credits = COALESCE(play_credits, 0) + $1, updated_at = NOW()
+            WHERE user_id = $2
+        """, amount, user_id)
+    elif reward_type == 'bonus':
+        await conn.execute("""
+            UPDATE users SET bonus_balance = COALESCE(bonus_balance, 0) + $1, updated_at = NOW()
+            WHERE user_id = $2
+        """, amount, user_id)
+
+
 @router.post("/grant")
 async def grant_reward_manually(
     request: Request,
@@ -250,35 +265,28 @@ async def grant_reward_manually(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Check if already granted (for one-time rewards)
-    if reward['is_one_time']:
-        existing = await fetch_one("""
-            SELECT * FROM reward_grants WHERE reward_id = $1 AND user_id = $2
-        """, data.reward_id, data.user_id)
-        if existing:
-            raise HTTPException(status_code=400, detail="User has already received this one-time reward")
-    
     # Calculate amount
     amount = data.custom_amount if data.custom_amount else float(reward['value'])
-    
-    # Create grant record
     grant_id = str(uuid.uuid4())
-    await execute("""
-        INSERT INTO reward_grants (grant_id, reward_id, user_id, amount, granted_by, reason, granted_at)
-        VALUES ($1, $2, $3, $4, $5, $6, NOW())
-    """, grant_id, data.reward_id, data.user_id, amount, auth.user_id, data.reason)
     
-    # Credit user based on reward type (PLAY CREDITS ONLY for promo/rewards)
-    if reward['reward_type'] == 'play_credits':
-        await execute("""
-            UPDATE users SET play_credits = COALESCE(play_credits, 0) + $1, updated_at = NOW()
-            WHERE user_id = $2
-        """, amount, data.user_id)
-    elif reward['reward_type'] == 'bonus':
-        await execute("""
-            UPDATE users SET bonus_balance = COALESCE(bonus_balance, 0) + $1, updated_at = NOW()
-            WHERE user_id = $2
-        """, amount, data.user_id)
+    # One-time check, grant record and credit under the user's money lock, so
+    # concurrent grants cannot both pass the one-time check
+    async with money_executor.user_transaction(data.user_id) as conn:
+        # Check if already granted (for one-time rewards)
+        if reward['is_one_time']:
+            existing = await conn.fetchrow("""
+                SELECT 1 FROM reward_grants WHERE reward_id = $1 AND user_id = $2
+            """, data.reward_id, data.user_id)
+            if existing:
+                raise HTTPException(status_code=400, detail="User has already received this one-time reward")
+        
+        # Create grant record
+        await conn.execute("""
+            INSERT INTO reward_grants (grant_id, reward_id, user_id, amount, granted_by, reason, granted_at)
+            VALUES ($1, $2, $3, $4, $5, $6, NOW())
+        """, grant_id, data.reward_id, data.user_id, amount, auth.user_id, data.reason)
+        
+        await _credit_reward(conn, reward['reward_type'], amount, data.user_id)
     
     await log_audit(
         auth.user_id, "admin", "reward.granted", "reward_grant", grant_id,
@@ -341,34 +349,25 @@ async def trigger_reward(
     if not reward:
         return {"granted": False, "message": "No active reward for this trigger type"}
     
-    # Check if already granted (for one-time)
-    if reward['is_one_time']:
-        existing = await fetch_one("""
-            SELECT * FROM reward_grants WHERE reward_id = $1 AND user_id = $2
-        """, reward['reward_id'], user_id)
-        if existing:
-            return {"granted": False, "message": "Reward already granted"}
-    
-    # Grant the reward
     grant_id = str(uuid.uuid4())
     amount = float(reward['value'])
     
-    await execute("""
-        INSERT INTO reward_grants (grant_id, reward_id, user_id, amount, granted_by, reason, granted_at)
-        VALUES ($1, $2, $3, $4, $5, $6, NOW())
-    """, grant_id, reward['reward_id'], user_id, amount, None, f"Auto: {trigger_type}")
-    
-    # Credit based on type
-    if reward['reward_type'] == 'play_credits':
-        await execute("""
-            UPDATE users SET play_credits = COALESCE(play_credits, 0) + $1, updated_at = NOW()
-            WHERE user_id = $2
-        """, amount, user_id)
-    elif reward['reward_type'] == 'bonus':
-        await execute("""
-            UPDATE users SET bonus_balance = COALESCE(bonus_balance, 0) + $1, updated_at = NOW()
-            WHERE user_id = $2
-        """, amount, user_id)
+    async with money_executor.user_transaction(user_id) as conn:
+        # Check if already granted (for one-time)
+        if reward['is_one_time']:
+            existing = await conn.fetchrow("""
+                SELECT 1 FROM reward_grants WHERE reward_id = $1 AND user_id = $2
+            """, reward['reward_id'], user_id)
+            if existing:
+                return {"granted": False, "message": "Reward already granted"}
+        
+        # Grant the reward
+        await conn.execute("""
+            INSERT INTO reward_grants (grant_id, reward_id, user_id, amount, granted_by, reason, granted_at)
+            VALUES ($1, $2, $3, $4, $5, $6, NOW())
+        """, grant_id, reward['reward_id'], user_id, amount, None, f"Auto: {trigger_type}")
+        
+        await _credit_reward(conn, reward['reward_type'], amount, user_id)
     
     await log_audit(
         user_id, "system", "reward.auto_granted", "reward_grant", grant_id,
@@ -19,7 +19,7 @@ import hmac
 
 from ..core.database import fetch_one, fetch_all, execute, get_pool
 from ..core.config import get_api_settings
-from ..core.notification_router import EventType, EVENT_METADATA
+from ..core.notification_router import EventType, EVENT_METADATA, invalidate_bot_subscriptions
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/admin/telegram", tags=["Telegram Bots"])
@@ -195,6 +195,8 @@ async def create_bot(
             VALUES ($1, $2, $3, $4, $5)
         """, perm_id, bot_id, event_type.value, True, now)
     
+    await invalidate_bot_subscriptions()
+    
     return {
         "bot_id": bot_id,
         "message": "Telegram bot created successfully",
@@ -231,6 +233,7 @@ async def update_bot(
             f"UPDATE telegram_bots SET {', '.join(updates)} WHERE bot_id = ${len(params)}",
             *params
         )
+        await invalidate_bot_subscriptions()
     
     return {"message": "Bot updated successfully"}
 
@@ -245,6 +248,7 @@ async def delete_bot(
     await require_admin_access(request, authorization)
     
     await execute("DELETE FROM telegram_bots WHERE bot_id = $1", bot_id)
+    await invalidate_bot_subscriptions()
     return {"message": "Bot deleted successfully"}
 
 
@@ -305,6 +309,8 @@ async def update_bot_permissions(
                 VALUES ($1, $2, $3, $4, NOW())
             """, str(uuid.uuid4()), bot_id, perm.event_type, perm.enabled)
     
+    await invalidate_bot_subscriptions()
+    
     return {"message": "Permissions updated successfully"}
 
 
@@ -365,6 +371,42 @@ async def get_notification_logs(
     }
 
 
+@router.get("/log-writer")
+async def get_notification_log_writer_status(
+    request: Request,
+    authorization: str = Header(..., alias="Authorization")
+):
+    """Get buffered notification log writer depth and flush latency (this worker)"""
+    await require_admin_access(request, authorization)
+    
+    from ..core.notification_log_writer import notification_log_writer
+    return notification_log_writer.get_status()
+
+
+@router.get("/outbox")
+async def get_notification_outbox_status(
+    request: Request,
+    authorization: str = Header(..., alias="Authorization")
+):
+    """Get notification outbox depth and dispatcher state"""
+    await require_admin_access(request, authorization)
+    
+    from ..core.notification_outbox import get_outbox_stats
+    return await get_outbox_stats()
+
+
+@router.get("/send-queue")
+async def get_send_queue_status(
+    request: Request,
+    authorization: str = Header(..., alias="Authorization")
+):
+    """Get per-bot Telegram send queue depth and 429 throttle counters (this worker)"""
+    await require_admin_access(request, authorization)
+    
+    from ..core.telegram_rate_limiter import telegram_scheduler
+    return {"bots": telegram_scheduler.get_queue_stats()}
+
+
 # ==================== TEST NOTIFICATION ====================
 
 @router.post("/bots/{bot_id}/test")
@@ -17,6 +17,7 @@ import json
 from datetime import datetime, timezone
 import uuid
 from ..core.database import get_pool
+from ..core.money_ops import money_executor, lock_users
 from ..core.webhook_security import (
     verify_telegram_webhook,
     get_telegram_bot_token,
@@ -258,21 +259,16 @@ async def handle_approve(bot: Bot, order_id: str, query, admin_chat_id: str, adm
         async with pool.acquire() as conn:
             try:
                 async with conn.transaction():
-                    # Lock user row for balance update
-                    user_locked = await conn.fetchrow("""
-                        SELECT user_id, real_balance FROM users 
-                        WHERE user_id = $1 FOR UPDATE
-                    """, order['user_id'])
-                    
-                    current_balance = float(user_locked['real_balance'])
-                    new_balance = current_balance + final_amount
-                    
-                    # Update user balance
-                    await conn.execute("""
+                    await lock_users(conn, [order['user_id']])
+
+                    # Update user balance (relative - no read-modify-write)
+                    new_balance = float(await conn.fetchval("""
                         UPDATE users 
-                        SET real_balance = $1, updated_at = NOW()
+                        SET real_balance = real_balance + $1, updated_at = NOW()
                         WHERE user_id = $2
-                    """, new_balance, order['user_id'])
+                        RETURNING real_balance
+                    """, final_amount, order['user_id']))
+                    current_balance = new_balance - final_amount
                     
                     # Record in ledger
                     await conn.execute("""
@@ -778,24 +774,24 @@ async def handle_withdrawal_failed(bot: Bot, order_id: str, query, reason: str,
         refund_text = ""
         new_balance = float(order['real_balance'])
         
-        if metadata.get('balance_deducted'):
-            async with pool.acquire() as conn:
-                async with conn.transaction():
-                    new_balance = float(order['real_balance']) + float(order['amount'])
-                    await conn.execute("""
-                        UPDATE users 
-                        SET real_balance = $1, updated_at = NOW()
-                        WHERE user_id = $2
-                    """, new_balance, order['user_id'])
-                    
-                    await conn.execute("""
-                        INSERT INTO wallet_ledger 
-                        (ledger_id, user_id, transaction_type, amount, balance_before, balance_after,
-                         reference_type, reference_id, description, created_at)
-                        VALUES ($1, $2, 'credit', $3, $4, $5, 'refund', $6, $7, NOW())
-                    """, str(uuid.uuid4()), order['user_id'], order['amount'],
-                         order['real_balance'], new_balance, order_id,
-                         f"Refund: {reason}")
+        # A no-op rejection means another path already rejected (and refunded)
+        if metadata.get('balance_deducted') and not reject_result.is_noop:
+            async with money_executor.user_transaction(order['user_id']) as conn:
+                new_balance = float(await conn.fetchval("""
+                    UPDATE users 
+                    SET real_balance = real_balance + $1, updated_at = NOW()
+                    WHERE user_id = $2
+                    RETURNING real_balance
+                """, float(order['amount']), order['user_id']))
+                
+                await conn.execute("""
+                    INSERT INTO wallet_ledger 
+                    (ledger_id, user_id, transaction_type, amount, balance_before, balance_after,
+                     reference_type, reference_id, description, created_at)
+                    VALUES ($1, $2, 'credit', $3, $4, $5, 'refund', $6, $7, NOW())
+                """, str(uuid.uuid4()), order['user_id'], order['amount'],
+                     new_balance - float(order['amount']), new_balance, order_id,
+                     f"Refund: {reason}")
             
             refund_text = f"\n💳 <b>Refunded:</b> ${float(order['amount']):.2f}"
         
@@ -13,6 +13,7 @@ import json
 import logging
 
 from ..core.database import get_pool
+from ..core.money_ops import lock_users
 from ..core.auth import get_current_user, AuthenticatedUser, enforce_ownership
 
 router = APIRouter(prefix="/withdrawal", tags=["withdrawal"])
@@ -67,14 +68,19 @@ async def withdraw_from_wallet(
         
         try:
             async with conn.transaction():
-                # Deduct from wallet FIRST
-                new_balance = float(user_record['real_balance']) - data.amount
-                
-                await conn.execute("""
+                await lock_users(conn, [user.user_id])
+
+                # Deduct from wallet FIRST (guarded - balance may have moved)
+                new_balance = await conn.fetchval("""
                     UPDATE users 
-                    SET real_balance = $1, updated_at = NOW()
-                    WHERE user_id = $2
-                """, new_balance, user.user_id)
+                    SET real_balance = real_balance - $1, updated_at = NOW()
+                    WHERE user_id = $2 AND real_balance >= $1
+                    RETURNING real_balance
+                """, data.amount, user.user_id)
+                if new_balance is None:
+                    raise HTTPException(status_code=400, detail="Insufficient wallet balance")
+                new_balance = float(new_balance)
+                balance_before = new_balance + data.amount
                 
                 # Create withdrawal order
                 await conn.execute("""
@@ -90,7 +96,7 @@ async def withdraw_from_wallet(
                          'account_number': data.account_number,
                          'account_name': data.account_name,
                          'balance_deducted': True,  # IMPORTANT: Flag for refund
-                         'balance_before': float(user_record['real_balance']),
+                         'balance_before': balance_before,
                          'balance_after': new_balance
                      }))
                 
@@ -101,9 +107,11 @@ async def withdraw_from_wallet(
                      reference_type, reference_id, description, created_at)
                     VALUES ($1, $2, 'debit', $3, $4, $5, 'withdrawal', $6, $7, NOW())
                 """, str(uuid.uuid4()), user.user_id, data.amount,
-                     user_record['real_balance'], new_balance, order_id,
+                     balance_before, new_balance, order_id,
                      f"Withdrawal to {data.withdrawal_method} (pending)")
         
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Transaction failed: {str(e)}")
         
@@ -170,13 +178,15 @@ async def withdraw_from_game(
             
             # Add redeemed amount to wallet
             async with conn.transaction():
-                new_balance = float(user_record['real_balance']) + data.amount
-                
-                await conn.execute("""
+                await lock_users(conn, [user.user_id])
+
+                new_balance = float(await conn.fetchval("""
                     UPDATE users 
-                    SET real_balance = $1, updated_at = NOW()
+                    SET real_balance = real_balance + $1, updated_at = NOW()
                     WHERE user_id = $2
-                """, new_balance, user.user_id)
+                    RETURNING real_balance
+                """, data.amount, user.user_id))
+                balance_before = new_balance - data.amount
                 
                 # Create withdrawal order
                 await conn.execute("""
@@ -203,7 +213,7 @@ async def withdraw_from_game(
                      reference_type, reference_id, description, created_at)
                     VALUES ($1, $2, 'credit', $3, $4, $5, 'game_redeem', $6, $7, NOW())
                 """, str(uuid.uuid4()), user.user_id, data.amount,
-                     user_record['real_balance'], new_balance, order_id,
+                     balance_before, new_balance, order_id,
                      f"Redeemed from {game['display_name']}")
         
         except Exception as e:
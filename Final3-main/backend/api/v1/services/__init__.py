@@ -48,6 +48,10 @@ from .rules_service import (
     get_game_rules,
     get_client_rules,
     get_last_deposit,
+    load_client_context,
+    RulesSnapshot,
+    get_rules_snapshot,
+    invalidate_rules_snapshot,
 )
 
 __all__ = [
@@ -94,4 +98,8 @@ __all__ = [
     "get_game_rules",
     "get_client_rules",
     "get_last_deposit",
+    "load_client_context",
+    "RulesSnapshot",
+    "get_rules_snapshot",
+    "invalidate_rules_snapshot",
 ]
@@ -8,11 +8,13 @@ from typing import Optional, Dict, Any, Tuple
 
 from ..core.database import fetch_one, fetch_all, execute, execute_returning
 from ..core.security import (
-    hash_password, verify_password, generate_referral_code,
+    hash_password_async, verify_password_async, password_needs_rehash, generate_referral_code,
     generate_magic_link_token, generate_session_token, create_jwt_token,
     decode_jwt_token, check_brute_force, record_failed_attempt, clear_failed_attempts
 )
 from ..core.config import get_api_settings, ErrorCodes
+from ..core.auth import auth_user_cache
+from ..core.session_activity import session_activity_tracker
 from ..models import SignupResponse
 
 settings = get_api_settings()
@@ -66,7 +68,7 @@ async def create_user(
     
     # Create user
     user_id = str(uuid.uuid4())
-    password_hash = hash_password(password)
+    password_hash = await hash_password_async(password)
     
     await execute('''
         INSERT INTO users (user_id, username, password_hash, display_name, referral_code, referred_by_code, referred_by_user_id)
@@ -155,13 +157,21 @@ async def authenticate_user(username: str, password: str) -> Tuple[bool, Dict[st
         }
     
     # Verify password
-    if not verify_password(password, user['password_hash']):
+    if not await verify_password_async(password, user['password_hash']):
         record_failed_attempt(username)
         return False, {
             "message": "Invalid credentials",
             "error_code": ErrorCodes.INVALID_CREDENTIALS
         }
     
+    # Transparently upgrade hashes made with an old work factor
+    if password_needs_rehash(user['password_hash']):
+        new_hash = await hash_password_async(password)
+        await execute(
+            "UPDATE users SET password_hash = $1 WHERE user_id = $2 AND password_hash = $3",
+            new_hash, user['user_id'], user['password_hash']
+        )
+    
     # Check if active
     if not user.get('is_active', True):
         return False, {
@@ -291,26 +301,21 @@ async def validate_token(token: str) -> Tuple[bool, Dict[str, Any]]:
     if not user_id:
         return False, {"message": "Invalid token", "error_code": ErrorCodes.INVALID_TOKEN}
     
-    # Verify user exists and is active
-    user = await fetch_one(
-        "SELECT user_id, username, display_name, referral_code, role, is_active FROM users WHERE user_id = $1",
-        user_id
-    )
+    # Verify user exists and is active (served from the authenticated-user cache)
+    user = await auth_user_cache.get(user_id)
     
-    if not user or not user.get('is_active', True):
+    if not user or not user.is_active:
         return False, {"message": "User not found or disabled", "error_code": ErrorCodes.USER_NOT_FOUND}
     
-    # Update session last used
-    await execute('''
-        UPDATE sessions SET last_used_at = $1 WHERE access_token = $2 AND is_active = TRUE
-    ''', datetime.now(timezone.utc), token)
+    # Update session last used (written behind, in batches)
+    session_activity_tracker.record(token)
     
     return True, {
-        "user_id": user['user_id'],
-        "username": user['username'],
-        "display_name": user['display_name'],
-        "referral_code": user['referral_code'],
-        "role": user.get('role', 'user'),
+        "user_id": user.user_id,
+        "username": user.username,
+        "display_name": user.display_name,
+        "referral_code": user.referral_code,
+        "role": user.role,
         "expires_at": datetime.fromtimestamp(payload['exp'], tz=timezone.utc)
     }
 
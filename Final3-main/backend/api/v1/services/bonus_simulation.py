@@ -0,0 +1,401 @@
+"""
+Bonus Simulation - Replay candidate bonus rules over historical deposits
+
+Answers "what would this bonus_rules / signup_bonus change have cost?"
+without replaying calculate_deposit_bonus() order by order:
+
+- Historical deposits are streamed out of Postgres with binary COPY and
+  decoded straight into columnar NumPy arrays (one fixed-width record per
+  order, no per-row Python objects)
+- First-ever / first-for-game flags are computed by window functions in SQL
+  over the whole deposit history, so a date window does not reset them
+- The candidate rules (current RulesSnapshot + overrides) are applied with
+  vectorized NumPy expressions mirroring calculate_deposit_bonus():
+  signup % on first-ever deposit, client override % OR game first_deposit /
+  default rule (percent + flat, capped by max_bonus) OR system default %,
+  plus referral %
+- Simulated vs actual bonus is aggregated per game and per game/day with
+  np.bincount
+
+Approximations (documented in the report): referral perks are modelled as
+the scenario's default_referral_bonus percent, and client overrides use the
+user's current bonus_percentage.
+
+CLI:
+    python -m api.v1.services.bonus_simulation --start 2025-01-01 --end 2026-01-01 \\
+        --scenario candidate.json
+"""
+import io
+import json
+import math
+import time
+import struct
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Sequence
+
+import numpy as np
+
+from ..core.database import get_pool
+from ..core.order_lifecycle import OrderStatus
+from .rules_service import get_rules_snapshot, RulesSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Statuses of deposits that were actually paid out
+COMPLETED_DEPOSIT_STATUSES = [
+    OrderStatus.COMPLETED.value,
+    *sorted(OrderStatus.approved_variants()),
+]
+
+# One binary COPY record per deposit. Every column is NOT NULL and fixed
+# width, so records have a constant size and decode with a single
+# np.frombuffer call. Each field is preceded by its int32 length.
+DEPOSIT_FIELDS = [
+    ("amount", ">f8"),
+    ("actual_bonus", ">f8"),
+    ("game_idx", ">i4"),
+    ("day", ">i4"),
+    ("client_pct", ">f8"),
+    ("first_ever", "u1"),
+    ("first_game", "u1"),
+    ("has_referral", "u1"),
+]
+
+DEPOSIT_RECORD_DTYPE = np.dtype(
+    [("nfields", ">i2")]
+    + [item for i, (name, fmt) in enumerate(DEPOSIT_FIELDS) for item in ((f"_len{i}", ">i4"), (name, fmt))]
+)
+
+DEPOSIT_HISTORY_SQL = """
+    SELECT amount, actual_bonus, game_idx, day, client_pct, first_ever, first_game, has_referral
+    FROM (
+        SELECT COALESCE(o.amount, 0)::float8 AS amount,
+               COALESCE(o.bonus_amount, 0)::float8 AS actual_bonus,
+               COALESCE(array_position($1::text[], LOWER(o.game_name)), 0)::int4 AS game_idx,
+               ((o.created_at AT TIME ZONE 'UTC')::date - DATE '1970-01-01')::int4 AS day,
+               COALESCE(u.bonus_percentage, 0)::float8 AS client_pct,
+               ROW_NUMBER() OVER (PARTITION BY o.user_id ORDER BY o.created_at) = 1 AS first_ever,
+               ROW_NUMBER() OVER (
+                   PARTITION BY o.user_id, LOWER(o.game_name) ORDER BY o.created_at
+               ) = 1 AS first_game,
+               COALESCE(o.referral_code, '') <> '' AS has_referral,
+               o.created_at
+        FROM orders o
+        LEFT JOIN users u ON u.user_id = o.user_id
+        WHERE o.order_type = 'deposit' AND o.status = ANY($4::text[])
+    ) d
+    WHERE d.created_at >= $2 AND d.created_at < $3
+"""
+
+PGCOPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+EPOCH = date(1970, 1, 1)
+
+
+# ==================== DATA ====================
+
+@dataclass
+class DepositColumns:
+    """Historical deposits as parallel arrays (index 0 of game_idx = unknown game)"""
+    amount: np.ndarray
+    actual_bonus: np.ndarray
+    game_idx: np.ndarray
+    day: np.ndarray
+    client_pct: np.ndarray
+    first_ever: np.ndarray
+    first_game: np.ndarray
+    has_referral: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+
+def decode_copy_binary(buffer: bytes) -> DepositColumns:
+    """Decode a binary COPY of DEPOSIT_HISTORY_SQL into columns"""
+    if not buffer.startswith(PGCOPY_SIGNATURE):
+        raise ValueError("Not a binary COPY stream")
+    ext_len = struct.unpack_from(">i", buffer, len(PGCOPY_SIGNATURE) + 4)[0]
+    body = memoryview(buffer)[len(PGCOPY_SIGNATURE) + 8 + ext_len:len(buffer) - 2]
+
+    if len(body) % DEPOSIT_RECORD_DTYPE.itemsize:
+        raise ValueError("Unexpected COPY record layout (NULL or variable-width column?)")
+    records = np.frombuffer(body, dtype=DEPOSIT_RECORD_DTYPE)
+    if len(records) and records["nfields"][0] != len(DEPOSIT_FIELDS):
+        raise ValueError("Unexpected COPY field count")
+
+    return DepositColumns(
+        amount=records["amount"].astype(np.float64),
+        actual_bonus=records["actual_bonus"].astype(np.float64),
+        game_idx=records["game_idx"].astype(np.int64),
+        day=records["day"].astype(np.int64),
+        client_pct=records["client_pct"].astype(np.float64),
+        first_ever=records["first_ever"].astype(bool),
+        first_game=records["first_game"].astype(bool),
+        has_referral=records["has_referral"].astype(bool),
+    )
+
+
+async def load_deposit_columns(
+    game_names: Sequence[str],
+    start: datetime,
+    end: datetime
+) -> DepositColumns:
+    """Stream deposits created in [start, end) into NumPy columns"""
+    pool = await get_pool()
+    out = io.BytesIO()
+    async with pool.acquire() as conn:
+        await conn.copy_from_query(
+            DEPOSIT_HISTORY_SQL, list(game_names), start, end, COMPLETED_DEPOSIT_STATUSES,
+            output=out, format="binary"
+        )
+    return decode_copy_binary(out.getvalue())
+
+
+# ==================== SCENARIO ====================
+
+def _cap(value) -> float:
+    # calculate_deposit_bonus treats a missing / zero max_bonus as "no cap"
+    return float(value) if value else math.inf
+
+
+@dataclass
+class BonusScenario:
+    """Candidate global bonus settings + per-game bonus_rules"""
+    signup_bonus: float
+    default_deposit_bonus: float
+    default_referral_bonus: float
+    game_bonus_rules: Dict[str, Dict[str, Any]]
+
+    @classmethod
+    def from_snapshot(cls, snapshot: RulesSnapshot, overrides: Optional[Dict[str, Any]] = None) -> "BonusScenario":
+        """
+        Current rules with overrides applied. Overrides:
+            signup_bonus / default_deposit_bonus / default_referral_bonus: percent
+            games: {game_name: {"bonus_rules": {"default": {...}, "first_deposit": {...}}}}
+                   (merged per rule key; a null rule removes it)
+        """
+        overrides = overrides or {}
+        settings = snapshot.system_settings
+
+        game_rules = {
+            name.lower(): dict(rules.get('bonus_rules') or {})
+            for name, rules in snapshot.games.items()
+        }
+        for name, game_override in (overrides.get('games') or {}).items():
+            rules = game_rules.setdefault(name.lower(), {})
+            for key, rule in (game_override.get('bonus_rules') or {}).items():
+                if rule is None:
+                    rules.pop(key, None)
+                else:
+                    rules[key] = rule
+
+        def pick(key: str, default: float) -> float:
+            value = overrides.get(key)
+            if value is None:
+                value = settings.get(key, default)
+            return float(value or 0)
+
+        return cls(
+            signup_bonus=pick('signup_bonus', 0.0),
+            default_deposit_bonus=pick('default_deposit_bonus', 0.0),
+            default_referral_bonus=pick('default_referral_bonus', 5.0),
+            game_bonus_rules=game_rules,
+        )
+
+    def game_parameters(self, game_names: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Per-game rule parameters indexed like DepositColumns.game_idx"""
+        size = len(game_names) + 1
+        params = {
+            key: np.zeros(size) for key in
+            ("first_pct", "first_flat", "default_pct", "default_flat")
+        }
+        params["first_cap"] = np.full(size, math.inf)
+        params["default_cap"] = np.full(size, math.inf)
+        params["has_first"] = np.zeros(size, dtype=bool)
+        params["has_default"] = np.zeros(size, dtype=bool)
+
+        for i, name in enumerate(game_names, start=1):
+            rules = self.game_bonus_rules.get(name) or {}
+            for rule_key, prefix in (("first_deposit", "first"), ("default", "default")):
+                rule = rules.get(rule_key)
+                if rule is None:
+                    continue
+                params[f"has_{prefix}"][i] = True
+                params[f"{prefix}_pct"][i] = float(rule.get('percent_bonus', 0) or 0)
+                params[f"{prefix}_flat"][i] = float(rule.get('flat_bonus', 0) or 0)
+                params[f"{prefix}_cap"][i] = _cap(rule.get('max_bonus'))
+        return params
+
+
+# ==================== SIMULATION ====================
+
+def simulate_bonus(columns: DepositColumns, scenario: BonusScenario, game_names: Sequence[str]) -> np.ndarray:
+    """Bonus each deposit would have received under the scenario (vectorized)"""
+    amount = columns.amount
+    gi = columns.game_idx
+    p = scenario.game_parameters(game_names)
+
+    first_rule = columns.first_game & p["has_first"][gi]
+    default_rule = ~first_rule & p["has_default"][gi]
+
+    first_bonus = np.minimum(amount * p["first_pct"][gi] / 100 + p["first_flat"][gi], p["first_cap"][gi])
+    default_bonus = np.minimum(amount * p["default_pct"][gi] / 100 + p["default_flat"][gi], p["default_cap"][gi])
+    system_bonus = amount * scenario.default_deposit_bonus / 100
+
+    game_bonus = np.where(first_rule, first_bonus, np.where(default_rule, default_bonus, system_bonus))
+    # A client override replaces the game/system deposit bonus
+    has_client = columns.client_pct > 0
+    bonus = np.where(has_client, amount * columns.client_pct / 100, game_bonus)
+
+    if scenario.signup_bonus > 0:
+        bonus = bonus + np.where(columns.first_ever, amount * scenario.signup_bonus / 100, 0.0)
+    if scenario.default_referral_bonus > 0:
+        bonus = bonus + np.where(columns.has_referral, amount * scenario.default_referral_bonus / 100, 0.0)
+
+    # Deposits for games that no longer exist get nothing (as in calculate_deposit_bonus)
+    return np.where(gi > 0, bonus, 0.0)
+
+
+def _round(value: float) -> float:
+    return round(float(value), 2)
+
+
+def build_report(
+    columns: DepositColumns,
+    simulated: np.ndarray,
+    game_names: Sequence[str]
+) -> Dict[str, Any]:
+    """Aggregate actual vs simulated bonus per game and per game/day"""
+    labels = ["(unknown)"] + list(game_names)
+    n_games = len(labels)
+
+    by_game_counts = np.bincount(columns.game_idx, minlength=n_games)
+    by_game = {
+        "deposits": np.bincount(columns.game_idx, weights=columns.amount, minlength=n_games),
+        "actual": np.bincount(columns.game_idx, weights=columns.actual_bonus, minlength=n_games),
+        "simulated": np.bincount(columns.game_idx, weights=simulated, minlength=n_games),
+    }
+
+    game_rows = [
+        {
+            "game_name": labels[g],
+            "orders": int(by_game_counts[g]),
+            "deposit_volume": _round(by_game["deposits"][g]),
+            "actual_bonus": _round(by_game["actual"][g]),
+            "simulated_bonus": _round(by_game["simulated"][g]),
+            "delta": _round(by_game["simulated"][g] - by_game["actual"][g]),
+        }
+        for g in np.nonzero(by_game_counts)[0]
+    ]
+
+    day_rows = []
+    if len(columns):
+        day0 = int(columns.day.min())
+        n_days = int(columns.day.max()) - day0 + 1
+        key = columns.game_idx * n_days + (columns.day - day0)
+        size = n_games * n_days
+        counts = np.bincount(key, minlength=size)
+        deposits = np.bincount(key, weights=columns.amount, minlength=size)
+        actual = np.bincount(key, weights=columns.actual_bonus, minlength=size)
+        sim = np.bincount(key, weights=simulated, minlength=size)
+        for k in np.nonzero(counts)[0]:
+            g, d = divmod(int(k), n_days)
+            day_rows.append({
+                "game_name": labels[g],
+                "date": (EPOCH + timedelta(days=day0 + d)).isoformat(),
+                "orders": int(counts[k]),
+                "deposit_volume": _round(deposits[k]),
+                "actual_bonus": _round(actual[k]),
+                "simulated_bonus": _round(sim[k]),
+            })
+
+    actual_total = float(columns.actual_bonus.sum())
+    simulated_total = float(simulated.sum())
+    return {
+        "orders": len(columns),
+        "totals": {
+            "deposit_volume": _round(columns.amount.sum()),
+            "actual_bonus": _round(actual_total),
+            "simulated_bonus": _round(simulated_total),
+            "delta": _round(simulated_total - actual_total),
+        },
+        "by_game": game_rows,
+        "by_game_day": day_rows,
+    }
+
+
+async def run_bonus_simulation(
+    start: datetime,
+    end: datetime,
+    overrides: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Simulate candidate bonus rules over deposits created in [start, end)"""
+    started = time.perf_counter()
+    snapshot = await get_rules_snapshot()
+    game_names = sorted(name.lower() for name in snapshot.games)
+    scenario = BonusScenario.from_snapshot(snapshot, overrides)
+
+    columns = await load_deposit_columns(game_names, start, end)
+    loaded = time.perf_counter()
+    simulated = simulate_bonus(columns, scenario, game_names)
+    report = build_report(columns, simulated, game_names)
+    finished = time.perf_counter()
+
+    report.update({
+        "period": {"start": start.isoformat(), "end": end.isoformat()},
+        "rules_version": snapshot.version,
+        "scenario": {
+            "signup_bonus": scenario.signup_bonus,
+            "default_deposit_bonus": scenario.default_deposit_bonus,
+            "default_referral_bonus": scenario.default_referral_bonus,
+            "game_bonus_rules": scenario.game_bonus_rules,
+        },
+        "approximations": [
+            "referral perks modelled as default_referral_bonus percent",
+            "client overrides use the current users.bonus_percentage",
+        ],
+        "timing_ms": {
+            "load": round((loaded - started) * 1000, 1),
+            "simulate": round((finished - loaded) * 1000, 1),
+        },
+    })
+    return report
+
+
+# ==================== CLI ====================
+
+def _parse_day(value: str) -> datetime:
+    return datetime.combine(date.fromisoformat(value), datetime.min.time(), tzinfo=timezone.utc)
+
+
+async def _main(argv: Optional[List[str]] = None):
+    import argparse
+    from ..core.database import init_api_v1_db, close_api_v1_db
+
+    parser = argparse.ArgumentParser(description="Simulate bonus rules over historical deposits")
+    parser.add_argument("--start", required=True, help="First day (YYYY-MM-DD, UTC)")
+    parser.add_argument("--end", required=True, help="Day after the last day (YYYY-MM-DD, UTC)")
+    parser.add_argument("--scenario", help="JSON file with rule overrides")
+    parser.add_argument("--by-day", action="store_true", help="Include the per game/day breakdown")
+    args = parser.parse_args(argv)
+
+    overrides = None
+    if args.scenario:
+        with open(args.scenario) as f:
+            overrides = json.load(f)
+
+    try:
+        await init_api_v1_db()
+        report = await run_bonus_simulation(_parse_day(args.start), _parse_day(args.end), overrides)
+    finally:
+        await close_api_v1_db()
+
+    if not args.by_day:
+        report.pop("by_game_day")
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(_main())
@@ -0,0 +1,339 @@
+"""
+Cashout Service - Batch cashout / void evaluation
+
+Evaluates the withdrawal rules of resolve_withdrawal_rules() for many users
+at once: one query loads balances, the last approved deposit and client
+multiplier overrides for every requested user, then payout / void /
+consumption amounts are computed with NumPy array math.
+
+Used by:
+- Portal cashout preview and bonus progress (a batch of one)
+- Admin cashout exposure: "what if everyone cashed out now" in one pass
+
+Multipliers resolve CLIENT > GAME > GLOBAL exactly as in rules_service;
+game and global rules come from the cached RulesSnapshot.
+"""
+import math
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Sequence
+
+import numpy as np
+
+from ..core.database import fetch_all
+from .rules_service import get_rules_snapshot, RulesSnapshot
+
+# Block reasons, in the order resolve_withdrawal_rules checks them
+BLOCK_NONE = 0
+BLOCK_LOCKED = 1
+BLOCK_NO_BALANCE = 2
+BLOCK_NO_DEPOSIT = 3
+BLOCK_BELOW_MIN = 4
+
+BLOCK_ERROR_CODES = {
+    BLOCK_LOCKED: 'E3012',
+    BLOCK_NO_BALANCE: 'E3013',
+    BLOCK_NO_DEPOSIT: 'E3014',
+    BLOCK_BELOW_MIN: 'E3015',
+}
+
+BLOCK_LABELS = {
+    BLOCK_LOCKED: 'withdraw_locked',
+    BLOCK_NO_BALANCE: 'no_balance',
+    BLOCK_NO_DEPOSIT: 'no_deposit',
+    BLOCK_BELOW_MIN: 'below_min_cashout',
+}
+
+# {where} selects the users; $1 = user_ids (when used), $2 = game_name or NULL (any game)
+CASHOUT_INPUTS_SQL = """
+    SELECT u.user_id,
+           COALESCE(u.real_balance, 0)::float8 AS real_balance,
+           COALESCE(u.bonus_balance, 0)::float8 AS bonus_balance,
+           COALESCE(u.withdraw_locked, FALSE) AS withdraw_locked,
+           ld.order_id AS last_deposit_order_id,
+           ld.amount AS last_deposit_amount,
+           ld.game_name AS last_deposit_game,
+           cr.min_multiplier AS client_min_multiplier,
+           cr.max_multiplier AS client_max_multiplier
+    FROM users u
+    LEFT JOIN LATERAL (
+        SELECT o.order_id, o.amount, LOWER(o.game_name) AS game_name
+        FROM orders o
+        WHERE o.user_id = u.user_id AND ($2::text IS NULL OR o.game_name = $2::text)
+          AND o.order_type = 'deposit' AND o.status = 'APPROVED_EXECUTED'
+        ORDER BY o.approved_at DESC
+        LIMIT 1
+    ) ld ON TRUE
+    LEFT JOIN LATERAL (
+        -- resolve_withdrawal_rules applies client rules in priority DESC order,
+        -- so the lowest-priority rule that sets a multiplier wins
+        SELECT (array_agg((r.conditions->>'min_multiplier_of_deposit')::float8 ORDER BY r.priority)
+                    FILTER (WHERE r.conditions ? 'min_multiplier_of_deposit'))[1] AS min_multiplier,
+               (array_agg((r.conditions->>'max_multiplier_of_deposit')::float8 ORDER BY r.priority)
+                    FILTER (WHERE r.conditions ? 'max_multiplier_of_deposit'))[1] AS max_multiplier
+        FROM rules r
+        WHERE r.scope = 'client' AND r.scope_id = u.user_id
+          AND r.is_active = TRUE AND r.rule_type = 'withdrawal'
+    ) cr ON TRUE
+    WHERE {where}
+"""
+
+
+@dataclass
+class CashoutBatch:
+    """Per-user inputs as parallel arrays (NaN = missing)"""
+    user_ids: List[str]
+    real_balance: np.ndarray
+    bonus_balance: np.ndarray
+    withdraw_locked: np.ndarray
+    last_deposit: np.ndarray
+    last_deposit_order_ids: List[Optional[str]]
+    last_deposit_games: List[Optional[str]]
+    client_min_multiplier: np.ndarray
+    client_max_multiplier: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+
+@dataclass
+class CashoutResult:
+    """Evaluated cashouts, aligned with the CashoutBatch"""
+    block: np.ndarray
+    total_balance: np.ndarray
+    min_multiplier: np.ndarray
+    max_multiplier: np.ndarray
+    min_cashout: np.ndarray
+    max_cashout: np.ndarray
+    payout: np.ndarray
+    void: np.ndarray
+    cash_consumed: np.ndarray
+    bonus_consumed: np.ndarray
+    cash_voided: np.ndarray
+    bonus_voided: np.ndarray
+
+
+def _float_column(rows: Sequence[Dict[str, Any]], key: str) -> np.ndarray:
+    return np.fromiter(
+        (math.nan if r[key] is None else float(r[key]) for r in rows),
+        dtype=np.float64, count=len(rows)
+    )
+
+
+async def load_cashout_batch(
+    user_ids: Optional[Sequence[str]] = None,
+    game_name: Optional[str] = None
+) -> CashoutBatch:
+    """
+    Load cashout inputs in one query.
+
+    Args:
+        user_ids: Users to evaluate; None = every user holding a balance
+        game_name: Use the last deposit for this game; None = last deposit on any game
+    """
+    if user_ids is not None:
+        where = "u.user_id = ANY($1::text[])"
+        args = (list(user_ids), game_name.lower() if game_name else None)
+    else:
+        where = "COALESCE(u.real_balance, 0) + COALESCE(u.bonus_balance, 0) > 0 AND $1::text[] IS NULL"
+        args = (None, game_name.lower() if game_name else None)
+
+    rows = await fetch_all(CASHOUT_INPUTS_SQL.format(where=where), *args)
+
+    return CashoutBatch(
+        user_ids=[r['user_id'] for r in rows],
+        real_balance=_float_column(rows, 'real_balance'),
+        bonus_balance=_float_column(rows, 'bonus_balance'),
+        withdraw_locked=np.fromiter((bool(r['withdraw_locked']) for r in rows), dtype=bool, count=len(rows)),
+        last_deposit=_float_column(rows, 'last_deposit_amount'),
+        last_deposit_order_ids=[r['last_deposit_order_id'] for r in rows],
+        last_deposit_games=[r['last_deposit_game'] for r in rows],
+        client_min_multiplier=_float_column(rows, 'client_min_multiplier'),
+        client_max_multiplier=_float_column(rows, 'client_max_multiplier'),
+    )
+
+
+def _game_multipliers(snapshot: RulesSnapshot, game_names: Sequence[str]):
+    """GAME > GLOBAL multipliers per game; index 0 = global only"""
+    global_min = float(snapshot.system_settings.get('min_cashout_multiplier', 1.0))
+    global_max = float(snapshot.system_settings.get('max_cashout_multiplier', 3.0))
+    mins = np.full(len(game_names) + 1, global_min)
+    maxs = np.full(len(game_names) + 1, global_max)
+    for i, name in enumerate(game_names, start=1):
+        game = snapshot.game(name)
+        withdrawal_rules = game.get('withdrawal_rules', {}) if game else {}
+        if withdrawal_rules:
+            mins[i] = float(withdrawal_rules.get('min_multiplier_of_deposit', global_min))
+            maxs[i] = float(withdrawal_rules.get('max_multiplier_of_deposit', global_max))
+    return mins, maxs
+
+
+def evaluate_cashouts(batch: CashoutBatch, snapshot: RulesSnapshot) -> CashoutResult:
+    """Vectorized resolve_withdrawal_rules() payout / void calculation"""
+    game_names = sorted({g for g in batch.last_deposit_games if g})
+    game_index = {name: i for i, name in enumerate(game_names, start=1)}
+    gi = np.fromiter((game_index.get(g, 0) for g in batch.last_deposit_games), dtype=np.int64, count=len(batch))
+    game_min, game_max = _game_multipliers(snapshot, game_names)
+
+    # CLIENT > GAME > GLOBAL
+    min_mult = np.where(np.isnan(batch.client_min_multiplier), game_min[gi], batch.client_min_multiplier)
+    max_mult = np.where(np.isnan(batch.client_max_multiplier), game_max[gi], batch.client_max_multiplier)
+
+    real = batch.real_balance
+    bonus = batch.bonus_balance
+    total = real + bonus
+    has_deposit = ~np.isnan(batch.last_deposit)
+    deposit = np.where(has_deposit, batch.last_deposit, 0.0)
+
+    min_cashout = deposit * min_mult
+    max_cashout = deposit * max_mult
+
+    block = np.select(
+        [batch.withdraw_locked, total <= 0, ~has_deposit, total < min_cashout],
+        [BLOCK_LOCKED, BLOCK_NO_BALANCE, BLOCK_NO_DEPOSIT, BLOCK_BELOW_MIN],
+        default=BLOCK_NONE
+    )
+
+    # MANDATORY: ALL balance is redeemed - payout up to max, the rest is voided
+    payout = np.minimum(total, max_cashout)
+    void = np.maximum(0.0, total - max_cashout)
+    # CASH first, then BONUS; excess is voided from bonus first
+    cash_consumed = np.minimum(real, payout)
+    bonus_consumed = payout - cash_consumed
+    bonus_voided = np.where(void > 0, np.minimum(bonus - bonus_consumed, void), 0.0)
+    cash_voided = np.where(void > bonus_voided, void - bonus_voided, 0.0)
+
+    return CashoutResult(
+        block=block,
+        total_balance=total,
+        min_multiplier=min_mult,
+        max_multiplier=max_mult,
+        min_cashout=min_cashout,
+        max_cashout=max_cashout,
+        payout=payout,
+        void=void,
+        cash_consumed=cash_consumed,
+        bonus_consumed=bonus_consumed,
+        cash_voided=cash_voided,
+        bonus_voided=bonus_voided,
+    )
+
+
+def _block_message(block: int, total: float, min_cashout: float, min_mult: float, deposit: float) -> str:
+    if block == BLOCK_LOCKED:
+        return 'Withdrawals are locked for this account'
+    if block == BLOCK_NO_BALANCE:
+        return 'No balance available for withdrawal'
+    if block == BLOCK_NO_DEPOSIT:
+        return 'No approved deposit found for this game. You must deposit first.'
+    return (f'Balance ${total:.2f} is below minimum cashout ${min_cashout:.2f} '
+            f'({min_mult}x of last deposit ${deposit:.2f})')
+
+
+def cashout_preview(batch: CashoutBatch, result: CashoutResult, i: int) -> Dict[str, Any]:
+    """One user's evaluation, shaped like resolve_withdrawal_rules() output"""
+    block = int(result.block[i])
+    deposit = float(batch.last_deposit[i]) if not np.isnan(batch.last_deposit[i]) else None
+    min_mult = float(result.min_multiplier[i])
+    max_mult = float(result.max_multiplier[i])
+    total = float(result.total_balance[i])
+
+    preview = {
+        'user_id': batch.user_ids[i],
+        'eligible': block == BLOCK_NONE,
+        'last_deposit_amount': deposit,
+        'last_deposit_order_id': batch.last_deposit_order_ids[i],
+        'min_multiplier': min_mult,
+        'max_multiplier': max_mult,
+        'min_cashout': round(float(result.min_cashout[i]), 2),
+        'max_cashout': round(float(result.max_cashout[i]), 2),
+        'current_balance': {
+            'real': round(float(batch.real_balance[i]), 2),
+            'bonus': round(float(batch.bonus_balance[i]), 2),
+            'total': round(total, 2)
+        },
+    }
+    if block != BLOCK_NONE:
+        preview.update({
+            'error_code': BLOCK_ERROR_CODES[block],
+            'message': _block_message(block, total, float(result.min_cashout[i]), min_mult, deposit or 0.0),
+        })
+        return preview
+
+    void = float(result.void[i])
+    preview['cashout_calculation'] = {
+        'payout_amount': round(float(result.payout[i]), 2),
+        'void_amount': round(void, 2),
+        'void_reason': 'EXCEEDS_MAX_CASHOUT' if void > 0 else None,
+        'cash_consumed': round(float(result.cash_consumed[i]), 2),
+        'bonus_consumed': round(float(result.bonus_consumed[i]), 2),
+        'cash_voided': round(float(result.cash_voided[i]), 2),
+        'bonus_voided': round(float(result.bonus_voided[i]), 2)
+    }
+    return preview
+
+
+async def get_cashout_previews(
+    user_ids: Sequence[str],
+    game_name: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Cashout previews for many users: user_id -> preview.
+    Users that do not exist are left out of the result.
+    """
+    snapshot = await get_rules_snapshot()
+    if game_name and not snapshot.game(game_name):
+        return {
+            user_id: {
+                'user_id': user_id,
+                'eligible': False,
+                'message': f"Game '{game_name}' not found",
+                'error_code': 'E3002'
+            }
+            for user_id in user_ids
+        }
+    batch = await load_cashout_batch(user_ids, game_name)
+    result = evaluate_cashouts(batch, snapshot)
+    return {batch.user_ids[i]: cashout_preview(batch, result, i) for i in range(len(batch))}
+
+
+async def get_cashout_exposure() -> Dict[str, Any]:
+    """
+    "What if everyone cashed out now": evaluates every user holding a balance
+    against their last deposit (any game) and sums payouts and voids.
+    """
+    snapshot = await get_rules_snapshot()
+    batch = await load_cashout_batch()
+    result = evaluate_cashouts(batch, snapshot)
+
+    eligible = result.block == BLOCK_NONE
+    blocked_counts = np.bincount(result.block, minlength=len(BLOCK_LABELS) + 1)
+    blocked_balance = np.bincount(result.block, weights=result.total_balance, minlength=len(BLOCK_LABELS) + 1)
+
+    by_game: Dict[str, Dict[str, float]] = {}
+    games = np.array([g or '(none)' for g in batch.last_deposit_games], dtype=object)
+    for name in sorted(set(games[eligible])):
+        mask = eligible & (games == name)
+        by_game[name] = {
+            'users': int(mask.sum()),
+            'payout': round(float(result.payout[mask].sum()), 2),
+            'void': round(float(result.void[mask].sum()), 2),
+        }
+
+    return {
+        'users_with_balance': len(batch),
+        'total_balance': round(float(result.total_balance.sum()), 2),
+        'eligible_users': int(eligible.sum()),
+        'payout_exposure': round(float(result.payout[eligible].sum()), 2),
+        'cash_payout': round(float(result.cash_consumed[eligible].sum()), 2),
+        'bonus_payout': round(float(result.bonus_consumed[eligible].sum()), 2),
+        'void_amount': round(float(result.void[eligible].sum()), 2),
+        'blocked': {
+            label: {
+                'users': int(blocked_counts[code]),
+                'balance': round(float(blocked_balance[code]), 2)
+            }
+            for code, label in BLOCK_LABELS.items()
+        },
+        'by_game': by_game,
+        'rules_version': snapshot.version,
+    }
@@ -0,0 +1,315 @@
+"""
+Game Transfer Service - Reserve -> Games API -> settle for game loads/redeems
+
+Games API calls can take up to timeout x retries, so no pooled connection (and
+no money lock) is held while they run:
+
+1. Reserve: a short transaction under the user's money lock validates, moves
+   the wallet side (loads debit the wallet up front) and writes a 'pending'
+   game_loads row with reserved_until = NOW() + game_transfer_reservation_seconds
+2. Call the Games API with no connection checked out
+3. Settle: claim the pending row (pending -> completed, guarded) and apply the
+   game side, or fail it and compensate (loads are refunded to the wallet)
+
+Only one transfer may be pending per game account, so a redeem can never
+zero out a load that is still in flight.
+
+The sweeper releases reservations whose window expired (the process died
+mid-saga). The window is longer than the worst-case Games API call, so a
+live request has always finished by then; every expiry and every settlement
+that arrives after its reservation was released is written to audit_logs
+(game_transfer.expired / game_transfer.late_settle) for reconciliation.
+"""
+import asyncio
+import json
+import uuid
+import logging
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+from ..core.config import get_api_settings
+from ..core.database import fetch_one, fetch_all, execute
+from ..core.money_ops import money_executor
+
+logger = logging.getLogger(__name__)
+settings = get_api_settings()
+
+TRANSFER_LOAD = "load"
+TRANSFER_REDEEM = "redeem"
+
+
+async def has_pending_transfer(conn, account_id: str) -> bool:
+    """Check for an in-flight transfer on a game account (call under the money lock)"""
+    return bool(await conn.fetchval("""
+        SELECT EXISTS (
+            SELECT 1 FROM game_loads WHERE account_id = $1 AND status = 'pending'
+        )
+    """, account_id))
+
+
+async def reserve_game_load(
+    conn,
+    load_id: str,
+    user_id: str,
+    game: Dict[str, Any],
+    amount: float,
+    description: str,
+    account_id: Optional[str] = None,
+    game_balance_before: Optional[float] = None,
+    idempotency_key: Optional[str] = None,
+    ip_address: Optional[str] = None
+) -> Optional[float]:
+    """
+    Debit the wallet and write a pending game load (caller holds the money lock).
+
+    Returns:
+        New wallet balance, or None if the wallet cannot cover the amount
+    """
+    new_balance = await conn.fetchval("""
+        UPDATE users SET real_balance = real_balance - $1, updated_at = NOW()
+        WHERE user_id = $2 AND real_balance >= $1
+        RETURNING real_balance
+    """, amount, user_id)
+    if new_balance is None:
+        return None
+    new_balance = float(new_balance)
+    balance_before = new_balance + amount
+
+    await conn.execute("""
+        INSERT INTO game_loads (
+            load_id, user_id, game_id, game_name, amount,
+            wallet_balance_before, wallet_balance_after, status, transfer_type,
+            account_id, game_balance_before, idempotency_key, ip_address,
+            reserved_until, created_at
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, 'pending', 'load', $8, $9, $10, $11,
+                  NOW() + make_interval(secs => $12), NOW())
+    """, load_id, user_id, game['game_id'], game['game_name'], amount,
+        balance_before, new_balance, account_id, game_balance_before,
+        idempotency_key, ip_address, float(settings.game_transfer_reservation_seconds))
+
+    await conn.execute("""
+        INSERT INTO wallet_ledger (
+            ledger_id, user_id, transaction_type, amount,
+            balance_before, balance_after, reference_type,
+            reference_id, description, created_at
+        ) VALUES ($1, $2, 'debit', $3, $4, $5, 'game_load', $6, $7, NOW())
+    """, str(uuid.uuid4()), user_id, amount, balance_before, new_balance,
+        load_id, description)
+
+    return new_balance
+
+
+async def reserve_game_redeem(
+    conn,
+    redeem_id: str,
+    user_id: str,
+    game: Dict[str, Any],
+    account_id: str,
+    amount: float,
+    game_balance_before: float,
+    wallet_balance: float,
+    details: Dict[str, Any]
+):
+    """
+    Write a pending game redeem (caller holds the money lock). Nothing moves
+    in the wallet until settlement.
+    """
+    await conn.execute("""
+        INSERT INTO game_loads (
+            load_id, user_id, game_id, game_name, amount,
+            wallet_balance_before, wallet_balance_after, status, transfer_type,
+            account_id, game_balance_before, transfer_details,
+            reserved_until, created_at
+        ) VALUES ($1, $2, $3, $4, $5, $6, $6, 'pending', 'redeem', $7, $8, $9,
+                  NOW() + make_interval(secs => $10), NOW())
+    """, redeem_id, user_id, game['game_id'], game['game_name'], amount,
+        wallet_balance, account_id, game_balance_before, json.dumps(details),
+        float(settings.game_transfer_reservation_seconds))
+
+
+async def claim_game_transfer(
+    conn,
+    transfer_id: str,
+    api_response: Dict[str, Any],
+    game_balance_after: Optional[float] = None,
+    wallet_balance_after: Optional[float] = None
+):
+    """
+    Mark a pending transfer completed inside the caller's transaction.
+
+    Returns:
+        The game_loads row, or None if the reservation is no longer pending
+        (already settled, or released by the sweeper)
+    """
+    row = await conn.fetchrow("""
+        UPDATE game_loads
+        SET status = 'completed',
+            game_credentials = $2::jsonb,
+            game_balance_after = COALESCE($3, game_balance_after),
+            wallet_balance_after = COALESCE($4, wallet_balance_after),
+            settled_at = NOW()
+        WHERE load_id = $1 AND status = 'pending'
+        RETURNING load_id, user_id, account_id, amount, transfer_type
+    """, transfer_id, json.dumps(api_response), game_balance_after, wallet_balance_after)
+
+    if row is None:
+        await _record_late_settle(transfer_id, api_response)
+    return row
+
+
+async def settle_game_load(
+    transfer_id: str,
+    user_id: str,
+    api_response: Dict[str, Any],
+    game_balance_after: Optional[float] = None,
+    on_settled: Optional[Callable[[Any], Awaitable[None]]] = None
+) -> bool:
+    """
+    Complete a load after a successful recharge (credits the game account, if any).
+
+    on_settled(conn) runs inside the settle transaction once the reservation is
+    claimed - use it to queue notifications that must commit with the load.
+    """
+    async with money_executor.user_transaction(user_id) as conn:
+        row = await claim_game_transfer(conn, transfer_id, api_response, game_balance_after)
+        if row is None:
+            return False
+        if row['account_id']:
+            await conn.execute("""
+                UPDATE game_accounts SET balance = balance + $1, updated_at = NOW()
+                WHERE account_id = $2
+            """, row['amount'], row['account_id'])
+        if on_settled is not None:
+            await on_settled(conn)
+    return True
+
+
+async def fail_game_transfer(
+    transfer_id: str,
+    user_id: str,
+    error: str,
+    status: str = "failed"
+) -> bool:
+    """
+    Release a pending transfer. Loads are refunded to the wallet.
+
+    Returns:
+        True if this call released the reservation
+    """
+    async with money_executor.user_transaction(user_id) as conn:
+        row = await conn.fetchrow("""
+            UPDATE game_loads
+            SET status = $2, last_error = $3, settled_at = NOW()
+            WHERE load_id = $1 AND status = 'pending'
+            RETURNING load_id, user_id, game_name, amount, transfer_type
+        """, transfer_id, status, error[:2000])
+        if row is None:
+            return False
+
+        if row['transfer_type'] == TRANSFER_LOAD:
+            amount = float(row['amount'])
+            new_balance = float(await conn.fetchval("""
+                UPDATE users SET real_balance = real_balance + $1, updated_at = NOW()
+                WHERE user_id = $2
+                RETURNING real_balance
+            """, amount, user_id))
+            await conn.execute("""
+                INSERT INTO wallet_ledger (
+                    ledger_id, user_id, transaction_type, amount,
+                    balance_before, balance_after, reference_type,
+                    reference_id, description, created_at
+                ) VALUES ($1, $2, 'credit', $3, $4, $5, 'game_load_reversal', $6, $7, NOW())
+            """, str(uuid.uuid4()), user_id, amount, new_balance - amount, new_balance,
+                transfer_id, f"Game load reversed ({status}): {row['game_name']}")
+
+        if status == "expired":
+            await conn.execute("""
+                INSERT INTO audit_logs (log_id, user_id, action, resource_type, resource_id, details, created_at)
+                VALUES ($1, $2, 'game_transfer.expired', 'game_load', $3, $4, NOW())
+            """, str(uuid.uuid4()), user_id, transfer_id,
+                json.dumps({"transfer_type": row['transfer_type'], "amount": float(row['amount']),
+                            "error": error, "needs_reconciliation": True}))
+    return True
+
+
+async def _record_late_settle(transfer_id: str, api_response: Dict[str, Any]):
+    """The Games API succeeded after the reservation was released - flag it"""
+    logger.error(f"Game transfer {transfer_id} settled after its reservation was released")
+    try:
+        row = await fetch_one("SELECT user_id, status FROM game_loads WHERE load_id = $1", transfer_id)
+        await execute("""
+            INSERT INTO audit_logs (log_id, user_id, action, resource_type, resource_id, details, created_at)
+            VALUES ($1, $2, 'game_transfer.late_settle', 'game_load', $3, $4, NOW())
+        """, str(uuid.uuid4()), row['user_id'] if row else None, transfer_id,
+            json.dumps({"status": row['status'] if row else None,
+                        "api_response": api_response, "needs_reconciliation": True}))
+    except Exception as e:
+        logger.error(f"Failed to record late settlement of {transfer_id}: {e}")
+
+
+class GameTransferSweeper:
+    """
+    Background task that releases expired game transfer reservations.
+    Rows are claimed with the same guarded UPDATE as settlement, so sweepers
+    in several worker processes never release a reservation twice.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info("Game transfer sweeper started")
+
+    async def stop(self):
+        if not self.is_running:
+            return
+        self._stopping = True
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Game transfer sweeper stopped")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Game transfer sweep error: {e}")
+            await asyncio.sleep(settings.game_transfer_sweep_seconds)
+
+    async def sweep(self) -> int:
+        """Release every expired reservation. Returns the number released."""
+        stale = await fetch_all("""
+            SELECT load_id, user_id FROM game_loads
+            WHERE status = 'pending' AND reserved_until < NOW()
+            ORDER BY reserved_until
+            LIMIT 100
+        """)
+        released = 0
+        for row in stale:
+            try:
+                if await fail_game_transfer(
+                    row['load_id'], row['user_id'],
+                    "Reservation expired before settlement", status="expired"
+                ):
+                    released += 1
+            except Exception as e:
+                logger.error(f"Failed to release game transfer {row['load_id']}: {e}")
+        if released:
+            logger.warning(f"Released {released} expired game transfer reservation(s)")
+        return released
+
+
+# Process-wide sweeper
+game_transfer_sweeper = GameTransferSweeper()
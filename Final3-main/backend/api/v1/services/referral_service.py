@@ -8,6 +8,7 @@ from typing import Optional, Dict, Any, List, Tuple
 from ..core.database import fetch_one, fetch_all, execute
 from ..core.config import ErrorCodes
 from ..models import ReferralPerk
+from .rules_service import invalidate_rules_snapshot
 
 
 async def validate_referral_code(
@@ -153,9 +154,13 @@ async def get_best_perk_for_order(
 async def increment_perk_usage(perk_id: str):
     """Increment the usage counter for a perk"""
     if perk_id:
-        await execute('''
+        perk = await fetch_one('''
             UPDATE referral_perks SET current_uses = current_uses + 1 WHERE perk_id = $1
+            RETURNING current_uses, max_uses
         ''', perk_id)
+        # The rules snapshot only needs to drop perks that just ran out of uses
+        if perk and perk['max_uses'] is not None and perk['current_uses'] >= perk['max_uses']:
+            await invalidate_rules_snapshot()
 
 
 async def check_referral_eligibility(
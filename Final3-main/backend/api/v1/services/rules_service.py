@@ -2,13 +2,27 @@
 API v1 Rules Service
 AUTHORITATIVE Rules Engine with CLIENT > GAME > GLOBAL priority
 Handles deposit rules, withdrawal/cashout rules, and bonus calculations
+
+Global settings, every game's parsed deposit/withdrawal/bonus rules and the
+active referral perks are held in an immutable, versioned RulesSnapshot. It
+is built once (three queries), swapped atomically when admins edit rules,
+games or perks, and shared by all evaluations - only per-user data is
+fetched per request.
 """
+import copy
 import json
-from typing import Optional, Dict, Any, Tuple, List
+import asyncio
+import logging
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Tuple, List, Mapping
 from datetime import datetime, timezone
 from decimal import Decimal, ROUND_DOWN
 
 from ..core.database import fetch_one, fetch_all, execute
+from ..core.cache_invalidation import invalidation_bus
+
+logger = logging.getLogger(__name__)
 
 
 # ==================== RULE PRIORITY CONSTANTS ====================
@@ -18,101 +32,272 @@ SCOPE_PRIORITY = {
     'global': 0      # Lowest priority (fallback)
 }
 
+# Used when system_settings has no 'global' row
+DEFAULT_SYSTEM_SETTINGS = {
+    'signup_bonus': 0.0,
+    'default_deposit_bonus': 0.0,
+    'default_referral_bonus': 5.0,
+    'deposit_block_balance': 5.0,  # Block deposits if game balance > $5
+    'min_cashout_multiplier': 1.0,
+    'max_cashout_multiplier': 3.0,
+    'auto_approve_deposits': False,
+    'auto_approve_withdrawals': False
+}
 
-# ==================== HELPER FUNCTIONS ====================
 
-async def get_system_settings() -> Dict[str, Any]:
-    """Get global system settings"""
-    settings = await fetch_one("SELECT * FROM system_settings WHERE id = 'global'")
-    if not settings:
-        return {
-            'signup_bonus': 0.0,
-            'default_deposit_bonus': 0.0,
-            'default_referral_bonus': 5.0,
-            'deposit_block_balance': 5.0,  # Block deposits if game balance > $5
-            'min_cashout_multiplier': 1.0,
-            'max_cashout_multiplier': 3.0,
-            'auto_approve_deposits': False,
-            'auto_approve_withdrawals': False
-        }
-    return settings
+# ==================== RULES SNAPSHOT ====================
 
+# LISTEN/NOTIFY channel for system_settings / games / referral_perks writes
+RULES_SNAPSHOT_CHANNEL = "rules_snapshot"
 
-async def get_game_rules(game_name: str) -> Dict[str, Any]:
-    """Get game-specific rules"""
-    game = await fetch_one(
-        "SELECT * FROM games WHERE game_name = $1",
-        game_name.lower()
-    )
-    if not game:
-        return None
-    
-    deposit_rules = game.get('deposit_rules', {})
-    if isinstance(deposit_rules, str):
-        deposit_rules = json.loads(deposit_rules)
-    
-    withdrawal_rules = game.get('withdrawal_rules', {})
-    if isinstance(withdrawal_rules, str):
-        withdrawal_rules = json.loads(withdrawal_rules)
-    
-    bonus_rules = game.get('bonus_rules', {})
-    if isinstance(bonus_rules, str):
-        bonus_rules = json.loads(bonus_rules)
-    
-    return {
+
+def _parse_rules(value) -> Dict[str, Any]:
+    if isinstance(value, str):
+        return json.loads(value)
+    return value or {}
+
+
+def _build_game_rules(game: Dict[str, Any]) -> Mapping[str, Any]:
+    return MappingProxyType({
         'game_id': game['game_id'],
         'game_name': game['game_name'],
         'display_name': game['display_name'],
+        'is_active': game.get('is_active', True),
         'min_deposit_amount': game.get('min_deposit_amount', 10.0),
         'max_deposit_amount': game.get('max_deposit_amount', 10000.0),
         'min_withdrawal_amount': game.get('min_withdrawal_amount', 20.0),
         'max_withdrawal_amount': game.get('max_withdrawal_amount', 10000.0),
-        'deposit_rules': deposit_rules,
-        'withdrawal_rules': withdrawal_rules,
-        'bonus_rules': bonus_rules
-    }
+        'deposit_rules': _parse_rules(game.get('deposit_rules', {})),
+        'withdrawal_rules': _parse_rules(game.get('withdrawal_rules', {})),
+        'bonus_rules': _parse_rules(game.get('bonus_rules', {}))
+    })
 
 
-async def get_client_rules(user_id: str) -> Dict[str, Any]:
-    """Get client-specific rules/overrides"""
-    user = await fetch_one(
-        "SELECT user_id, username, bonus_percentage, signup_bonus_claimed, "
-        "deposit_count, total_deposited, total_withdrawn, real_balance, bonus_balance, "
-        "deposit_locked, withdraw_locked FROM users WHERE user_id = $1",
-        user_id
-    )
-    if not user:
+def _build_referral_perks(perks: List[Dict[str, Any]]) -> Mapping[str, Tuple[Mapping[str, Any], ...]]:
+    """Group active perks by referral code, game-specific first, then by percent_bonus"""
+    by_code: Dict[str, List[Mapping[str, Any]]] = {}
+    for perk in perks:
+        by_code.setdefault(perk['referral_code'].upper(), []).append(MappingProxyType(dict(perk)))
+    return MappingProxyType({
+        code: tuple(sorted(
+            code_perks,
+            key=lambda p: (0 if p.get('game_name') else 1, -(p.get('percent_bonus') or 0))
+        ))
+        for code, code_perks in by_code.items()
+    })
+
+
+@dataclass(frozen=True)
+class RulesSnapshot:
+    """Global settings + all games' parsed rules + active referral perks at one point in time (read-only)"""
+    version: int
+    system_settings: Mapping[str, Any]
+    games: Mapping[str, Mapping[str, Any]]  # game_name -> game rules
+    referral_perks: Mapping[str, Tuple[Mapping[str, Any], ...]]  # referral_code -> active perks
+    loaded_at: datetime
+    
+    def game(self, game_name: str) -> Optional[Mapping[str, Any]]:
+        return self.games.get(game_name.lower())
+    
+    def best_referral_perk(
+        self,
+        referral_code: str,
+        game_name: str,
+        amount: float,
+        now: Optional[datetime] = None
+    ) -> Optional[Mapping[str, Any]]:
+        """Best matching perk: game-specific before any-game, then highest percent_bonus"""
+        now = now or datetime.now(timezone.utc)
+        game_name = game_name.lower()
+        for perk in self.referral_perks.get(referral_code.upper(), ()):
+            if perk.get('game_name') and perk['game_name'] != game_name:
+                continue
+            if perk.get('min_amount') is not None and perk['min_amount'] > amount:
+                continue
+            if perk.get('valid_until') is not None and perk['valid_until'] <= now:
+                continue
+            if perk.get('max_uses') is not None and (perk.get('current_uses') or 0) >= perk['max_uses']:
+                continue
+            return perk
         return None
+
+
+class RulesSnapshotStore:
+    """
+    Holds the current RulesSnapshot. Invalidation (local or via LISTEN/NOTIFY
+    from another worker) marks it stale; the next reader rebuilds it and
+    swaps the reference, so evaluations in flight keep a consistent snapshot.
+    """
     
-    # Get any client-specific rules from rules table
-    client_rules = await fetch_all(
-        "SELECT * FROM rules WHERE scope = 'client' AND scope_id = $1 AND is_active = TRUE "
-        "ORDER BY priority DESC",
-        user_id
-    )
+    def __init__(self):
+        self._snapshot: Optional[RulesSnapshot] = None
+        self._version = 0
+        self._generation = 0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+    
+    def invalidate(self, payload: str = "*"):
+        """Mark the snapshot stale; the next get() rebuilds it"""
+        self._generation += 1
+        self._loaded = False
+    
+    async def load(self) -> RulesSnapshot:
+        """Build a new snapshot and swap it in"""
+        generation = self._generation
+        system_row = await fetch_one("SELECT * FROM system_settings WHERE id = 'global'")
+        games = await fetch_all("SELECT * FROM games")
+        perks = await fetch_all("SELECT * FROM referral_perks WHERE is_active = TRUE")
+        
+        self._version += 1
+        snapshot = RulesSnapshot(
+            version=self._version,
+            system_settings=MappingProxyType(system_row or dict(DEFAULT_SYSTEM_SETTINGS)),
+            games=MappingProxyType({g['game_name']: _build_game_rules(g) for g in games}),
+            referral_perks=_build_referral_perks(perks),
+            loaded_at=datetime.now(timezone.utc)
+        )
+        self._snapshot = snapshot
+        # An invalidation that raced with this load wins - reload next time
+        self._loaded = generation == self._generation
+        logger.info(f"Rules snapshot v{snapshot.version} loaded: {len(games)} games, {len(perks)} referral perks")
+        return snapshot
+    
+    async def get(self) -> RulesSnapshot:
+        if self._loaded and self._snapshot is not None:
+            return self._snapshot
+        async with self._lock:
+            if not self._loaded or self._snapshot is None:
+                return await self.load()
+            return self._snapshot
+
+
+rules_snapshot_store = RulesSnapshotStore()
+invalidation_bus.subscribe(RULES_SNAPSHOT_CHANNEL, rules_snapshot_store.invalidate)
+
+
+async def get_rules_snapshot() -> RulesSnapshot:
+    """Current rules snapshot (built on first use)"""
+    return await rules_snapshot_store.get()
+
+
+async def invalidate_rules_snapshot(conn=None):
+    """Call after any system_settings / games / referral_perks write"""
+    await invalidation_bus.publish(RULES_SNAPSHOT_CHANNEL, conn=conn)
+
+
+# ==================== HELPER FUNCTIONS ====================
+
+async def get_system_settings() -> Dict[str, Any]:
+    """Get global system settings"""
+    snapshot = await get_rules_snapshot()
+    return dict(snapshot.system_settings)
+
+
+async def get_game_rules(game_name: str) -> Dict[str, Any]:
+    """Get game-specific rules"""
+    snapshot = await get_rules_snapshot()
+    game_rules = snapshot.game(game_name)
+    if not game_rules:
+        return None
+    return copy.deepcopy(dict(game_rules))
+
+
+# Everything the resolvers need about one user, in one statement: the user
+# row, active client rules (aggregated) and the last approved deposit for
+# the game (which also answers "first deposit for this game?")
+CLIENT_CONTEXT_SQL = """
+    SELECT u.user_id, u.username, u.display_name, u.bonus_percentage, u.signup_bonus_claimed,
+           u.deposit_count, u.total_deposited, u.total_withdrawn,
+           u.real_balance, u.bonus_balance, u.deposit_locked, u.withdraw_locked,
+           cr.custom_rules,
+           ld.order_id AS last_deposit_order_id,
+           ld.amount AS last_deposit_amount,
+           ld.approved_at AS last_deposit_approved_at
+    FROM users u
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+                   'rule_id', r.rule_id,
+                   'rule_type', r.rule_type,
+                   'conditions', r.conditions,
+                   'actions', r.actions,
+                   'priority', r.priority
+               ) ORDER BY r.priority DESC) AS custom_rules
+        FROM rules r
+        WHERE r.scope = 'client' AND r.scope_id = u.user_id AND r.is_active = TRUE
+    ) cr ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT o.order_id, o.amount, o.approved_at
+        FROM orders o
+        WHERE o.user_id = u.user_id AND o.game_name = $2
+          AND o.order_type = 'deposit' AND o.status = 'APPROVED_EXECUTED'
+        ORDER BY o.approved_at DESC
+        LIMIT 1
+    ) ld ON TRUE
+    WHERE u.user_id = $1
+"""
+
+
+def _json_value(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+async def load_client_context(user_id: str, game_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Load the per-user part of a rules evaluation in one round trip.
+    
+    Returns the get_client_rules() fields plus:
+        last_deposit: {order_id, amount, approved_at} for game_name, or None
+        is_first_game_deposit: True if no approved deposit exists for game_name
+    """
+    row = await fetch_one(CLIENT_CONTEXT_SQL, user_id, game_name.lower() if game_name else None)
+    if not row:
+        return None
+    
+    custom_rules = _json_value(row['custom_rules']) or []
+    last_deposit = None
+    if row['last_deposit_order_id']:
+        last_deposit = {
+            'order_id': row['last_deposit_order_id'],
+            'amount': row['last_deposit_amount'],
+            'approved_at': row['last_deposit_approved_at']
+        }
     
     return {
-        'user_id': user['user_id'],
-        'username': user['username'],
-        'bonus_percentage_override': user.get('bonus_percentage'),
-        'signup_bonus_claimed': user.get('signup_bonus_claimed', False),
-        'deposit_count': user.get('deposit_count', 0),
-        'total_deposited': user.get('total_deposited', 0.0),
-        'total_withdrawn': user.get('total_withdrawn', 0.0),
-        'real_balance': user.get('real_balance', 0.0),
-        'bonus_balance': user.get('bonus_balance', 0.0),
-        'deposit_locked': user.get('deposit_locked', False),
-        'withdraw_locked': user.get('withdraw_locked', False),
+        'user_id': row['user_id'],
+        'username': row['username'],
+        'display_name': row.get('display_name'),
+        'bonus_percentage_override': row.get('bonus_percentage'),
+        'signup_bonus_claimed': row.get('signup_bonus_claimed', False),
+        'deposit_count': row.get('deposit_count', 0),
+        'total_deposited': row.get('total_deposited', 0.0),
+        'total_withdrawn': row.get('total_withdrawn', 0.0),
+        'real_balance': row.get('real_balance', 0.0),
+        'bonus_balance': row.get('bonus_balance', 0.0),
+        'deposit_locked': row.get('deposit_locked', False),
+        'withdraw_locked': row.get('withdraw_locked', False),
         'custom_rules': [{
             'rule_id': r['rule_id'],
             'rule_type': r['rule_type'],
-            'conditions': json.loads(r['conditions']) if isinstance(r['conditions'], str) else r['conditions'],
-            'actions': json.loads(r['actions']) if isinstance(r['actions'], str) else r['actions'],
+            'conditions': _json_value(r['conditions']) or {},
+            'actions': _json_value(r['actions']) or {},
             'priority': r['priority']
-        } for r in client_rules]
+        } for r in custom_rules],
+        'game_name': game_name.lower() if game_name else None,
+        'last_deposit': last_deposit,
+        'is_first_game_deposit': last_deposit is None
     }
 
 
+async def get_client_rules(user_id: str) -> Dict[str, Any]:
+    """Get client-specific rules/overrides"""
+    context = await load_client_context(user_id)
+    if not context:
+        return None
+    for key in ('display_name', 'game_name', 'last_deposit', 'is_first_game_deposit'):
+        context.pop(key)
+    return context
+
+
 async def get_last_deposit(user_id: str, game_name: str) -> Optional[Dict]:
     """Get the user's last approved deposit for a specific game"""
     return await fetch_one('''
@@ -128,7 +313,8 @@ async def resolve_deposit_rules(
     user_id: str,
     game_name: str,
     amount: float,
-    current_game_balance: Optional[float] = None
+    current_game_balance: Optional[float] = None,
+    context: Optional[Dict[str, Any]] = None
 ) -> Tuple[bool, Dict[str, Any]]:
     """
     Resolve deposit rules with CLIENT > GAME > GLOBAL priority
@@ -139,13 +325,15 @@ async def resolve_deposit_rules(
     Args:
         current_game_balance: The user's balance IN THE GAME (from API or game_accounts table)
                              If None, rule is skipped (caller should provide)
+        context: load_client_context(user_id, game_name) result, if already loaded
     
     Returns (eligible, result_dict)
     """
-    # Get all rule sources
-    system_settings = await get_system_settings()
-    game_rules = await get_game_rules(game_name)
-    client_rules = await get_client_rules(user_id)
+    # Get all rule sources (only client rules hit the database)
+    snapshot = await get_rules_snapshot()
+    system_settings = snapshot.system_settings
+    game_rules = snapshot.game(game_name)
+    client_rules = context or await load_client_context(user_id, game_name)
     
     if not game_rules:
         return False, {
@@ -238,7 +426,8 @@ async def resolve_deposit_rules(
 async def resolve_withdrawal_rules(
     user_id: str,
     game_name: str,
-    requested_amount: Optional[float] = None
+    requested_amount: Optional[float] = None,
+    context: Optional[Dict[str, Any]] = None
 ) -> Tuple[bool, Dict[str, Any]]:
     """
     Resolve withdrawal/cashout rules with CLIENT > GAME > GLOBAL priority
@@ -251,10 +440,11 @@ async def resolve_withdrawal_rules(
     
     Returns (eligible, result_dict with payout/void calculations)
     """
-    # Get all rule sources
-    system_settings = await get_system_settings()
-    game_rules = await get_game_rules(game_name)
-    client_rules = await get_client_rules(user_id)
+    # Get all rule sources (only client rules hit the database)
+    snapshot = await get_rules_snapshot()
+    system_settings = snapshot.system_settings
+    game_rules = snapshot.game(game_name)
+    client_rules = context or await load_client_context(user_id, game_name)
     
     if not game_rules:
         return False, {
@@ -293,7 +483,7 @@ async def resolve_withdrawal_rules(
         }
     
     # Get last deposit for this game to calculate multipliers
-    last_deposit = await get_last_deposit(user_id, game_name)
+    last_deposit = client_rules['last_deposit']
     
     if not last_deposit:
         return False, {
@@ -391,7 +581,8 @@ async def calculate_deposit_bonus(
     user_id: str,
     game_name: str,
     deposit_amount: float,
-    referral_code: Optional[str] = None
+    referral_code: Optional[str] = None,
+    context: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Calculate bonus for a deposit with priority: CLIENT > REFERRAL > FIRST_DEPOSIT > GAME_DEFAULT
@@ -405,9 +596,10 @@ async def calculate_deposit_bonus(
     Bonus does NOT increase cashout multiplier base.
     Bonus IS withdrawable IF multiplier condition is met.
     """
-    system_settings = await get_system_settings()
-    game_rules = await get_game_rules(game_name)
-    client_rules = await get_client_rules(user_id)
+    snapshot = await get_rules_snapshot()
+    system_settings = snapshot.system_settings
+    game_rules = snapshot.game(game_name)
+    client_rules = context or await load_client_context(user_id, game_name)
     
     if not game_rules or not client_rules:
         return {
@@ -449,7 +641,7 @@ async def calculate_deposit_bonus(
         game_bonus_rules = game_rules.get('bonus_rules', {})
         
         # Check for first-deposit bonus for this game
-        is_first_game_deposit = await check_first_game_deposit(user_id, game_name)
+        is_first_game_deposit = client_rules['is_first_game_deposit']
         
         if is_first_game_deposit and 'first_deposit' in game_bonus_rules:
             rule = game_bonus_rules['first_deposit']
@@ -487,7 +679,9 @@ async def calculate_deposit_bonus(
     
     # 4. Check for REFERRAL bonus
     if referral_code:
-        referral_bonus = await calculate_referral_bonus(referral_code, game_name, deposit_amount)
+        referral_bonus = await calculate_referral_bonus(
+            referral_code, game_name, deposit_amount, snapshot=snapshot
+        )
         if referral_bonus > 0:
             bonus_breakdown['referral_bonus'] = referral_bonus
             # Calculate percent for display
@@ -523,26 +717,20 @@ async def check_first_game_deposit(user_id: str, game_name: str) -> bool:
     return existing is None
 
 
-async def calculate_referral_bonus(referral_code: str, game_name: str, amount: float) -> float:
-    """Calculate referral bonus from perks"""
+async def calculate_referral_bonus(
+    referral_code: str,
+    game_name: str,
+    amount: float,
+    snapshot: Optional[RulesSnapshot] = None
+) -> float:
+    """Calculate referral bonus from perks (served from the rules snapshot)"""
+    snapshot = snapshot or await get_rules_snapshot()
     # Get best matching perk
-    perk = await fetch_one('''
-        SELECT * FROM referral_perks 
-        WHERE referral_code = $1 AND is_active = TRUE
-        AND (game_name IS NULL OR game_name = $2)
-        AND (min_amount IS NULL OR min_amount <= $3)
-        AND (valid_until IS NULL OR valid_until > NOW())
-        AND (max_uses IS NULL OR current_uses < max_uses)
-        ORDER BY 
-            CASE WHEN game_name IS NOT NULL THEN 1 ELSE 2 END,
-            percent_bonus DESC
-        LIMIT 1
-    ''', referral_code.upper(), game_name.lower(), amount)
+    perk = snapshot.best_referral_perk(referral_code, game_name, amount)
     
     if not perk:
         # Use system default referral bonus
-        settings = await get_system_settings()
-        default_percent = settings.get('default_referral_bonus', 0)
+        default_percent = snapshot.system_settings.get('default_referral_bonus', 0)
         return amount * (default_percent / 100)
     
     bonus = amount * (perk['percent_bonus'] / 100) + perk.get('flat_bonus', 0)
@@ -559,22 +747,31 @@ async def validate_deposit_order(
     user_id: str,
     game_name: str,
     amount: float,
-    referral_code: Optional[str] = None
+    referral_code: Optional[str] = None,
+    context: Optional[Dict[str, Any]] = None
 ) -> Tuple[bool, Dict[str, Any]]:
     """
     Complete deposit validation including rules and bonus calculation
+    
+    Args:
+        context: load_client_context(user_id, game_name) result, if already loaded
     """
+    # One round trip for all per-user data; game/global rules come from the snapshot
+    context = context or await load_client_context(user_id, game_name)
+    
     # Check deposit rules
-    eligible, rules_result = await resolve_deposit_rules(user_id, game_name, amount)
+    eligible, rules_result = await resolve_deposit_rules(user_id, game_name, amount, context=context)
     
     if not eligible:
         return False, rules_result
     
     # Calculate bonus
-    bonus_result = await calculate_deposit_bonus(user_id, game_name, amount, referral_code)
+    bonus_result = await calculate_deposit_bonus(
+        user_id, game_name, amount, referral_code, context=context
+    )
     
     # Get game info
-    game_rules = await get_game_rules(game_name)
+    game_rules = (await get_rules_snapshot()).game(game_name)
     
     return True, {
         'valid': True,
@@ -603,7 +800,7 @@ async def validate_withdrawal_order(
         return False, result
     
     # Get game info
-    game_rules = await get_game_rules(game_name)
+    game_rules = (await get_rules_snapshot()).game(game_name)
     
     return True, {
         'valid': True,
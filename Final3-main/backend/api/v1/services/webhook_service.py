@@ -1,6 +1,10 @@
 """
 API v1 Webhook Service
 Handles webhook registration, delivery, and retry logic
+
+Deliveries are persisted in webhook_deliveries and sent by
+WebhookDeliveryWorker (DB-polled, FOR UPDATE SKIP LOCKED), so pending
+retries survive restarts and scale across worker processes.
 """
 import uuid
 import json
@@ -8,14 +12,19 @@ import hmac
 import hashlib
 import httpx
 import asyncio
+import time
+import logging
+from urllib.parse import urlsplit
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any, List, Tuple
 
 from ..core.database import fetch_one, fetch_all, execute
 from ..core.config import get_api_settings, ErrorCodes
 from ..core.security import generate_hmac_signature
+from ..core.cache_invalidation import invalidation_bus
 from .auth_service import log_audit
 
+logger = logging.getLogger(__name__)
 settings = get_api_settings()
 
 
@@ -57,6 +66,7 @@ async def register_webhook(
         INSERT INTO webhooks (webhook_id, user_id, webhook_url, signing_secret, subscribed_events)
         VALUES ($1, $2, $3, $4, $5)
     ''', webhook_id, user_id, webhook_url, signing_secret, subscribed_events)
+    await invalidate_webhook_subscriptions()
     
     # Log audit
     await log_audit(user_id, username, "webhook.registered", "webhook", webhook_id, {
@@ -73,60 +83,112 @@ async def register_webhook(
     }
 
 
-async def get_webhooks_for_event(event_type: str, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Get all active webhooks subscribed to an event"""
-    query = '''
-        SELECT * FROM webhooks 
-        WHERE is_active = TRUE AND $1 = ANY(subscribed_events)
-    '''
-    params = [event_type]
+# ==================== SUBSCRIPTION LOOKUP ====================
+
+# LISTEN/NOTIFY channel for webhook registration / deactivation
+WEBHOOK_SUBSCRIPTIONS_CHANNEL = "webhook_subscriptions"
+
+
+class WebhookSubscriptionCache:
+    """
+    event_type -> active subscribers (webhook_id, user_id), with a TTL.
     
-    if user_id:
-        query += " AND user_id = $2"
-        params.append(user_id)
+    Misses are served by a containment query (subscribed_events @> ARRAY[..])
+    that uses the GIN index on webhooks.subscribed_events. Writes in this
+    module invalidate the cache on every worker via LISTEN/NOTIFY; the TTL
+    bounds staleness for changes made elsewhere.
+    """
     
-    return await fetch_all(query, *params)
+    def __init__(self):
+        self._by_event: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._generation = 0
+    
+    def invalidate(self, payload: str = "*"):
+        self._generation += 1
+        self._by_event.clear()
+    
+    async def get(self, event_type: str) -> List[Dict[str, Any]]:
+        cached = self._by_event.get(event_type)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        generation = self._generation
+        rows = await fetch_all('''
+            SELECT webhook_id, user_id FROM webhooks
+            WHERE is_active = TRUE AND subscribed_events @> ARRAY[$1]::text[]
+        ''', event_type)
+        
+        # An invalidation that raced with this query wins - don't cache
+        if generation == self._generation:
+            expires_at = time.monotonic() + settings.webhook_subscription_cache_ttl_seconds
+            self._by_event[event_type] = (expires_at, rows)
+        return rows
+
+
+webhook_subscription_cache = WebhookSubscriptionCache()
+invalidation_bus.subscribe(WEBHOOK_SUBSCRIPTIONS_CHANNEL, webhook_subscription_cache.invalidate)
+
+
+async def invalidate_webhook_subscriptions(conn=None):
+    """Call after any write to webhooks.is_active / subscribed_events"""
+    await invalidation_bus.publish(WEBHOOK_SUBSCRIPTIONS_CHANNEL, conn=conn)
+
+
+async def get_webhooks_for_event(event_type: str, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Get all active webhooks (webhook_id, user_id) subscribed to an event"""
+    webhooks = await webhook_subscription_cache.get(event_type)
+    if user_id:
+        return [w for w in webhooks if w['user_id'] == user_id]
+    return list(webhooks)
 
 
 async def trigger_webhooks(event_type: str, data: Dict[str, Any], user_id: Optional[str] = None):
     """
     Trigger webhooks for an event.
-    This runs asynchronously in the background.
+    
+    Only records pending deliveries (one multi-row INSERT for all subscribers);
+    the WebhookDeliveryWorker sends them. Pending deliveries live in
+    webhook_deliveries, so they survive restarts.
     """
     webhooks = await get_webhooks_for_event(event_type, user_id)
+    if not webhooks:
+        return
     
-    for webhook in webhooks:
-        # Create delivery record
-        delivery_id = str(uuid.uuid4())
-        payload = {
-            "event": event_type,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "data": data
-        }
-        
-        await execute('''
-            INSERT INTO webhook_deliveries (delivery_id, webhook_id, event_type, payload, status)
-            VALUES ($1, $2, $3, $4, 'pending')
-        ''', delivery_id, webhook['webhook_id'], event_type, json.dumps(payload))
-        
-        # Schedule delivery (in production, use a task queue)
-        asyncio.create_task(deliver_webhook(delivery_id))
+    payload = {
+        "event": event_type,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "data": data
+    }
+    delivery_ids = [str(uuid.uuid4()) for _ in webhooks]
+    
+    # Create delivery records (due immediately)
+    await execute('''
+        INSERT INTO webhook_deliveries (delivery_id, webhook_id, event_type, payload, status, attempt_count, next_retry_at)
+        SELECT d.delivery_id, d.webhook_id, $3, $4::jsonb, 'pending', 0, NOW()
+        FROM unnest($1::varchar[], $2::varchar[]) AS d(delivery_id, webhook_id)
+    ''', delivery_ids, [w['webhook_id'] for w in webhooks], event_type, json.dumps(payload))
+    
+    webhook_delivery_worker.wake()
 
 
-async def deliver_webhook(delivery_id: str, attempt: int = 1):
+async def deliver_webhook(delivery: Dict[str, Any]) -> bool:
     """
-    Deliver a webhook with retry logic.
+    Make ONE delivery attempt for a claimed delivery row.
+    
+    On failure the row is rescheduled (status 'retrying', next_retry_at with
+    exponential backoff) instead of sleeping in-process; after
+    webhook_retry_attempts it is marked 'failed'. Only the send takes that
+    path - a failed 'delivered' write after a 2xx is retried in place.
+    
+    Args:
+        delivery: Claimed row with delivery_id, webhook_id, event_type, payload,
+                  attempt_count, webhook_url, signing_secret
+    
+    Returns:
+        True if delivered
     """
-    # Get delivery info
-    delivery = await fetch_one('''
-        SELECT d.*, w.webhook_url, w.signing_secret
-        FROM webhook_deliveries d
-        JOIN webhooks w ON d.webhook_id = w.webhook_id
-        WHERE d.delivery_id = $1
-    ''', delivery_id)
-    
-    if not delivery:
-        return
+    delivery_id = delivery['delivery_id']
+    attempt = delivery['attempt_count']
     
     payload_str = delivery['payload'] if isinstance(delivery['payload'], str) else json.dumps(delivery['payload'])
     
@@ -141,70 +203,368 @@ async def deliver_webhook(delivery_id: str, attempt: int = 1):
         "X-Webhook-Timestamp": datetime.now(timezone.utc).isoformat()
     }
     
+    breaker = webhook_circuit_breakers.get(delivery['webhook_id'])
+    
+    # Only the send itself takes the failure / retry path
     try:
-        async with httpx.AsyncClient(timeout=settings.webhook_timeout_seconds) as client:
-            response = await client.post(
-                delivery['webhook_url'],
-                content=payload_str,
-                headers=headers
-            )
-            
-            # Update delivery status
-            if 200 <= response.status_code < 300:
-                await execute('''
-                    UPDATE webhook_deliveries 
-                    SET status = 'delivered', response_status = $1, response_body = $2, 
-                        delivered_at = $3, attempt_count = $4
-                    WHERE delivery_id = $5
-                ''', response.status_code, response.text[:1000], datetime.now(timezone.utc), attempt, delivery_id)
-                
-                # Reset failure count on webhook
-                await execute('''
-                    UPDATE webhooks SET failure_count = 0, last_triggered_at = $1 
-                    WHERE webhook_id = $2
-                ''', datetime.now(timezone.utc), delivery['webhook_id'])
-            else:
-                raise Exception(f"HTTP {response.status_code}: {response.text[:200]}")
-                
+        response = await get_webhook_client(delivery['webhook_url']).post(
+            delivery['webhook_url'],
+            content=payload_str,
+            headers=headers
+        )
+        
+        if not 200 <= response.status_code < 300:
+            raise Exception(f"HTTP {response.status_code}: {response.text[:200]}")
     except Exception as e:
-        # Record failure
+        breaker.record_failure()
+        await _record_delivery_failure(delivery, attempt, str(e))
+        return False
+    
+    breaker.record_success()
+    
+    now = datetime.now(timezone.utc)
+    await _mark_delivered(delivery_id, response.status_code, response.text[:1000], now)
+    
+    # Reset failure count on webhook (bookkeeping only - never affects the delivery)
+    try:
+        await execute('''
+            UPDATE webhooks SET failure_count = 0, last_triggered_at = $1 
+            WHERE webhook_id = $2
+        ''', now, delivery['webhook_id'])
+    except Exception as e:
+        logger.warning(f"Failed to reset failure_count for webhook {delivery['webhook_id']}: {e}")
+    return True
+
+
+# The receiver already has the event, so the 'delivered' write is retried
+# (well inside the claim lease) rather than letting the lease expire and the
+# row be claimed and sent again
+MARK_DELIVERED_ATTEMPTS = 4
+MARK_DELIVERED_BACKOFF_SECONDS = 0.25
+
+
+async def _mark_delivered(delivery_id: str, response_status: int, response_body: str, delivered_at: datetime):
+    """Record a 2xx response, retrying the write with exponential backoff"""
+    for write_attempt in range(1, MARK_DELIVERED_ATTEMPTS + 1):
+        try:
+            await execute('''
+                UPDATE webhook_deliveries 
+                SET status = 'delivered', response_status = $1, response_body = $2, 
+                    delivered_at = $3, next_retry_at = NULL
+                WHERE delivery_id = $4
+            ''', response_status, response_body, delivered_at, delivery_id)
+            return
+        except Exception as e:
+            if write_attempt == MARK_DELIVERED_ATTEMPTS:
+                # Lease expiry will re-send this delivery; receivers dedupe on
+                # X-Webhook-Delivery-ID
+                logger.error(
+                    f"Webhook delivery {delivery_id} was sent but could not be marked delivered "
+                    f"after {write_attempt} attempts: {e}"
+                )
+                return
+            await asyncio.sleep(MARK_DELIVERED_BACKOFF_SECONDS * (2 ** (write_attempt - 1)))
+
+
+async def _record_delivery_failure(delivery: Dict[str, Any], attempt: int, error: str):
+    """Reschedule a failed attempt, or mark it failed once retries are exhausted"""
+    delivery_id = delivery['delivery_id']
+    
+    # Increment webhook failure count
+    webhook = await fetch_one('''
+        UPDATE webhooks SET failure_count = failure_count + 1 WHERE webhook_id = $1
+        RETURNING failure_count
+    ''', delivery['webhook_id'])
+    
+    if attempt < settings.webhook_retry_attempts:
+        delay = settings.webhook_retry_delay_seconds * (2 ** (attempt - 1))  # Exponential backoff
         await execute('''
             UPDATE webhook_deliveries 
-            SET response_status = $1, response_body = $2, attempt_count = $3, status = 'failed'
-            WHERE delivery_id = $4
-        ''', 0, str(e)[:1000], attempt, delivery_id)
-        
-        # Increment webhook failure count
+            SET status = 'retrying', response_status = 0, response_body = $1,
+                next_retry_at = NOW() + make_interval(secs => $2)
+            WHERE delivery_id = $3
+        ''', error[:1000], float(delay), delivery_id)
+        return
+    
+    # Max retries reached
+    await execute('''
+        UPDATE webhook_deliveries 
+        SET status = 'failed', response_status = 0, response_body = $1, next_retry_at = NULL
+        WHERE delivery_id = $2
+    ''', error[:1000], delivery_id)
+    
+    # Deactivate webhook if too many failures
+    if webhook and webhook['failure_count'] >= 10:
         await execute('''
-            UPDATE webhooks SET failure_count = failure_count + 1 WHERE webhook_id = $1
+            UPDATE webhooks SET is_active = FALSE WHERE webhook_id = $1
         ''', delivery['webhook_id'])
-        
-        # Retry if under limit
-        if attempt < settings.webhook_retry_attempts:
-            delay = settings.webhook_retry_delay_seconds * (2 ** (attempt - 1))  # Exponential backoff
-            
-            await execute('''
-                UPDATE webhook_deliveries SET next_retry_at = $1, status = 'retrying'
-                WHERE delivery_id = $2
-            ''', datetime.now(timezone.utc), delivery_id)
+        await invalidate_webhook_subscriptions()
+
+
+# ==================== CONNECTION POOLS ====================
+
+# One keep-alive client per receiver host, so a slow host cannot tie up
+# connections needed for the others
+_webhook_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_webhook_client(url: str) -> httpx.AsyncClient:
+    """Get the shared client for the URL's scheme://host:port"""
+    parts = urlsplit(url)
+    host_key = f"{parts.scheme}://{parts.netloc}".lower()
+    client = _webhook_clients.get(host_key)
+    if client is None or client.is_closed:
+        client = _webhook_clients[host_key] = httpx.AsyncClient(
+            timeout=settings.webhook_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=settings.webhook_max_connections_per_host,
+                max_keepalive_connections=settings.webhook_max_connections_per_host
+            )
+        )
+    return client
+
+
+async def close_webhook_clients():
+    """Close all per-host clients (call on shutdown)"""
+    clients = list(_webhook_clients.values())
+    _webhook_clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
+
+
+# ==================== CIRCUIT BREAKER ====================
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Per-webhook circuit breaker.
+    
+    - closed: deliveries flow; webhook_breaker_failure_threshold consecutive
+      failures open the circuit
+    - open: deliveries are short-circuited for webhook_breaker_open_seconds
+    - half_open: one probe delivery is let through; success closes the
+      circuit, failure re-opens it
+    
+    State is per worker process.
+    """
+    
+    def __init__(self):
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.open_count = 0
+        self._probe_in_flight = False
+    
+    def _retry_at(self) -> float:
+        return (self.opened_at or 0.0) + settings.webhook_breaker_open_seconds
+    
+    def allow_request(self) -> bool:
+        """Check (and reserve, when half-open) permission to send"""
+        if self.state == BREAKER_OPEN and time.monotonic() >= self._retry_at():
+            self.state = BREAKER_HALF_OPEN
+        if self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+    
+    def seconds_until_probe(self) -> float:
+        """How long a short-circuited delivery should wait before retrying"""
+        if self.state == BREAKER_OPEN:
+            return max(1.0, self._retry_at() - time.monotonic())
+        # Half-open with a probe in flight - check back shortly
+        return max(1.0, settings.webhook_poll_seconds)
+    
+    def record_success(self):
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+    
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if (self.state == BREAKER_HALF_OPEN
+                or self.consecutive_failures >= settings.webhook_breaker_failure_threshold):
+            if self.state != BREAKER_OPEN:
+                self.open_count += 1
+            self.state = BREAKER_OPEN
+            self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == BREAKER_OPEN:
+            retry_in = round(max(0.0, self._retry_at() - time.monotonic()), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "open_count": self.open_count,
+            "probe_in_seconds": retry_in,
+        }
+
+
+class CircuitBreakerRegistry:
+    """Lazily created breakers keyed by webhook_id"""
+    
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+    
+    def get(self, webhook_id: str) -> CircuitBreaker:
+        breaker = self._breakers.get(webhook_id)
+        if breaker is None:
+            breaker = self._breakers[webhook_id] = CircuitBreaker()
+        return breaker
+    
+    def get_state(self, webhook_id: str) -> Dict[str, Any]:
+        breaker = self._breakers.get(webhook_id)
+        return breaker.to_dict() if breaker else CircuitBreaker().to_dict()
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {webhook_id: b.to_dict() for webhook_id, b in self._breakers.items()}
+
+
+# Process-wide breakers
+webhook_circuit_breakers = CircuitBreakerRegistry()
+
+
+async def _short_circuit(delivery: Dict[str, Any], breaker: CircuitBreaker):
+    """
+    Push a delivery back without sending it. The claim's attempt is handed
+    back, so an open circuit does not use up the delivery's retries.
+    """
+    await execute('''
+        UPDATE webhook_deliveries
+        SET status = 'retrying', attempt_count = GREATEST(attempt_count - 1, 0),
+            response_body = 'Circuit open', next_retry_at = NOW() + make_interval(secs => $1)
+        WHERE delivery_id = $2
+    ''', float(breaker.seconds_until_probe()), delivery['delivery_id'])
+
+
+# ==================== DELIVERY SCHEDULER ====================
+
+class WebhookDeliveryWorker:
+    """
+    DB-backed delivery scheduler.
+    
+    Polls webhook_deliveries for rows due by next_retry_at, claims them with
+    FOR UPDATE SKIP LOCKED (so any number of worker processes can run without
+    sending the same delivery twice) and sends them through a bounded pool of
+    webhook_worker_concurrency concurrent requests.
+    
+    A claimed row is moved to 'delivering' with a lease in next_retry_at; if
+    the process dies mid-send, the lease expires and the row is claimed again.
+    """
+    
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def wake(self):
+        self._wakeup.set()
+    
+    def start(self):
+        if self.is_running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Webhook delivery worker started")
+    
+    async def stop(self):
+        if not self.is_running:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=settings.webhook_timeout_seconds + 5)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+        logger.info("Webhook delivery worker stopped")
+    
+    async def _run(self):
+        while not self._stopping:
+            try:
+                claimed = await self.process_due()
+            except Exception as e:
+                logger.error(f"Webhook delivery worker error: {e}")
+                claimed = 0
             
-            await asyncio.sleep(delay)
-            await deliver_webhook(delivery_id, attempt + 1)
-        else:
-            # Max retries reached
-            await execute('''
-                UPDATE webhook_deliveries SET status = 'failed' WHERE delivery_id = $1
-            ''', delivery_id)
+            # Keep draining while full batches come back
+            if claimed >= settings.webhook_batch_size:
+                continue
             
-            # Deactivate webhook if too many failures
-            webhook = await fetch_one(
-                "SELECT failure_count FROM webhooks WHERE webhook_id = $1",
-                delivery['webhook_id']
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.webhook_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+    
+    async def _claim_due(self) -> List[Dict[str, Any]]:
+        return await fetch_all('''
+            WITH due AS (
+                SELECT delivery_id FROM webhook_deliveries
+                WHERE status IN ('pending', 'retrying', 'delivering')
+                  AND next_retry_at <= NOW()
+                ORDER BY next_retry_at
+                LIMIT $1
+                FOR UPDATE SKIP LOCKED
+            ), claimed AS (
+                UPDATE webhook_deliveries d
+                SET status = 'delivering',
+                    attempt_count = d.attempt_count + 1,
+                    next_retry_at = NOW() + make_interval(secs => $2)
+                FROM due
+                WHERE d.delivery_id = due.delivery_id
+                RETURNING d.delivery_id, d.webhook_id, d.event_type, d.payload, d.attempt_count
             )
-            if webhook and webhook['failure_count'] >= 10:
+            SELECT c.*, w.webhook_url, w.signing_secret, w.is_active
+            FROM claimed c
+            JOIN webhooks w ON w.webhook_id = c.webhook_id
+        ''', settings.webhook_batch_size, float(settings.webhook_delivery_lease_seconds))
+    
+    async def process_due(self) -> int:
+        """Claim and send one batch of due deliveries. Returns the number claimed."""
+        deliveries = await self._claim_due()
+        if not deliveries:
+            return 0
+        
+        semaphore = asyncio.Semaphore(max(1, settings.webhook_worker_concurrency))
+        
+        async def run(delivery: Dict[str, Any]):
+            if not delivery['is_active']:
                 await execute('''
-                    UPDATE webhooks SET is_active = FALSE WHERE webhook_id = $1
-                ''', delivery['webhook_id'])
+                    UPDATE webhook_deliveries
+                    SET status = 'failed', response_body = 'Webhook inactive', next_retry_at = NULL
+                    WHERE delivery_id = $1
+                ''', delivery['delivery_id'])
+                return
+            breaker = webhook_circuit_breakers.get(delivery['webhook_id'])
+            if not breaker.allow_request():
+                await _short_circuit(delivery, breaker)
+                return
+            async with semaphore:
+                await deliver_webhook(delivery)
+        
+        await asyncio.gather(*(run(d) for d in deliveries), return_exceptions=True)
+        return len(deliveries)
+
+
+# Process-wide worker
+webhook_delivery_worker = WebhookDeliveryWorker()
 
 
 async def get_user_webhooks(user_id: str) -> List[Dict[str, Any]]:
@@ -223,7 +583,8 @@ async def get_user_webhooks(user_id: str) -> List[Dict[str, Any]]:
             "is_active": w['is_active'],
             "failure_count": w['failure_count'],
             "last_triggered_at": w['last_triggered_at'].isoformat() if w.get('last_triggered_at') else None,
-            "created_at": w['created_at'].isoformat() if w.get('created_at') else None
+            "created_at": w['created_at'].isoformat() if w.get('created_at') else None,
+            "circuit_breaker": webhook_circuit_breakers.get_state(w['webhook_id'])
         })
     
     return result
@@ -234,6 +595,7 @@ async def delete_webhook(user_id: str, webhook_id: str) -> bool:
     result = await execute('''
         UPDATE webhooks SET is_active = FALSE WHERE webhook_id = $1 AND user_id = $2
     ''', webhook_id, user_id)
+    await invalidate_webhook_subscriptions()
     return True
 
 
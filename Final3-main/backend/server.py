@@ -263,6 +263,44 @@ async def startup_event():
     from api.v1.core.order_lifecycle import ensure_audit_table_exists
     await ensure_audit_table_exists()
     
+    # Cross-worker cache invalidation (LISTEN/NOTIFY) + warm bot subscription index
+    from api.v1.core.cache_invalidation import invalidation_bus
+    from api.v1.core.notification_router import bot_subscription_index
+    await invalidation_bus.start()
+    try:
+        await bot_subscription_index.load()
+    except Exception as e:
+        logger.warning(f"Bot subscription index not preloaded (will load on first use): {e}")
+    
+    # Start buffered notification_logs writer
+    from api.v1.core.notification_log_writer import notification_log_writer
+    notification_log_writer.start()
+    
+    # Start DB-backed webhook delivery worker
+    from api.v1.services.webhook_service import webhook_delivery_worker
+    webhook_delivery_worker.start()
+    
+    # Start write-behind sessions.last_used_at tracker
+    from api.v1.core.session_activity import session_activity_tracker
+    session_activity_tracker.start()
+    
+    # Start batched api_keys.last_used_at writer
+    from api.v1.core.api_keys import api_key_usage_writer
+    api_key_usage_writer.start()
+    
+    # Delete expired portal sessions in the background
+    from api.v1.core.auth import portal_session_sweeper
+    portal_session_sweeper.start()
+    
+    # Release game load/redeem reservations abandoned mid-saga
+    from api.v1.services.game_transfer_service import game_transfer_sweeper
+    game_transfer_sweeper.start()
+    
+    # Start background notification dispatcher (drains notification_outbox)
+    if settings.notification_outbox_enabled:
+        from api.v1.core.notification_outbox import notification_dispatcher
+        notification_dispatcher.start()
+    
     # Log configuration summary
     logger.info(f"Database pool: min={settings.db_pool_min}, max={settings.db_pool_max}")
     logger.info(f"API docs: {'enabled' if docs_enabled else 'disabled'}")
@@ -276,6 +314,39 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown handler."""
+    from api.v1.core.notification_outbox import notification_dispatcher
+    await notification_dispatcher.stop()
+    
+    from api.v1.services.webhook_service import webhook_delivery_worker, close_webhook_clients
+    await webhook_delivery_worker.stop()
+    await close_webhook_clients()
+    
+    from api.v1.services.game_transfer_service import game_transfer_sweeper
+    await game_transfer_sweeper.stop()
+    
+    from api.v1.core.auth import portal_session_sweeper
+    await portal_session_sweeper.stop()
+    
+    from api.v1.core.api_keys import api_key_usage_writer
+    await api_key_usage_writer.stop()
+    
+    # Flush pending session last-use timestamps before the pool closes
+    from api.v1.core.session_activity import session_activity_tracker
+    await session_activity_tracker.stop()
+    
+    # Flush buffered notification logs before the pool closes
+    from api.v1.core.notification_log_writer import notification_log_writer
+    await notification_log_writer.stop()
+    
+    from api.v1.core.notification_router import close_telegram_client
+    await close_telegram_client()
+    
+    from api.v1.core.cache_invalidation import invalidation_bus
+    await invalidation_bus.stop()
+    
+    from api.v1.core.security import password_hasher
+    password_hasher.shutdown()
+    
     await close_api_v1_db()
     logger.info("Application shutdown complete")
 
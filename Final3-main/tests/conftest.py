@@ -0,0 +1,13 @@
+"""
+Shared pytest setup
+
+HTTP suites talk to a running server (REACT_APP_BACKEND_URL). Unit suites
+import the backend directly, so make `api.v1...` importable the same way
+server.py and alembic/env.py see it.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,239 @@
+"""
+Bonus Simulation Tests
+- decode_copy_binary: binary COPY stream -> DepositColumns
+- simulate_bonus / BonusScenario: vectorized calculate_deposit_bonus() rules
+- build_report: per-game aggregation
+- POST /api/v1/admin/rules/simulate: admin only, validation, report shape
+"""
+import pytest
+import requests
+import os
+import struct
+from datetime import datetime, timezone
+
+import numpy as np
+
+from api.v1.services.bonus_simulation import (
+    DEPOSIT_FIELDS, PGCOPY_SIGNATURE, BonusScenario,
+    decode_copy_binary, simulate_bonus, build_report
+)
+from api.v1.services.rules_service import RulesSnapshot
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_CREDS = {"username": "admin", "password": "admin123"}
+CLIENT_CREDS = {"username": "testclient", "password": "test12345"}
+
+GAME_NAMES = ["alpha", "beta"]
+
+# amount, actual_bonus, game_idx, day, client_pct, first_ever, first_game, has_referral
+DEPOSITS = [
+    (100.0, 30.0, 1, 20000, 0.0, True, True, False),    # first alpha deposit, first ever
+    (100.0, 10.0, 1, 20001, 0.0, False, False, False),  # repeat alpha deposit
+    (200.0, 4.0, 2, 20001, 0.0, False, True, True),     # beta (no game rules), referred
+    (50.0, 10.0, 1, 20002, 20.0, False, True, False),   # client override
+    (80.0, 0.0, 0, 20002, 0.0, True, True, False),      # game no longer exists
+]
+
+
+def copy_binary(rows) -> bytes:
+    """Encode rows the way Postgres writes COPY ... (FORMAT binary)"""
+    out = bytearray(PGCOPY_SIGNATURE)
+    out += struct.pack(">ii", 0, 0)
+    for row in rows:
+        out += struct.pack(">h", len(DEPOSIT_FIELDS))
+        for (name, fmt), value in zip(DEPOSIT_FIELDS, row):
+            data = np.array([value], dtype=fmt).tobytes()
+            out += struct.pack(">i", len(data)) + data
+    out += struct.pack(">h", -1)
+    return bytes(out)
+
+
+def snapshot() -> RulesSnapshot:
+    return RulesSnapshot(
+        version=7,
+        system_settings={
+            'signup_bonus': 10.0,
+            'default_deposit_bonus': 2.0,
+            'default_referral_bonus': 5.0,
+        },
+        games={
+            'alpha': {'bonus_rules': {
+                'first_deposit': {'percent_bonus': 50, 'max_bonus': 30},
+                'default': {'percent_bonus': 10, 'flat_bonus': 1},
+            }},
+            'beta': {'bonus_rules': {}},
+        },
+        referral_perks={},
+        loaded_at=datetime.now(timezone.utc),
+    )
+
+
+class TestDecodeCopyBinary:
+    """Tests for the binary COPY decoder"""
+
+    def test_decodes_every_column(self):
+        """Each field lands in its column with the right dtype"""
+        columns = decode_copy_binary(copy_binary(DEPOSITS))
+        assert len(columns) == len(DEPOSITS)
+        np.testing.assert_allclose(columns.amount, [r[0] for r in DEPOSITS])
+        np.testing.assert_allclose(columns.actual_bonus, [r[1] for r in DEPOSITS])
+        assert columns.game_idx.tolist() == [r[2] for r in DEPOSITS]
+        assert columns.day.tolist() == [r[3] for r in DEPOSITS]
+        np.testing.assert_allclose(columns.client_pct, [r[4] for r in DEPOSITS])
+        assert columns.first_ever.tolist() == [r[5] for r in DEPOSITS]
+        assert columns.first_game.tolist() == [r[6] for r in DEPOSITS]
+        assert columns.has_referral.tolist() == [r[7] for r in DEPOSITS]
+        assert columns.first_ever.dtype == bool
+        print(f"✓ Decoded {len(columns)} deposits")
+
+    def test_empty_stream(self):
+        """A COPY with no rows decodes to empty columns"""
+        columns = decode_copy_binary(copy_binary([]))
+        assert len(columns) == 0
+        print(f"✓ Empty COPY decodes to empty columns")
+
+    def test_header_extension_is_skipped(self):
+        """The header extension area is skipped using its length"""
+        buffer = bytearray(copy_binary(DEPOSITS[:1]))
+        ext_at = len(PGCOPY_SIGNATURE) + 4
+        buffer[ext_at:ext_at + 4] = struct.pack(">i", 4)
+        buffer[ext_at + 4:ext_at + 4] = b"\x00" * 4
+        columns = decode_copy_binary(bytes(buffer))
+        assert columns.amount.tolist() == [100.0]
+        print(f"✓ Header extension skipped")
+
+    def test_rejects_non_copy_stream(self):
+        """Text output is not mistaken for binary COPY"""
+        with pytest.raises(ValueError):
+            decode_copy_binary(b"100.0\t30.0\n")
+        print(f"✓ Non-COPY stream rejected")
+
+    def test_rejects_unexpected_layout(self):
+        """A record of the wrong width (e.g. a NULL column) is rejected"""
+        buffer = copy_binary(DEPOSITS[:1])
+        with pytest.raises(ValueError):
+            decode_copy_binary(buffer[:-2] + b"\x00" + buffer[-2:])
+        print(f"✓ Unexpected record layout rejected")
+
+
+class TestSimulateBonus:
+    """Tests for the vectorized bonus rules"""
+
+    def test_scenario_from_snapshot(self):
+        """Current settings are used when nothing is overridden"""
+        scenario = BonusScenario.from_snapshot(snapshot())
+        assert scenario.signup_bonus == 10.0
+        assert scenario.default_deposit_bonus == 2.0
+        assert scenario.default_referral_bonus == 5.0
+        assert set(scenario.game_bonus_rules["alpha"]) == {"first_deposit", "default"}
+        print(f"✓ Scenario built from snapshot")
+
+    def test_current_rules(self):
+        """Each rule branch of calculate_deposit_bonus() is applied"""
+        columns = decode_copy_binary(copy_binary(DEPOSITS))
+        scenario = BonusScenario.from_snapshot(snapshot())
+        simulated = simulate_bonus(columns, scenario, GAME_NAMES)
+        # first_deposit capped at 30 + 10% signup | default 10% + 1 flat |
+        # system 2% + 5% referral | client 20% | unknown game
+        np.testing.assert_allclose(simulated, [40.0, 11.0, 14.0, 10.0, 0.0])
+        print(f"✓ Simulated bonuses: {simulated.tolist()}")
+
+    def test_overrides_replace_rules(self):
+        """Overrides change global percents and remove game rules set to null"""
+        columns = decode_copy_binary(copy_binary(DEPOSITS))
+        scenario = BonusScenario.from_snapshot(snapshot(), {
+            'signup_bonus': 0,
+            'default_referral_bonus': 0,
+            'games': {'alpha': {'bonus_rules': {'first_deposit': None}}},
+        })
+        assert 'first_deposit' not in scenario.game_bonus_rules['alpha']
+        simulated = simulate_bonus(columns, scenario, GAME_NAMES)
+        np.testing.assert_allclose(simulated, [11.0, 11.0, 4.0, 10.0, 0.0])
+        print(f"✓ Overrides applied: {simulated.tolist()}")
+
+    def test_report_totals(self):
+        """build_report sums actual vs simulated per game"""
+        columns = decode_copy_binary(copy_binary(DEPOSITS))
+        simulated = simulate_bonus(columns, BonusScenario.from_snapshot(snapshot()), GAME_NAMES)
+        report = build_report(columns, simulated, GAME_NAMES)
+
+        assert report["orders"] == len(DEPOSITS)
+        assert report["totals"]["deposit_volume"] == 530.0
+        assert report["totals"]["actual_bonus"] == 54.0
+        assert report["totals"]["simulated_bonus"] == 75.0
+        assert report["totals"]["delta"] == 21.0
+
+        by_game = {row["game_name"]: row for row in report["by_game"]}
+        assert by_game["alpha"]["orders"] == 3
+        assert by_game["alpha"]["simulated_bonus"] == 61.0
+        assert by_game["beta"]["simulated_bonus"] == 14.0
+        assert by_game["(unknown)"]["simulated_bonus"] == 0.0
+        assert sum(row["orders"] for row in report["by_game_day"]) == len(DEPOSITS)
+        print(f"✓ Report totals: {report['totals']}")
+
+
+class TestRulesSimulateAPI:
+    """Tests for POST /api/v1/admin/rules/simulate"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Login as admin"""
+        login_resp = requests.post(f"{BASE_URL}/api/v1/auth/login", json=ADMIN_CREDS)
+        assert login_resp.status_code == 200, f"Login failed: {login_resp.text}"
+        self.headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+
+    def simulate(self, payload, headers=None):
+        return requests.post(
+            f"{BASE_URL}/api/v1/admin/rules/simulate",
+            json=payload,
+            headers=headers or self.headers
+        )
+
+    def test_requires_admin(self):
+        """Client tokens are rejected"""
+        login_resp = requests.post(f"{BASE_URL}/api/v1/auth/login", json=CLIENT_CREDS)
+        headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+        response = self.simulate({"start": "2025-01-01", "end": "2025-02-01"}, headers)
+        assert response.status_code in [401, 403], f"Expected 401/403, got {response.status_code}"
+        print(f"✓ Non-admin gets {response.status_code}")
+
+    def test_end_must_follow_start(self):
+        """An empty or inverted window is rejected"""
+        response = self.simulate({"start": "2025-02-01", "end": "2025-02-01"})
+        assert response.status_code == 400, f"Expected 400, got {response.status_code}"
+        print(f"✓ end <= start returns 400")
+
+    def test_percent_bounds(self):
+        """Percent overrides are limited to 0-100"""
+        response = self.simulate({"start": "2025-01-01", "end": "2025-02-01", "signup_bonus": 150})
+        assert response.status_code == 422, f"Expected 422, got {response.status_code}"
+        print(f"✓ Out-of-range percent returns 422")
+
+    def test_report_structure(self):
+        """The report echoes the scenario and aggregates per game"""
+        response = self.simulate({
+            "start": "2020-01-01",
+            "end": "2030-01-01",
+            "default_deposit_bonus": 5,
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        for field in ("orders", "totals", "by_game", "by_game_day", "period",
+                      "rules_version", "scenario", "approximations", "timing_ms"):
+            assert field in data, f"Missing '{field}' field"
+        assert data["scenario"]["default_deposit_bonus"] == 5
+        assert sum(row["orders"] for row in data["by_game"]) == data["orders"]
+        print(f"✓ Simulated {data['orders']} deposits")
+
+    def test_include_daily_false_drops_daily_rows(self):
+        """include_daily=false leaves out the per-day breakdown"""
+        response = self.simulate({"start": "2020-01-01", "end": "2030-01-01", "include_daily": False})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        assert "by_game_day" not in response.json()
+        print(f"✓ include_daily=false drops by_game_day")
+
+
+# Run tests if executed directly
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
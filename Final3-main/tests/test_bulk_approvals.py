@@ -0,0 +1,194 @@
+"""
+Bulk Approval Tests
+Tests for POST /api/v1/admin/approvals/bulk:
+- Admin only; request validation (1-200 order ids, approve|reject)
+- Unknown / already processed orders fail alone without blocking the batch
+- Reject twice is a no-op the second time
+- Approving pending deposits credits each wallet exactly once (replay is a no-op)
+"""
+import pytest
+import requests
+import os
+import uuid
+from collections import defaultdict
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_CREDS = {"username": "admin", "password": "admin123"}
+CLIENT_CREDS = {"username": "testclient", "password": "test12345"}
+
+CREDIT_ORDER_TYPES = ("deposit", "wallet_topup", "wallet_load")
+
+
+def login(creds):
+    response = requests.post(f"{BASE_URL}/api/v1/auth/login", json=creds)
+    assert response.status_code == 200, f"Login failed: {response.text}"
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+class TestBulkApprovalAPI:
+    """Tests for the bulk approval endpoint"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Login as admin"""
+        self.headers = login(ADMIN_CREDS)
+
+    def bulk(self, order_ids, action, reason=None):
+        payload = {"order_ids": order_ids, "action": action}
+        if reason is not None:
+            payload["reason"] = reason
+        return requests.post(f"{BASE_URL}/api/v1/admin/approvals/bulk", json=payload, headers=self.headers)
+
+    def pending_orders(self, order_type=None):
+        params = {"order_type": order_type} if order_type else None
+        response = requests.get(f"{BASE_URL}/api/v1/admin/approvals/pending", params=params, headers=self.headers)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        return response.json()["pending"]
+
+    def order_detail(self, order_id):
+        response = requests.get(f"{BASE_URL}/api/v1/admin/orders/{order_id}", headers=self.headers)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        return response.json()
+
+    def test_requires_admin(self):
+        """Client tokens are rejected"""
+        response = requests.post(
+            f"{BASE_URL}/api/v1/admin/approvals/bulk",
+            json={"order_ids": ["x"], "action": "reject"},
+            headers=login(CLIENT_CREDS)
+        )
+        assert response.status_code in [401, 403], f"Expected 401/403, got {response.status_code}"
+        print(f"✓ Non-admin gets {response.status_code}")
+
+    def test_empty_order_list_rejected(self):
+        """At least one order id is required"""
+        response = self.bulk([], "approve")
+        assert response.status_code == 422, f"Expected 422, got {response.status_code}"
+        print(f"✓ Empty order list returns 422")
+
+    def test_batch_size_limit(self):
+        """More than 200 order ids is rejected"""
+        response = self.bulk([f"missing-{i}" for i in range(201)], "reject")
+        assert response.status_code == 422, f"Expected 422, got {response.status_code}"
+        print(f"✓ 201 orders returns 422")
+
+    def test_invalid_action_rejected(self):
+        """Only approve / reject are accepted"""
+        response = self.bulk(["x"], "delete")
+        assert response.status_code == 422, f"Expected 422, got {response.status_code}"
+        print(f"✓ Invalid action returns 422")
+
+    def test_unknown_orders_fail_individually(self):
+        """Unknown orders get a per-order failure, not an error for the batch"""
+        order_ids = [f"missing-{uuid.uuid4()}" for _ in range(3)]
+        response = self.bulk(order_ids, "reject", "test")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        assert data["success"] is True
+        assert data["total"] == 3
+        assert data["succeeded"] == 0
+        assert data["failed"] == 3
+        assert [r["order_id"] for r in data["results"]] == order_ids, "Results keep request order"
+        for result in data["results"]:
+            assert result["success"] is False
+            assert "message" in result and "error_code" in result
+        print(f"✓ Unknown orders fail individually")
+
+    def test_reject_then_reject_again_is_noop(self):
+        """Rejecting an already rejected order does not transition it again"""
+        pending = self.pending_orders()
+        if not pending:
+            pytest.skip("No pending orders to reject")
+        order_id = pending[0]["order_id"]
+
+        first = self.bulk([order_id], "reject", "Bulk test rejection").json()
+        assert first["results"][0]["success"] is True, f"Reject failed: {first}"
+        assert first["results"][0]["final_status"] == "rejected"
+        assert self.order_detail(order_id)["status"] == "rejected"
+
+        second = self.bulk([order_id], "reject", "Bulk test rejection").json()
+        result = second["results"][0]
+        assert result["already_processed"] is True or result["success"] is False, f"Second reject changed state: {result}"
+        assert self.order_detail(order_id)["status"] == "rejected"
+        print(f"✓ Second reject of {order_id} is a no-op")
+
+    def test_mixed_batch_is_not_blocked_by_bad_order(self):
+        """A pending order in the batch still succeeds next to an unknown one"""
+        pending = self.pending_orders()
+        if not pending:
+            pytest.skip("No pending orders to reject")
+        order_id = pending[0]["order_id"]
+        missing_id = f"missing-{uuid.uuid4()}"
+
+        data = self.bulk([missing_id, order_id], "reject", "Bulk test rejection").json()
+        by_id = {r["order_id"]: r for r in data["results"]}
+        assert by_id[missing_id]["success"] is False
+        assert by_id[order_id]["success"] is True, f"Pending order blocked by bad one: {by_id[order_id]}"
+        assert data["succeeded"] == 1 and data["failed"] == 1
+        print(f"✓ Bad order does not block the batch")
+
+
+class TestBulkApprovalMoneyPath:
+    """Approving deposits must credit each wallet exactly once"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Login as admin"""
+        self.headers = login(ADMIN_CREDS)
+
+    def test_bulk_approve_credits_wallets_once(self):
+        """Wallet balance rises by the approved amounts; replaying the batch credits nothing"""
+        response = requests.get(f"{BASE_URL}/api/v1/admin/approvals/pending", headers=self.headers)
+        assert response.status_code == 200
+        pending = [o for o in response.json()["pending"] if o["order_type"] in CREDIT_ORDER_TYPES][:5]
+        if not pending:
+            pytest.skip("No pending deposit orders to approve")
+        order_ids = [o["order_id"] for o in pending]
+
+        def balances():
+            details = [
+                requests.get(f"{BASE_URL}/api/v1/admin/orders/{oid}", headers=self.headers).json()
+                for oid in order_ids
+            ]
+            users = {d["user"]["user_id"]: float(d["user"]["current_balance"]["real"] or 0) for d in details}
+            owners = {d["order_id"]: d["user"]["user_id"] for d in details}
+            return users, owners
+
+        before, owners = balances()
+
+        response = requests.post(
+            f"{BASE_URL}/api/v1/admin/approvals/bulk",
+            json={"order_ids": order_ids, "action": "approve"},
+            headers=self.headers
+        )
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+
+        expected = defaultdict(float)
+        amounts = {o["order_id"]: float(o["amount"]) for o in pending}
+        for result in data["results"]:
+            if result["success"]:
+                expected[owners[result["order_id"]]] += amounts[result["order_id"]]
+
+        after, _ = balances()
+        for user_id, start in before.items():
+            assert after[user_id] == pytest.approx(start + expected[user_id]), \
+                f"User {user_id}: expected {start + expected[user_id]}, got {after[user_id]}"
+        print(f"✓ {data['succeeded']} approvals credited exactly once")
+
+        # Replay: nothing is credited twice
+        replay = requests.post(
+            f"{BASE_URL}/api/v1/admin/approvals/bulk",
+            json={"order_ids": order_ids, "action": "approve"},
+            headers=self.headers
+        ).json()
+        assert replay["total"] == len(order_ids)
+        replayed, _ = balances()
+        assert replayed == pytest.approx(after), "Replayed bulk approval moved money"
+        print(f"✓ Replayed bulk approval is a no-op")
+
+
+# Run tests if executed directly
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
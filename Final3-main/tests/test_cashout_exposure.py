@@ -0,0 +1,215 @@
+"""
+Cashout Evaluation Tests
+- evaluate_cashouts (NumPy batch) must agree with resolve_withdrawal_rules
+  (one user at a time) on the same inputs: blocks, multipliers, payout/void split
+- get_cashout_exposure aggregation
+- GET /api/v1/admin/reports/cashout-exposure: admin only, report shape and totals
+"""
+import asyncio
+import math
+import pytest
+import requests
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from api.v1.services import cashout_service, rules_service
+from api.v1.services.cashout_service import CashoutBatch, evaluate_cashouts, cashout_preview
+from api.v1.services.rules_service import RulesSnapshot, resolve_withdrawal_rules
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+ADMIN_CREDS = {"username": "admin", "password": "admin123"}
+CLIENT_CREDS = {"username": "testclient", "password": "test12345"}
+
+# user_id, game, real, bonus, locked, last deposit (None = no deposit), client (min, max) multipliers
+CASES = [
+    ("locked", "alpha", 500.0, 0.0, True, 100.0, (None, None)),
+    ("empty", "alpha", 0.0, 0.0, False, 100.0, (None, None)),
+    ("no-deposit", "alpha", 300.0, 0.0, False, None, (None, None)),
+    ("below-min", "alpha", 150.0, 0.0, False, 100.0, (None, None)),
+    ("within-max", "alpha", 250.0, 50.0, False, 100.0, (None, None)),
+    ("void-from-bonus", "beta", 100.0, 80.0, False, 50.0, (None, None)),
+    ("void-past-bonus", "beta", 100.0, 5.0, False, 10.0, (None, None)),
+    ("client-override", "alpha", 200.0, 0.0, False, 100.0, (1.0, 1.5)),
+    ("client-max-only", "beta", 90.0, 60.0, False, 40.0, (None, 2.0)),
+]
+
+
+def snapshot() -> RulesSnapshot:
+    return RulesSnapshot(
+        version=3,
+        system_settings={'min_cashout_multiplier': 1.0, 'max_cashout_multiplier': 3.0},
+        games={
+            'alpha': {'withdrawal_rules': {'min_multiplier_of_deposit': 2.0, 'max_multiplier_of_deposit': 4.0}},
+            'beta': {'withdrawal_rules': {}},
+        },
+        referral_perks={},
+        loaded_at=datetime.now(timezone.utc),
+    )
+
+
+def client_context(case):
+    """load_client_context()-shaped input for resolve_withdrawal_rules"""
+    user_id, game, real, bonus, locked, deposit, (client_min, client_max) = case
+    conditions = {}
+    if client_min is not None:
+        conditions['min_multiplier_of_deposit'] = client_min
+    if client_max is not None:
+        conditions['max_multiplier_of_deposit'] = client_max
+    return {
+        'user_id': user_id,
+        'real_balance': real,
+        'bonus_balance': bonus,
+        'withdraw_locked': locked,
+        'custom_rules': [{
+            'rule_id': f"rule-{user_id}", 'rule_type': 'withdrawal',
+            'conditions': conditions, 'actions': {}, 'priority': 0
+        }] if conditions else [],
+        'last_deposit': {'order_id': f"order-{user_id}", 'amount': deposit} if deposit is not None else None,
+    }
+
+
+def cashout_batch(cases) -> CashoutBatch:
+    """load_cashout_batch()-shaped input for evaluate_cashouts"""
+    def column(values):
+        return np.array([math.nan if v is None else v for v in values], dtype=np.float64)
+
+    return CashoutBatch(
+        user_ids=[c[0] for c in cases],
+        real_balance=column([c[2] for c in cases]),
+        bonus_balance=column([c[3] for c in cases]),
+        withdraw_locked=np.array([c[4] for c in cases], dtype=bool),
+        last_deposit=column([c[5] for c in cases]),
+        last_deposit_order_ids=[f"order-{c[0]}" if c[5] is not None else None for c in cases],
+        last_deposit_games=[c[1] if c[5] is not None else None for c in cases],
+        client_min_multiplier=column([c[6][0] for c in cases]),
+        client_max_multiplier=column([c[6][1] for c in cases]),
+    )
+
+
+@pytest.fixture
+def rules(monkeypatch):
+    snap = snapshot()
+
+    async def get_snapshot():
+        return snap
+
+    monkeypatch.setattr(rules_service, "get_rules_snapshot", get_snapshot)
+    monkeypatch.setattr(cashout_service, "get_rules_snapshot", get_snapshot)
+    return snap
+
+
+class TestEvaluateCashoutsMatchesRulesEngine:
+    """The batch evaluator must reproduce resolve_withdrawal_rules"""
+
+    @pytest.mark.parametrize("case", CASES, ids=[c[0] for c in CASES])
+    def test_same_result_as_resolve_withdrawal_rules(self, rules, case):
+        """Eligibility, error code, limits and payout/void split agree"""
+        eligible, expected = asyncio.run(
+            resolve_withdrawal_rules(case[0], case[1], context=client_context(case))
+        )
+
+        batch = cashout_batch([case])
+        preview = cashout_preview(batch, evaluate_cashouts(batch, rules), 0)
+
+        assert preview['eligible'] == eligible
+        assert preview.get('error_code') == expected.get('error_code')
+        if not eligible:
+            print(f"✓ {case[0]}: both block with {expected['error_code']}")
+            return
+
+        for field in ('last_deposit_amount', 'last_deposit_order_id', 'min_multiplier',
+                      'max_multiplier', 'min_cashout', 'max_cashout', 'current_balance'):
+            assert preview[field] == pytest.approx(expected[field]), f"{field} differs"
+        assert preview['cashout_calculation'] == pytest.approx(expected['cashout_calculation'])
+        print(f"✓ {case[0]}: {preview['cashout_calculation']}")
+
+    def test_batch_equals_one_by_one(self, rules):
+        """Evaluating all users together gives the same rows as one at a time"""
+        batch = cashout_batch(CASES)
+        result = evaluate_cashouts(batch, rules)
+        for i, case in enumerate(CASES):
+            single = cashout_batch([case])
+            assert cashout_preview(batch, result, i) == cashout_preview(single, evaluate_cashouts(single, rules), 0)
+        print(f"✓ Batch of {len(CASES)} matches single evaluations")
+
+    def test_payout_plus_void_is_whole_balance(self, rules):
+        """ALL balance is redeemed: payout + void == balance, split between cash and bonus"""
+        batch = cashout_batch(CASES)
+        result = evaluate_cashouts(batch, rules)
+        eligible = result.block == cashout_service.BLOCK_NONE
+        np.testing.assert_allclose((result.payout + result.void)[eligible], result.total_balance[eligible])
+        np.testing.assert_allclose(
+            (result.cash_consumed + result.cash_voided)[eligible], batch.real_balance[eligible]
+        )
+        np.testing.assert_allclose(
+            (result.bonus_consumed + result.bonus_voided)[eligible], batch.bonus_balance[eligible]
+        )
+        print(f"✓ payout + void covers the whole balance")
+
+
+class TestCashoutExposure:
+    """Tests for the exposure aggregation"""
+
+    def test_exposure_totals(self, rules, monkeypatch):
+        """Payout, void and blocked balances are summed per bucket"""
+        async def load_batch(user_ids=None, game_name=None):
+            return cashout_batch(CASES)
+
+        monkeypatch.setattr(cashout_service, "load_cashout_batch", load_batch)
+        report = asyncio.run(cashout_service.get_cashout_exposure())
+
+        assert report['users_with_balance'] == len(CASES)
+        assert report['rules_version'] == rules.version
+        assert report['eligible_users'] == 5
+        # within-max 300 | void-from-bonus 150 | void-past-bonus 30 | client-override 150 | client-max-only 80
+        assert report['payout_exposure'] == pytest.approx(710.0)
+        assert report['void_amount'] == pytest.approx(30.0 + 75.0 + 50.0 + 70.0)
+        assert report['cash_payout'] + report['bonus_payout'] == pytest.approx(report['payout_exposure'])
+        assert report['blocked']['withdraw_locked'] == {'users': 1, 'balance': 500.0}
+        assert report['blocked']['no_balance'] == {'users': 1, 'balance': 0.0}
+        assert report['blocked']['no_deposit'] == {'users': 1, 'balance': 300.0}
+        assert report['blocked']['below_min_cashout'] == {'users': 1, 'balance': 150.0}
+        assert report['by_game']['alpha'] == {'users': 2, 'payout': 450.0, 'void': 50.0}
+        assert report['by_game']['beta'] == {'users': 3, 'payout': 260.0, 'void': 175.0}
+        print(f"✓ Exposure: payout {report['payout_exposure']}, void {report['void_amount']}")
+
+
+class TestCashoutExposureAPI:
+    """Tests for GET /api/v1/admin/reports/cashout-exposure"""
+
+    def test_requires_admin(self):
+        """Client tokens are rejected"""
+        login_resp = requests.post(f"{BASE_URL}/api/v1/auth/login", json=CLIENT_CREDS)
+        response = requests.get(
+            f"{BASE_URL}/api/v1/admin/reports/cashout-exposure",
+            headers={"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+        )
+        assert response.status_code in [401, 403], f"Expected 401/403, got {response.status_code}"
+        print(f"✓ Non-admin gets {response.status_code}")
+
+    def test_report_is_consistent(self):
+        """Every user with a balance is either eligible or in exactly one blocked bucket"""
+        login_resp = requests.post(f"{BASE_URL}/api/v1/auth/login", json=ADMIN_CREDS)
+        response = requests.get(
+            f"{BASE_URL}/api/v1/admin/reports/cashout-exposure",
+            headers={"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+        )
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+
+        for field in ("users_with_balance", "total_balance", "eligible_users", "payout_exposure",
+                      "cash_payout", "bonus_payout", "void_amount", "blocked", "by_game", "rules_version"):
+            assert field in data, f"Missing '{field}' field"
+        blocked_users = sum(bucket["users"] for bucket in data["blocked"].values())
+        assert data["eligible_users"] + blocked_users == data["users_with_balance"]
+        assert data["cash_payout"] + data["bonus_payout"] == pytest.approx(data["payout_exposure"], abs=0.02)
+        assert sum(g["users"] for g in data["by_game"].values()) == data["eligible_users"]
+        print(f"✓ Exposure report consistent for {data['users_with_balance']} users")
+
+
+# Run tests if executed directly
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,179 @@
+"""
+Game Load Money Path Tests
+Tests for POST /api/v1/games/load (wallet -> game, reserve -> Games API -> settle):
+- Insufficient balance / missing confirmation never touch the wallet
+- A successful load debits the wallet exactly once
+- A Games API failure (503) refunds the debit
+- Replaying an Idempotency-Key: completed -> duplicate response, failed -> new attempt
+- Concurrent requests with one Idempotency-Key debit the wallet at most once
+"""
+import pytest
+import requests
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+CLIENT_CREDS = {"username": "testclient", "password": "test12345"}
+
+
+class TestGameLoadMoneyPath:
+    """Tests for wallet debits on game loads"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Login as client"""
+        login_resp = requests.post(f"{BASE_URL}/api/v1/auth/login", json=CLIENT_CREDS)
+        assert login_resp.status_code == 200, f"Login failed: {login_resp.text}"
+        self.headers = {
+            "Authorization": f"Bearer {login_resp.json()['access_token']}",
+            "Content-Type": "application/json"
+        }
+
+    def available(self):
+        response = requests.get(f"{BASE_URL}/api/v1/games/available", headers=self.headers)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        return response.json()
+
+    def wallet_balance(self) -> float:
+        return float(self.available()["wallet_balance"])
+
+    def loadable_game(self):
+        """A game and an amount the test client can afford, or skip"""
+        data = self.available()
+        for game in data["games"]:
+            amount = max(float(game.get("min_deposit_amount") or 0), 1.0)
+            if data["wallet_balance"] >= amount:
+                return game, amount
+        pytest.skip("Test client cannot afford a load on any active game")
+
+    def load(self, game_id, amount, idempotency_key=None, confirmed=True):
+        headers = dict(self.headers)
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+        return requests.post(
+            f"{BASE_URL}/api/v1/games/load",
+            json={"game_id": game_id, "amount": amount, "confirmed": confirmed},
+            headers=headers
+        )
+
+    def test_insufficient_balance_does_not_debit(self):
+        """Loading more than the wallet holds fails and moves nothing"""
+        data = self.available()
+        if not data["games"]:
+            pytest.skip("No active games")
+        before = float(data["wallet_balance"])
+        response = self.load(data["games"][0]["game_id"], before + 1000)
+        assert response.status_code == 400, f"Expected 400, got {response.status_code}"
+        assert self.wallet_balance() == pytest.approx(before)
+        print(f"✓ Insufficient balance returns 400, wallet unchanged")
+
+    def test_unknown_game_does_not_debit(self):
+        """An unknown game is rejected before any reservation"""
+        before = self.wallet_balance()
+        response = self.load(f"missing-{uuid.uuid4()}", 1.0)
+        assert response.status_code == 404, f"Expected 404, got {response.status_code}"
+        assert self.wallet_balance() == pytest.approx(before)
+        print(f"✓ Unknown game returns 404, wallet unchanged")
+
+    def test_load_debits_once_or_refunds(self):
+        """Success debits the amount once; a Games API failure refunds it"""
+        game, amount = self.loadable_game()
+        before = self.wallet_balance()
+        key = f"test-{uuid.uuid4()}"
+
+        response = self.load(game["game_id"], amount, key)
+        assert response.status_code in [200, 503], f"Unexpected {response.status_code}: {response.text}"
+
+        if response.status_code == 503:
+            detail = response.json()["detail"]
+            assert detail["error_code"] == "GAMES_API_ERROR"
+            assert "refunded" in detail["message"]
+            assert self.wallet_balance() == pytest.approx(before), "Failed load was not refunded"
+            print(f"✓ Games API failure refunded the wallet")
+            return
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["wallet_balance_remaining"] == pytest.approx(before - amount)
+        assert self.wallet_balance() == pytest.approx(before - amount)
+        print(f"✓ Load debited {amount} once")
+
+    def test_completed_idempotency_key_returns_duplicate(self):
+        """Replaying a completed load returns the original result without a second debit"""
+        game, amount = self.loadable_game()
+        key = f"test-{uuid.uuid4()}"
+
+        first = self.load(game["game_id"], amount, key)
+        if first.status_code != 200:
+            pytest.skip(f"Games API unavailable ({first.status_code})")
+        after_first = self.wallet_balance()
+
+        replay = self.load(game["game_id"], amount, key)
+        assert replay.status_code == 200, f"Expected 200, got {replay.status_code}"
+        data = replay.json()
+        assert data["duplicate"] is True
+        assert data["load_id"] == first.json()["load_id"]
+        assert self.wallet_balance() == pytest.approx(after_first), "Replay debited the wallet again"
+        print(f"✓ Replayed key returns duplicate, no second debit")
+
+    def test_failed_idempotency_key_allows_retry(self):
+        """After a refunded (failed) attempt the same key starts a new attempt"""
+        game, amount = self.loadable_game()
+        key = f"test-{uuid.uuid4()}"
+
+        first = self.load(game["game_id"], amount, key)
+        if first.status_code != 503:
+            pytest.skip("Games API is up - no failed attempt to retry")
+        before = self.wallet_balance()
+
+        retry = self.load(game["game_id"], amount, key)
+        assert retry.status_code in [200, 503], f"Unexpected {retry.status_code}: {retry.text}"
+        if retry.status_code == 200:
+            assert retry.json().get("duplicate") is not True
+            assert self.wallet_balance() == pytest.approx(before - amount)
+        else:
+            assert self.wallet_balance() == pytest.approx(before)
+        print(f"✓ Failed attempt can be retried with the same key")
+
+    def test_concurrent_requests_with_one_key_debit_once(self):
+        """Parallel requests sharing a key never debit more than once"""
+        game, amount = self.loadable_game()
+        before = self.wallet_balance()
+        if before < amount * 4:
+            pytest.skip("Balance too low to detect a double debit")
+        key = f"test-{uuid.uuid4()}"
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(pool.map(lambda _: self.load(game["game_id"], amount, key), range(4)))
+
+        codes = [r.status_code for r in responses]
+        assert all(code in [200, 409, 503] for code in codes), f"Unexpected statuses {codes}"
+        completed = [r for r in responses if r.status_code == 200 and not r.json().get("duplicate")]
+        assert len(completed) <= 1, f"{len(completed)} loads completed for one key"
+
+        expected = before - amount if completed else before
+        after = self.wallet_balance()
+        if any(code == 409 for code in codes) and not completed:
+            # A request may still be settling; it either completes or is refunded
+            assert after in (pytest.approx(before), pytest.approx(before - amount))
+        else:
+            assert after == pytest.approx(expected), f"Expected {expected}, got {after}"
+        print(f"✓ Concurrent requests with one key: statuses {codes}")
+
+    def test_missing_confirmation_does_not_debit(self):
+        """With auto-load off, an unconfirmed load asks for confirmation first"""
+        game, amount = self.loadable_game()
+        before = self.wallet_balance()
+        response = self.load(game["game_id"], amount, confirmed=False)
+        if response.status_code != 400:
+            pytest.skip("Auto-load is enabled for the test client")
+        assert response.json()["detail"]["error_code"] == "CONFIRMATION_REQUIRED"
+        assert self.wallet_balance() == pytest.approx(before)
+        print(f"✓ Unconfirmed load returns 400, wallet unchanged")
+
+
+# Run tests if executed directly
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,115 @@
+"""
+Telegram Rate Limiter Tests
+Unit tests for the TokenBucket behind telegram_scheduler:
+- Burst up to capacity goes out without waiting
+- Sends beyond the burst are spread at `rate` (FIFO reservations)
+- Tokens refill over time, never above capacity
+- pause() (Telegram retry_after) blocks the bucket for its duration
+"""
+import pytest
+
+from api.v1.core import telegram_rate_limiter
+from api.v1.core.telegram_rate_limiter import TokenBucket
+
+
+class FakeClock:
+    """Stands in for the `time` module inside telegram_rate_limiter"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(telegram_rate_limiter, "time", fake)
+    return fake
+
+
+class TestTokenBucketBurst:
+    """Test burst capacity and pacing"""
+
+    def test_burst_up_to_capacity_does_not_wait(self, clock):
+        """The first `capacity` reservations are immediate"""
+        bucket = TokenBucket(rate=1.0, capacity=3)
+        waits = [bucket.reserve() for _ in range(3)]
+        assert waits == [0.0, 0.0, 0.0], f"Expected no waits, got {waits}"
+        print(f"✓ Burst of 3 sent without waiting")
+
+    def test_reservations_beyond_capacity_are_spread_at_rate(self, clock):
+        """Each extra reservation waits one more 1/rate interval"""
+        bucket = TokenBucket(rate=2.0, capacity=1)
+        waits = [bucket.reserve() for _ in range(4)]
+        assert waits == pytest.approx([0.0, 0.5, 1.0, 1.5]), f"Unexpected waits {waits}"
+        print(f"✓ Sends beyond the burst are spaced at 1/rate: {waits}")
+
+    def test_minimums_are_enforced(self, clock):
+        """A zero rate or capacity is clamped instead of dividing by zero"""
+        bucket = TokenBucket(rate=0, capacity=0)
+        assert bucket.rate > 0
+        assert bucket.capacity == 1.0
+        assert bucket.reserve() == 0.0
+        print(f"✓ rate/capacity clamped to safe minimums")
+
+
+class TestTokenBucketRefill:
+    """Test refill over time"""
+
+    def test_tokens_refill_with_time(self, clock):
+        """An emptied bucket is usable again after 1/rate seconds"""
+        bucket = TokenBucket(rate=1.0, capacity=1)
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == pytest.approx(1.0)
+
+        clock.advance(2.0)
+        assert bucket.reserve() == 0.0, "Bucket should have refilled"
+        print(f"✓ Tokens refill at rate")
+
+    def test_refill_is_capped_at_capacity(self, clock):
+        """A long idle period does not allow more than `capacity` immediate sends"""
+        bucket = TokenBucket(rate=10.0, capacity=2)
+        bucket.reserve()
+        clock.advance(3600)
+        waits = [bucket.reserve() for _ in range(3)]
+        assert waits[:2] == [0.0, 0.0]
+        assert waits[2] == pytest.approx(0.1)
+        print(f"✓ Refill capped at capacity: {waits}")
+
+
+class TestTokenBucketPause:
+    """Test pause() for Telegram 429 retry_after"""
+
+    def test_pause_delays_next_reservation(self, clock):
+        """After pause(5) the next send waits out the pause"""
+        bucket = TokenBucket(rate=1.0, capacity=5)
+        bucket.pause(5.0)
+        wait = bucket.reserve()
+        assert wait == pytest.approx(6.0), f"Expected pause + one interval, got {wait}"
+        print(f"✓ Paused bucket waits {wait}s")
+
+    def test_pause_expires(self, clock):
+        """Once the pause has passed, sends resume at rate"""
+        bucket = TokenBucket(rate=1.0, capacity=5)
+        bucket.pause(5.0)
+        clock.advance(7.0)
+        assert bucket.reserve() == 0.0
+        print(f"✓ Bucket resumes after the pause")
+
+    def test_shorter_pause_does_not_shorten_longer_one(self, clock):
+        """A second, shorter retry_after never cuts an existing pause short"""
+        bucket = TokenBucket(rate=1.0, capacity=5)
+        bucket.pause(10.0)
+        bucket.pause(2.0)
+        assert bucket.reserve() >= 10.0
+        print(f"✓ Longest pause wins")
+
+
+# Run tests if executed directly
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,177 @@
+"""
+Webhook Circuit Breaker Tests
+Unit tests for the per-webhook CircuitBreaker state machine:
+- closed -> open after webhook_breaker_failure_threshold consecutive failures
+- open short-circuits until webhook_breaker_open_seconds have passed
+- half_open lets exactly one probe through
+- probe success closes the circuit, probe failure re-opens it
+- CircuitBreakerRegistry keeps one breaker per webhook_id
+"""
+import pytest
+
+from api.v1.services import webhook_service
+from api.v1.services.webhook_service import (
+    CircuitBreaker, CircuitBreakerRegistry,
+    BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN
+)
+
+FAILURE_THRESHOLD = 3
+OPEN_SECONDS = 30
+
+
+class FakeClock:
+    """Stands in for the `time` module inside webhook_service"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(webhook_service, "time", fake)
+    monkeypatch.setattr(webhook_service.settings, "webhook_breaker_failure_threshold", FAILURE_THRESHOLD)
+    monkeypatch.setattr(webhook_service.settings, "webhook_breaker_open_seconds", OPEN_SECONDS)
+    return fake
+
+
+def open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker()
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.record_failure()
+    return breaker
+
+
+class TestClosedState:
+    """Test the closed state"""
+
+    def test_new_breaker_is_closed(self, clock):
+        """A new breaker lets deliveries through"""
+        breaker = CircuitBreaker()
+        assert breaker.state == BREAKER_CLOSED
+        assert breaker.allow_request() is True
+        print(f"✓ New breaker is closed")
+
+    def test_failures_below_threshold_stay_closed(self, clock):
+        """Fewer than threshold consecutive failures keep the circuit closed"""
+        breaker = CircuitBreaker()
+        for _ in range(FAILURE_THRESHOLD - 1):
+            breaker.record_failure()
+        assert breaker.state == BREAKER_CLOSED
+        assert breaker.allow_request() is True
+        print(f"✓ {FAILURE_THRESHOLD - 1} failures keep the circuit closed")
+
+    def test_success_resets_failure_count(self, clock):
+        """Failures must be consecutive to open the circuit"""
+        breaker = CircuitBreaker()
+        for _ in range(FAILURE_THRESHOLD - 1):
+            breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == BREAKER_CLOSED
+        assert breaker.consecutive_failures == 1
+        print(f"✓ Success resets consecutive failures")
+
+
+class TestOpenState:
+    """Test closed -> open and the open window"""
+
+    def test_threshold_failures_open_circuit(self, clock):
+        """Threshold consecutive failures open the circuit"""
+        breaker = open_breaker()
+        assert breaker.state == BREAKER_OPEN
+        assert breaker.open_count == 1
+        assert breaker.allow_request() is False
+        print(f"✓ Circuit opens after {FAILURE_THRESHOLD} failures")
+
+    def test_open_circuit_reports_probe_time(self, clock):
+        """seconds_until_probe / to_dict count down the open window"""
+        breaker = open_breaker()
+        clock.advance(10)
+        assert breaker.seconds_until_probe() == pytest.approx(OPEN_SECONDS - 10)
+        state = breaker.to_dict()
+        assert state["state"] == BREAKER_OPEN
+        assert state["probe_in_seconds"] == pytest.approx(OPEN_SECONDS - 10)
+        print(f"✓ Open circuit reports {state['probe_in_seconds']}s until probe")
+
+    def test_open_circuit_blocks_until_window_passes(self, clock):
+        """No delivery is allowed before webhook_breaker_open_seconds"""
+        breaker = open_breaker()
+        clock.advance(OPEN_SECONDS - 1)
+        assert breaker.allow_request() is False
+        assert breaker.state == BREAKER_OPEN
+        print(f"✓ Open circuit short-circuits during its window")
+
+
+class TestHalfOpenState:
+    """Test open -> half_open -> closed/open"""
+
+    def test_window_expiry_allows_single_probe(self, clock):
+        """After the window exactly one probe is let through"""
+        breaker = open_breaker()
+        clock.advance(OPEN_SECONDS)
+        assert breaker.allow_request() is True
+        assert breaker.state == BREAKER_HALF_OPEN
+        assert breaker.allow_request() is False, "Only one probe may be in flight"
+        print(f"✓ Half-open allows a single probe")
+
+    def test_probe_success_closes_circuit(self, clock):
+        """A successful probe closes the circuit"""
+        breaker = open_breaker()
+        clock.advance(OPEN_SECONDS)
+        assert breaker.allow_request() is True
+        breaker.record_success()
+        assert breaker.state == BREAKER_CLOSED
+        assert breaker.consecutive_failures == 0
+        assert breaker.allow_request() is True
+        print(f"✓ Probe success closes the circuit")
+
+    def test_probe_failure_reopens_circuit(self, clock):
+        """A failed probe re-opens the circuit for a new window"""
+        breaker = open_breaker()
+        clock.advance(OPEN_SECONDS)
+        assert breaker.allow_request() is True
+        breaker.record_failure()
+        assert breaker.state == BREAKER_OPEN
+        assert breaker.open_count == 2
+        assert breaker.allow_request() is False
+
+        clock.advance(OPEN_SECONDS)
+        assert breaker.allow_request() is True, "A new probe is allowed after the new window"
+        print(f"✓ Probe failure re-opens the circuit")
+
+
+class TestCircuitBreakerRegistry:
+    """Test per-webhook breaker registry"""
+
+    def test_breakers_are_per_webhook(self, clock):
+        """Failures on one webhook do not affect another"""
+        registry = CircuitBreakerRegistry()
+        failing = registry.get("wh-1")
+        for _ in range(FAILURE_THRESHOLD):
+            failing.record_failure()
+
+        assert registry.get("wh-1") is failing
+        assert registry.get_state("wh-1")["state"] == BREAKER_OPEN
+        assert registry.get_state("wh-2")["state"] == BREAKER_CLOSED
+        assert registry.get("wh-2").allow_request() is True
+        assert set(registry.snapshot()) == {"wh-1", "wh-2"}
+        print(f"✓ Breakers are isolated per webhook")
+
+    def test_unknown_webhook_state_is_closed(self, clock):
+        """get_state does not create a breaker for an unknown webhook"""
+        registry = CircuitBreakerRegistry()
+        assert registry.get_state("unknown")["state"] == BREAKER_CLOSED
+        assert registry.snapshot() == {}
+        print(f"✓ Unknown webhook reports closed")
+
+
+# Run tests if executed directly
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])